@@ -0,0 +1,75 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+# 
+
+import numpy as np
+
+from dmpbbo_lib.dmp.Trajectory import Trajectory
+from dmpbbo_lib.precision import asFloatType
+
+
+class AffineTrajectoryOperator:
+    """Affine map from the parameter vector of a Dmp to its trajectory.
+    
+    For fixed time steps, tau, initial state and attractor state, the trajectory of a Dmp 
+    (positions, velocities, accelerations and forcing terms) is 
+      jacobian * values + offset
+    See Dmp.getAffineTrajectoryOperator(). Evaluating this for one parameter vector, or for a 
+    whole batch of them, is a single matrix product.
+    """
+    
+    def __init__(self, ts, jacobian, offset):
+        # jacobian is 4 x n_time_steps x n_dims x n_parameters, offset is 4 x n_time_steps x n_dims
+        # The first axis is for ys, yds, ydds and forcing terms respectively.
+        assert(jacobian.shape[:-1]==offset.shape)
+        self.ts_ = ts
+        self.shape_ = offset.shape
+        self.n_parameters_ = jacobian.shape[-1]
+        # Stored in the float type when the operator is constructed, see precision.setFloatType()
+        self.jacobian_ = asFloatType(np.reshape(jacobian,(-1,self.n_parameters_)))
+        # Flush subnormal numbers (e.g. from the decayed gating term) to zero. In single 
+        # precision, there are many of them, and they make the matrix product much slower.
+        tiny = np.finfo(self.jacobian_.dtype).tiny
+        self.jacobian_ = np.where(np.abs(self.jacobian_)<tiny,0.0,self.jacobian_).astype(self.jacobian_.dtype)
+        self.offset_ = asFloatType(np.reshape(offset,-1))
+        
+    def getJacobian(self):
+        """Derivative of ys, yds, ydds and forcing terms w.r.t. the parameters (4 x n_time_steps x n_dims x n_parameters)."""
+        return np.reshape(self.jacobian_,self.shape_+(self.n_parameters_,))
+        
+    def getOffset(self):
+        """ys, yds, ydds and forcing terms for a parameter vector of zeros (4 x n_time_steps x n_dims)."""
+        return np.reshape(self.offset_,self.shape_)
+        
+    def evaluate(self, values):
+        """Compute (ys, yds, ydds, forcing_terms) for a parameter vector, or for a batch of them.
+        
+        For a parameter vector, each of the returned arrays is n_time_steps x n_dims. For a 
+        batch of parameter vectors (n_samples x n_parameters), they are 
+        n_samples x n_time_steps x n_dims.
+        """
+        values = np.asarray(values,dtype=self.jacobian_.dtype)
+        assert(values.shape[-1]==self.n_parameters_)
+        outputs = np.dot(values,self.jacobian_.T) + self.offset_
+        outputs = np.reshape(outputs,values.shape[:-1]+self.shape_)
+        # Move the axis for ys, yds, ydds and forcing terms to the front
+        outputs = np.moveaxis(outputs,-3,0)
+        return ( outputs[0], outputs[1], outputs[2], outputs[3] )
+        
+    def evaluateAsTrajectory(self, values):
+        ( ys, yds, ydds, forcing_terms ) = self.evaluate(values)
+        return Trajectory(self.ts_,ys,yds,ydds,forcing_terms)
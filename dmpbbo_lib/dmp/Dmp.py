@@ -19,11 +19,14 @@
 import numpy as np
 import sys
 import os
+from scipy import signal
 
 
 from dmpbbo_lib.dmp.Trajectory import Trajectory
+from dmpbbo_lib.dmp.AffineTrajectoryOperator import AffineTrajectoryOperator
 
 from dmpbbo_lib.functionapproximators.Parameterizable import Parameterizable
+from dmpbbo_lib.functionapproximators.ActivationCache import ActivationCache
 
 from dmpbbo_lib.dynamicalsystems.DynamicalSystem import DynamicalSystem
 from dmpbbo_lib.dynamicalsystems.ExponentialSystem import ExponentialSystem
@@ -31,6 +34,9 @@ from dmpbbo_lib.dynamicalsystems.SigmoidSystem import SigmoidSystem
 from dmpbbo_lib.dynamicalsystems.TimeSystem import TimeSystem
 from dmpbbo_lib.dynamicalsystems.SpringDamperSystem import SpringDamperSystem
 
+from dmpbbo_lib.precision import getFloatType
+from dmpbbo_lib import kernels
+
 
 class Dmp(DynamicalSystem,Parameterizable):
 
@@ -46,28 +52,55 @@ class Dmp(DynamicalSystem,Parameterizable):
         alpha = 20.0
         self.spring_system_ = SpringDamperSystem(tau,y_init,y_attr,alpha)
         
-        self.function_approximators_ = function_apps
+        if isinstance(function_apps,Parameterizable):
+            # One function approximator with multiple outputs, shared by all dimensions. The 
+            # basis function activations are then only computed once for all dimensions.
+            self.function_approximators_ = [function_apps]
+            self.shared_function_approximator_ = True
+        else:
+            # One function approximator for each dimension
+            self.function_approximators_ = function_apps
+            self.shared_function_approximator_ = False
         
         self.forcing_term_scaling_ = forcing_term_scaling
         
         self.ts_train_ = None
+        
+        # How analyticalSolution integrates the spring-damper system: "EULER" for Euler 
+        # integration, or "EXACT" for its exact solution, see integrateSpringDamperExact()
+        self.spring_damper_integration_method_ = "EULER"
+        
+        # How the rates of change are computed: "SUBSYSTEMS" calls the subsystems, "FUSED" computes
+        # them in one pass, with constants precomputed by updateFusedConstants()
+        self.differential_equation_backend_ = "SUBSYSTEMS"
+        
+        # Solutions of the phase, gating and goal systems for the last times, which do not depend 
+        # on the parameters. See analyticalSolutionSubsystems()
+        self.subsystem_solutions_ = None
+        self.subsystem_solutions_key_ = None
+        
+        # See enableParameterVectorBuffer()
+        self.parameter_buffer_ = None
+        self.parameter_buffer_copies_ = []
 
         # Make room for the subsystems
         self.dim_ = 3*dim_orig+2
         
-        self.SPRING    = np.arange(0*dim_orig+0, 0*dim_orig+0 +2*dim_orig)
-        self.SPRING_Y  = np.arange(0*dim_orig+0, 0*dim_orig+0 +dim_orig)
-        self.SPRING_Z  = np.arange(1*dim_orig+0, 1*dim_orig+0 +dim_orig)
-        self.GOAL      = np.arange(2*dim_orig+0, 2*dim_orig+0 +dim_orig)
-        self.PHASE     = np.arange(3*dim_orig+0, 3*dim_orig+0 +       1)
-        self.GATING    = np.arange(3*dim_orig+1, 3*dim_orig+1 +       1)
+        # Slices rather than index arrays, so that indexing returns views instead of copies
+        self.SPRING    = slice(0*dim_orig+0, 0*dim_orig+0 +2*dim_orig)
+        self.SPRING_Y  = slice(0*dim_orig+0, 0*dim_orig+0 +dim_orig)
+        self.SPRING_Z  = slice(1*dim_orig+0, 1*dim_orig+0 +dim_orig)
+        self.GOAL      = slice(2*dim_orig+0, 2*dim_orig+0 +dim_orig)
+        self.PHASE     = slice(3*dim_orig+0, 3*dim_orig+0 +       1)
+        self.GATING    = slice(3*dim_orig+1, 3*dim_orig+1 +       1)
         #print(self.SPRING)
         #print(self.SPRING_Y)
         #print(self.SPRING_Z)
         #print(self.GOAL)
         #print(self.PHASE)
         #print(self.GATING)
-
+        
+        self.updateFusedConstants()
         
     def set_tau(self,tau):
         
@@ -79,11 +112,30 @@ class Dmp(DynamicalSystem,Parameterizable):
             self.goal_system_.set_tau(tau)
         self.phase_system_ .set_tau(tau)
         self.gating_system_.set_tau(tau)
+        self.updateFusedConstants()
+        self.clearSubsystemSolutions()
+        
+    def set_initial_state(self,y_init):
+        super().set_initial_state(y_init)
+        
+        # Set value in all relevant subsystems also  
+        self.spring_system_.set_initial_state(y_init)
+        if self.goal_system_:
+            self.goal_system_.set_initial_state(y_init)
+        self.clearSubsystemSolutions()
+        
+    def set_attractor_state(self,y_attr):
+        super().set_attractor_state(y_attr)
+        
+        # Set value in all relevant subsystems also  
+        if self.goal_system_:
+            self.goal_system_.set_attractor_state(y_attr)
+        self.clearSubsystemSolutions()
         
     def integrateStart(self):
         
-        x = np.zeros(self.dim_)
-        xd = np.zeros(self.dim_)
+        x = np.zeros(self.dim_,dtype=getFloatType())
+        xd = np.zeros(self.dim_,dtype=getFloatType())
   
         # Start integrating goal system if it exists
         if self.goal_system_ is None:
@@ -106,60 +158,205 @@ class Dmp(DynamicalSystem,Parameterizable):
         xd = self.differentialEquation(x)
         return (x,xd)
 
-    def differentialEquation(self,x):
-        n_dims = self.dim_
+    def stream(self,dt,n_time_steps=None,chunk_size=None):
+        """Integrate the Dmp step by step, and yield its states with constant memory.
         
-        xd = np.zeros(x.shape)
+        Returns a generator that yields (t, x, xd) for each time step, starting with the initial 
+        state. If chunk_size is set, it yields (ts, xs, xds) for chunk_size time steps at a time 
+        instead, see streamChunks(). The stream ends after n_time_steps, or never if it is None.
+        
+        Changes to the Dmp while streaming, e.g. with set_attractor_state, set_tau or 
+        setParameterVectorSelected, take effect at the next time step. 
+        """
+        if chunk_size is None:
+            return self.streamSteps(dt,n_time_steps)
+        return self.streamChunks(dt,chunk_size,n_time_steps)
+        
+    def streamSteps(self,dt,n_time_steps=None):
+        """Generator for stream(). The yielded arrays are overwritten at the next step."""
+        (x, xd) = self.integrateStart()
+        x_updated = np.zeros(x.shape,dtype=x.dtype)
+        workspace = np.zeros([4,self.dim_],dtype=x.dtype)
+        tt = 0
+        while n_time_steps is None or tt<n_time_steps:
+            if tt>0:
+                self.integrateStepInPlace(dt,x,x_updated,xd,workspace)
+                (x, x_updated) = (x_updated, x)
+            yield (tt*dt, x, xd)
+            tt += 1
+            
+    def streamChunks(self,dt,chunk_size,n_time_steps=None):
+        """Generator for stream() with chunks. The yielded arrays are overwritten at the next chunk.
         
+        Changes to the Dmp take effect at the start of the next chunk. The last chunk is shorter if 
+        n_time_steps is not a multiple of chunk_size.
+        """
+        ts = np.zeros(chunk_size)
+        xs = np.zeros([chunk_size,self.dim_],dtype=getFloatType())
+        xds = np.zeros([chunk_size,self.dim_],dtype=getFloatType())
+        i_step = 0
+        for (t, x, xd) in self.streamSteps(dt,n_time_steps):
+            ts[i_step] = t
+            xs[i_step] = x
+            xds[i_step] = xd
+            i_step += 1
+            if i_step==chunk_size:
+                yield (ts, xs, xds)
+                i_step = 0
+        if i_step>0:
+            yield (ts[:i_step], xs[:i_step], xds[:i_step])
+
+    def differentialEquation(self,x):
+        xd = np.empty(x.shape,dtype=x.dtype)
+        self.differentialEquationInPlace(x,xd)
+        return xd
+
+    def differentialEquationInPlace(self,x,xd):
+        """Write the rates of change of state x into xd, without allocating arrays.
+        
+        The attractor state of the spring-damper system is passed rather than set, so that one Dmp
+        may be integrated in several loops at once. Only the function approximators allocate 
+        memory, i.e. in their predict() function.
+        """
+        if self.differential_equation_backend_.upper()=="FUSED":
+            self.differentialEquationFused(x,xd)
+        else:
+            self.differentialEquationSubsystems(x,xd)
+            
+    def differentialEquationSubsystems(self,x,xd):
+        x_phase = x[self.PHASE]
+        x_gating = x[self.GATING]
+        xd_y = xd[self.SPRING_Y]
+        xd_z = xd[self.SPRING_Z]
+        xd_goal = xd[self.GOAL]
         if self.goal_system_ is None:
-            # If there is no dynamical system for the delayed goal, the goal is
-            # simply the attractor state
-            self.spring_system_.set_attractor_state(self.attractor_state_)
-            # with zero change
-            xd_goal = np.zeros(n_dims)
+            x_goal = self.attractor_state_
         else:
-            # Integrate goal system and get current goal state
-            self.goal_system_.set_attractor_state(self.attractor_state_)
             x_goal = x[self.GOAL]
-            xd[self.GOAL] = self.goal_system_.differentialEquation(x_goal)
-            # The goal state is the attractor state of the spring-damper system
-            self.spring_system_.set_attractor_state(x_goal)
-    
-  
-        # Integrate spring damper system
-        #Forcing term is added to spring_state later
-        xd[self.SPRING] = self.spring_system_.differentialEquation(x[self.SPRING])
-
-  
-        # Non-linear forcing term phase and gating systems
-        xd[self.PHASE] = self.phase_system_.differentialEquation(x[self.PHASE])
-        xd[self.GATING] = self.gating_system_.differentialEquation(x[self.GATING])
-
-        fa_output = self.computeFunctionApproximatorOutput(x[self.PHASE]) 
-
-        # Gate the output of the function approximators
-        gating = x[self.GATING]
-        forcing_term = gating*fa_output
         
-  
-        # Scale the forcing term, if necessary
+        # Spring-damper system, see SpringDamperSystem.differentialEquationInPlace. xd_z is used 
+        # as temporary storage. 
+        spring = self.spring_system_
+        np.subtract(x[self.SPRING_Y],x_goal,out=xd_y)
+        xd_y *= -spring.spring_constant_
+        np.multiply(x[self.SPRING_Z],spring.damping_coefficient_,out=xd_z)
+        xd_y -= xd_z
+        xd_y /= spring.mass_*spring.tau_
+        
+        # Forcing term, computed in xd_z. xd_goal is used as temporary storage.
+        self.writeFunctionApproximatorOutput(x_phase,xd_z)
+        xd_z *= x_gating
         if (self.forcing_term_scaling_=="G_MINUS_Y0_SCALING"):
-            g_minus_y0 = (self.attractor_state_-self.initial_state_)
-            forcing_term = forcing_term*g_minus_y0
+            np.subtract(self.attractor_state_,self.initial_state_,out=xd_goal)
+            xd_z *= xd_goal
+        elif (self.forcing_term_scaling_=="AMPLITUDE_SCALING"):
+            xd_z *= self.trajectory_amplitudes_
+        xd_z /= self.tau_
+        
+        # Add the forcing term to the acceleration of the spring-damper system
+        xd_z += xd_y
+        np.divide(x[self.SPRING_Z],spring.tau_,out=xd_y)
+        
+        if self.goal_system_ is None:
+            xd_goal[:] = 0.0
+        else:
+            self.goal_system_.differentialEquationInPlace(x_goal,xd_goal,self.attractor_state_)
+        self.phase_system_.differentialEquationInPlace(x_phase,xd[self.PHASE])
+        self.gating_system_.differentialEquationInPlace(x_gating,xd[self.GATING])
+
+    def updateFusedConstants(self):
+        """Precompute the constants of differentialEquationFused from the subsystems."""
+        spring = self.spring_system_
+        mass_tau = spring.mass_*spring.tau_
+        if self.goal_system_ is None:
+            goal_rate = 0.0
+        else:
+            goal_rate = self.goal_system_.alpha_/self.goal_system_.tau_
+        phase_rate = 1.0/self.phase_system_.tau_
+        if self.phase_system_.count_down_:
+            phase_rate = -phase_rate
+        gating = self.gating_system_
+        self.fused_constants_ = (1.0/spring.tau_, spring.spring_constant_/mass_tau, 
+            spring.damping_coefficient_/mass_tau, 1.0/self.tau_, goal_rate, phase_rate, 
+            gating.max_rate_, 1.0/gating.Ks_[0])
+        
+    def differentialEquationFused(self,x,xd):
+        """Compute the rates of change of all subsystems in one pass, see differentialEquationInPlace.
+        
+        The subsystems are not called; their constants are cached in updateFusedConstants().
+        """
+        (inv_tau_spring, spring_rate, damping_rate, inv_tau, goal_rate, phase_rate, gating_rate, inv_K) = self.fused_constants_
+        y = x[self.SPRING_Y]
+        z = x[self.SPRING_Z]
+        xd_y = xd[self.SPRING_Y]
+        xd_z = xd[self.SPRING_Z]
+        xd_goal = xd[self.GOAL]
+        i_phase = self.PHASE.start
+        i_gating = self.GATING.start
+        phase = x[i_phase]
+        gating = x[i_gating]
+        if self.goal_system_ is None:
+            goal = self.attractor_state_
+        else:
+            goal = x[self.GOAL]
         
+        # Gated and scaled forcing term, with xd_y as temporary storage
+        self.writeFunctionApproximatorOutput(x[self.PHASE],xd_z)
+        xd_z *= gating*inv_tau
+        if (self.forcing_term_scaling_=="G_MINUS_Y0_SCALING"):
+            np.subtract(self.attractor_state_,self.initial_state_,out=xd_y)
+            xd_z *= xd_y
         elif (self.forcing_term_scaling_=="AMPLITUDE_SCALING"):
-            forcing_term = forcing_term*self.trajectory_amplitudes_
-
-        # Add forcing term to the ZD component of the spring state
-        xd[self.SPRING_Z] += np.squeeze(forcing_term)/self.tau_
+            xd_z *= self.trajectory_amplitudes_
+            
+        # Spring-damper system, with xd_goal as temporary storage
+        np.subtract(goal,y,out=xd_goal)
+        xd_goal *= spring_rate
+        xd_z += xd_goal
+        np.multiply(z,damping_rate,out=xd_goal)
+        xd_z -= xd_goal
+        np.multiply(z,inv_tau_spring,out=xd_y)
+        
+        # Goal system
+        np.subtract(self.attractor_state_,goal,out=xd_goal)
+        xd_goal *= goal_rate
+        
+        # Phase system, which stops at 1 (or 0 when counting down)
+        if (phase<1.0 and phase_rate>0.0) or (phase>0.0 and phase_rate<0.0):
+            xd[i_phase] = phase_rate
+        else:
+            xd[i_phase] = 0.0
+            
+        # Gating system
+        xd[i_gating] = gating_rate*gating*(1.0-gating*inv_K)
+        
+    def writeFunctionApproximatorOutput(self,phase_state,fa_output):
+        """Write the output of the function approximators for one phase state into fa_output."""
+        if self.shared_function_approximator_:
+            fa = self.function_approximators_[0]
+            if fa.isTrained():
+                fa.predictInPlace(phase_state,np.reshape(fa_output,(1,-1)))
+            else:
+                fa_output[:] = 0.0
+            return
+            
+        for i_fa in range(self.dim_orig_):
+            fa = self.function_approximators_[i_fa]
+            if fa and fa.isTrained():
+                fa.predictInPlace(phase_state,fa_output[i_fa:i_fa+1])
+            else:
+                fa_output[i_fa] = 0.0
         
-        return xd
-
-
     def computeFunctionApproximatorOutput(self,phase_state):
         n_time_steps = phase_state.size
         n_dims = self.dim_orig_
-        fa_output = np.zeros([n_time_steps,n_dims])
+        fa_output = np.zeros([n_time_steps,n_dims],dtype=getFloatType())
+        if self.shared_function_approximator_:
+            fa = self.function_approximators_[0]
+            if fa.isTrained():
+                fa_output[:,:] = np.reshape(fa.predict(phase_state),(n_time_steps,n_dims))
+            return fa_output
+            
         for i_fa in range(n_dims):
             if self.function_approximators_[i_fa]:
                 if self.function_approximators_[i_fa].isTrained():
@@ -179,12 +376,7 @@ class Dmp(DynamicalSystem,Parameterizable):
         n_time_steps = ts.size
         
         # INTEGRATE SYSTEMS ANALYTICALLY AS MUCH AS POSSIBLE
-
-        # Integrate phase
-        ( xs_phase, xds_phase) = self.phase_system_.analyticalSolution(ts)
-        
-        # Compute gating term
-        ( xs_gating, xds_gating ) = self.gating_system_.analyticalSolution(ts)
+        ( xs_phase, xds_phase, xs_gating, xds_gating, xs_goal, xds_goal ) = self.analyticalSolutionSubsystems(ts)
         
         # Compute the output of the function approximator
         fa_outputs = self.computeFunctionApproximatorOutput(xs_phase)
@@ -202,7 +394,102 @@ class Dmp(DynamicalSystem,Parameterizable):
             trajectory_amplitudes_rep = np.tile(self.trajectory_amplitudes_,(n_time_steps,1))
             forcing_terms *= trajectory_amplitudes_rep
   
+            
+        xs = np.zeros([n_time_steps,self.dim_],dtype=getFloatType())
+        xds = np.zeros([n_time_steps,self.dim_],dtype=getFloatType())
+    
+        xs[:,self.GOAL] = xs_goal     
+        xds[:,self.GOAL] = xds_goal
+        xs[:,self.PHASE] = xs_phase   
+        xds[:,self.PHASE] = xds_phase
+        xs[:,self.GATING] = xs_gating 
+        xds[:,self.GATING] = xds_gating
+
   
+        # THE REST CANNOT BE DONE ANALYTICALLY
+  
+        # Integrate the spring damper system, with the delayed goal as its attractor state, and 
+        # the forcing term added to its acceleration.
+        ( ys, zs, yds, zds ) = self.integrateSpringDamper(ts,xs_goal,forcing_terms,self.initial_state_)
+        xs[:,self.SPRING_Y] = ys
+        xs[:,self.SPRING_Z] = zs
+        xds[:,self.SPRING_Y] = yds
+        xds[:,self.SPRING_Z] = zds
+            
+        return ( xs, xds, forcing_terms, fa_outputs)
+        
+        
+    def analyticalSolutionBatch(self,samples,ts=None):
+        """Compute the analytical solution for many parameter vectors (n_samples x n_parameters) at once.
+        
+        The phase, gating and goal systems do not depend on the parameters, and are computed only
+        once. The spring-damper systems of all samples are integrated together, with one step for 
+        all of them at each time step (see spring_damper_integration_method_). Returns (xs, xds, forcing_terms, fa_outputs) 
+        as in analyticalSolution, but with an extra first axis for the samples, e.g. xs is 
+        n_samples x n_time_steps x dim. The parameter vector of the Dmp is restored afterwards.
+        """
+        if ts is None:
+            ts = self.ts_train_
+        n_samples = samples.shape[0]
+        n_time_steps = ts.size
+        n_dims = self.dim_orig_
+        
+        ( xs_phase, xds_phase, xs_gating, xds_gating, xs_goal, xds_goal ) = self.analyticalSolutionSubsystems(ts)
+        
+        # The outputs of the function approximators for each sample
+        values = self.getParameterVectorSelected().copy()
+        fa_outputs = np.empty([n_samples,n_time_steps,n_dims],dtype=getFloatType())
+        for i_sample in range(n_samples):
+            self.setParameterVectorSelected(samples[i_sample])
+            fa_outputs[i_sample] = self.computeFunctionApproximatorOutput(xs_phase)
+        self.setParameterVectorSelected(values)
+        
+        # Gate and scale the forcing terms, as in analyticalSolution
+        forcing_terms = fa_outputs*np.reshape(xs_gating,(1,n_time_steps,1))
+        if (self.forcing_term_scaling_=="G_MINUS_Y0_SCALING"):
+            forcing_terms *= (self.attractor_state_-self.initial_state_)
+        elif (self.forcing_term_scaling_=="AMPLITUDE_SCALING"):
+            forcing_terms *= self.trajectory_amplitudes_
+            
+        # Integrate with time on the first axis, i.e. n_time_steps x n_samples x n_dims
+        ( ys, zs, yds, zds ) = self.integrateSpringDamper(ts,xs_goal[:,np.newaxis,:],np.swapaxes(forcing_terms,0,1),self.initial_state_)
+        
+        xs = np.empty([n_samples,n_time_steps,self.dim_],dtype=getFloatType())
+        xds = np.empty([n_samples,n_time_steps,self.dim_],dtype=getFloatType())
+        xs[:,:,self.GOAL] = xs_goal     
+        xds[:,:,self.GOAL] = xds_goal
+        xs[:,:,self.PHASE] = xs_phase   
+        xds[:,:,self.PHASE] = xds_phase
+        xs[:,:,self.GATING] = xs_gating 
+        xds[:,:,self.GATING] = xds_gating
+        xs[:,:,self.SPRING_Y] = np.swapaxes(ys,0,1)
+        xs[:,:,self.SPRING_Z] = np.swapaxes(zs,0,1)
+        xds[:,:,self.SPRING_Y] = np.swapaxes(yds,0,1)
+        xds[:,:,self.SPRING_Z] = np.swapaxes(zds,0,1)
+        
+        return ( xs, xds, forcing_terms, fa_outputs)
+        
+    def analyticalSolutionSubsystems(self,ts):
+        """Compute the phase, gating and delayed goal, which do not depend on the forcing term.
+        
+        Each time step is computed independently, so ts may also be a window in the middle 
+        of a trajectory. The solutions for the last ts are cached, because they do not depend on
+        the parameter vector. The cached arrays are read-only. The cache is cleared by set_tau, 
+        set_initial_state and set_attractor_state; call clearSubsystemSolutions() after changing
+        the subsystems directly.
+        """
+        key = (np.dtype(getFloatType()), ts.shape)
+        if self.subsystem_solutions_key_ is not None and self.subsystem_solutions_key_[0:2]==key and np.array_equal(self.subsystem_solutions_key_[2],ts):
+            return self.subsystem_solutions_
+            
+        n_time_steps = ts.size
+        
+        # Integrate phase
+        ( xs_phase, xds_phase) = self.phase_system_.analyticalSolution(ts)
+        
+        # Compute gating term
+        ( xs_gating, xds_gating ) = self.gating_system_.analyticalSolution(ts)
+        
         # Get current delayed goal
         if self.goal_system_ is None:
             # If there is no dynamical system for the delayed goal, the goal is
@@ -214,69 +501,208 @@ class Dmp(DynamicalSystem,Parameterizable):
             # Integrate goal system and get current goal state
             (xs_goal,xds_goal) = self.goal_system_.analyticalSolution(ts)
             
+        solutions = ( xs_phase, xds_phase, xs_gating, xds_gating, xs_goal, xds_goal )
+        for solution in solutions:
+            solution.setflags(write=False)
+        self.subsystem_solutions_ = solutions
+        self.subsystem_solutions_key_ = key + (np.array(ts),)
+        return solutions
+        
+    def clearSubsystemSolutions(self):
+        """Clear the cached solutions of analyticalSolutionSubsystems()."""
+        self.subsystem_solutions_ = None
+        self.subsystem_solutions_key_ = None
+        
+    def integrateSpringDamper(self,ts,xs_goal,forcing_terms,y_init):
+        """Integrate the spring-damper system of the Dmp, see spring_damper_integration_method_.
+        
+        The delayed goal 'xs_goal' is the attractor state of the spring-damper system, and the 
+        forcing term is added to its acceleration. The arguments may have trailing dimensions
+        beyond T x dim_orig (e.g. for several forcing terms), which are integrated in parallel.
+        Returns (ys, zs, yds, zds), each of the same size as the forcing terms.
+        """
+        if self.spring_damper_integration_method_.upper()=="EXACT":
+            return self.integrateSpringDamperExact(ts,xs_goal,forcing_terms,y_init)
             
-        xs = np.zeros([n_time_steps,self.dim_])
-        xds = np.zeros([n_time_steps,self.dim_])
-    
-        xs[:,self.GOAL] = xs_goal     
-        xds[:,self.GOAL] = xds_goal
-        xs[:,self.PHASE] = xs_phase   
-        xds[:,self.PHASE] = xds_phase
-        xs[:,self.GATING] = xs_gating 
-        xds[:,self.GATING] = xds_gating
-
-  
-        # THE REST CANNOT BE DONE ANALYTICALLY
-  
-        # Reset the dynamical system, and get the first state
-        damping = self.spring_system_.damping_coefficient_
-        localspring_system = SpringDamperSystem(self.tau_,self.initial_state_,self.attractor_state_,damping)
-  
-        # Set first attractor state
-        localspring_system.set_attractor_state(xs_goal[0,:])
-  
-        # Start integrating spring damper system
-        (x_spring, xd_spring) = localspring_system.integrateStart()
+        spring_constant = self.spring_system_.spring_constant_
+        damping_coefficient = self.spring_system_.damping_coefficient_
+        mass = self.spring_system_.mass_
+        tau = self.tau_
         
-
-        # For convenience
-        SPRING = self.SPRING
-        SPRING_Y = self.SPRING_Y
-        SPRING_Z = self.SPRING_Z
-        
-        t0 = 0
-        xs[t0,SPRING]  = x_spring
-        xds[t0,SPRING]  = xd_spring
-
-        # Add forcing term to the acceleration of the spring state  
-        xds[0,SPRING_Z] = xds[0,SPRING_Z] + forcing_terms[t0,:]/self.tau_
-  
-        for tt in range(1,n_time_steps): 
+        if kernels.useCompiled():
+            results = kernels.springDamperEuler(ts,xs_goal,forcing_terms,y_init,spring_constant,damping_coefficient,mass,tau)
+            return tuple([ result.astype(getFloatType()) for result in results ])
+        
+        shape = np.broadcast(xs_goal,forcing_terms).shape
+        ys  = np.empty(shape,dtype=getFloatType())
+        zs  = np.empty(shape,dtype=getFloatType())
+        yds = np.empty(shape,dtype=getFloatType())
+        zds = np.empty(shape,dtype=getFloatType())
+        
+        # Initial state, with zero velocity
+        ys[0] = y_init
+        zs[0] = 0.0
+        yds[0] = zs[0]/tau
+        zds[0] = (-spring_constant*(ys[0]-xs_goal[0]) - damping_coefficient*zs[0])/(mass*tau) + forcing_terms[0]/tau
+        
+        for tt in range(1,ts.size): 
             dt = ts[tt]-ts[tt-1]
     
             # Euler integration
-            xs[tt,SPRING]  = xs[tt-1,SPRING] + dt*xds[tt-1,SPRING]
-  
-            # Set the attractor state of the spring system
-            localspring_system.set_attractor_state(xs[tt,self.GOAL])
-
-            # Integrate spring damper system
-            xds[tt,SPRING] = localspring_system.differentialEquation(xs[tt,SPRING])
-    
-             # If necessary add a perturbation. May be useful for some off-line tests.
-            #RowVectorXd perturbation = RowVectorXd::Constant(dim_orig(),0.0)
-            #if (analytical_solution_perturber_!=NULL)
-            #  for (int i_dim=0 i_dim<dim_orig() i_dim++)
-            #    // Sample perturbation from a normal Gaussian distribution
-            #    perturbation(i_dim) = (*analytical_solution_perturber_)()
-      
-            # Add forcing term to the acceleration of the spring state
-            xds[tt,SPRING_Z] = xds[tt,SPRING_Z] + forcing_terms[tt,:]/self.tau_ #+ perturbation
-            # Compute y component from z
-            xds[tt,SPRING_Y] = xs[tt,SPRING_Z]/self.tau_
+            ys[tt] = ys[tt-1] + dt*yds[tt-1]
+            zs[tt] = zs[tt-1] + dt*zds[tt-1]
             
-        return ( xs, xds, forcing_terms, fa_outputs)
+            # Spring damper system, with forcing term added to the acceleration
+            # See SpringDamperSystem.differentialEquation
+            yds[tt] = zs[tt]/tau
+            zds[tt] = (-spring_constant*(ys[tt]-xs_goal[tt]) - damping_coefficient*zs[tt])/(mass*tau) + forcing_terms[tt]/tau
+            
+        return ( ys, zs, yds, zds )
+        
+    def integrateSpringDamperExact(self,ts,xs_goal,forcing_terms,y_init):
+        """Integrate the spring-damper system of the Dmp exactly, see integrateSpringDamper.
+        
+        The goal and forcing term are interpolated linearly between the time steps, and the 
+        spring-damper dynamics are solved exactly for these piecewise-linear inputs. There is thus
+        no integration error, but the result still depends on the time steps through the 
+        interpolation of the inputs. For a constant time step, the recurrence is computed with a 
+        linear filter over all time steps at once.
+        """
+        spring_constant = self.spring_system_.spring_constant_
+        damping_coefficient = self.spring_system_.damping_coefficient_
+        mass = self.spring_system_.mass_
+        tau = self.tau_
+        
+        shape = np.broadcast(xs_goal,forcing_terms).shape
+        n_time_steps = shape[0]
+        
+        # Input to the acceleration, see SpringDamperSystem.exactDiscretization
+        us = np.broadcast_to(spring_constant*np.asarray(xs_goal,dtype=float)/(mass*tau) + np.asarray(forcing_terms,dtype=float)/tau,shape)
+        
+        ys = np.empty(shape)
+        zs = np.empty(shape)
+        ys[0] = y_init
+        zs[0] = 0.0
+        
+        dts = np.diff(ts)
+        if n_time_steps>1:
+            dts_rep = np.reshape(dts,(-1,)+(1,)*(len(shape)-1))
+            uds = np.diff(us,axis=0)/dts_rep
+        
+        if n_time_steps>1 and np.all(np.abs(dts-dts[0])<=1e-9*dts[0]):
+            (Phi, gamma_0, gamma_1) = self.spring_system_.exactDiscretization(dts[0])
+            # The state s = [y z] evolves as s[t+1] = Phi*s[t] + w[t]
+            w_y = gamma_0[0]*us[:-1] + gamma_1[0]*uds
+            w_z = gamma_0[1]*us[:-1] + gamma_1[1]*uds
+            ys[1] = Phi[0,0]*ys[0] + Phi[0,1]*zs[0] + w_y[0]
+            zs[1] = Phi[1,0]*ys[0] + Phi[1,1]*zs[0] + w_z[0]
+            
+            # With Cayley-Hamilton (Phi^2 = trace*Phi - det*I), each of y and z follows the scalar
+            # recurrence s[t+2] - trace*s[t+1] + det*s[t] = w[t+1] + (Phi - trace*I)*w[t]
+            trace = np.trace(Phi)
+            det = np.linalg.det(Phi)
+            a = [1.0, -trace, det]
+            for (s, r) in [ 
+                (ys, w_y[1:] + (Phi[0,0]-trace)*w_y[:-1] + Phi[0,1]*w_z[:-1]),
+                (zs, w_z[1:] + Phi[1,0]*w_y[:-1] + (Phi[1,1]-trace)*w_z[:-1]),
+            ]:
+                # The filter outputs s[0] and s[1] from its initial conditions, and s[2:] from r
+                inputs = np.zeros(shape)
+                inputs[2:] = r
+                zi = np.stack((s[0], s[1]-trace*s[0]))
+                (s[:], zf) = signal.lfilter([1.0],a,inputs,axis=0,zi=zi)
+                
+        else:
+            discretizations = {}
+            for tt in range(1,n_time_steps):
+                dt = dts[tt-1]
+                if dt not in discretizations:
+                    discretizations[dt] = self.spring_system_.exactDiscretization(dt)
+                (Phi, gamma_0, gamma_1) = discretizations[dt]
+                ys[tt] = Phi[0,0]*ys[tt-1] + Phi[0,1]*zs[tt-1] + gamma_0[0]*us[tt-1] + gamma_1[0]*uds[tt-1]
+                zs[tt] = Phi[1,0]*ys[tt-1] + Phi[1,1]*zs[tt-1] + gamma_0[1]*us[tt-1] + gamma_1[1]*uds[tt-1]
+        
+        # Rates of change, see SpringDamperSystem.differentialEquation
+        yds = zs/tau
+        zds = (-spring_constant*(ys-xs_goal) - damping_coefficient*zs)/(mass*tau) + forcing_terms/tau
+        
+        float_type = getFloatType()
+        return ( ys.astype(float_type), zs.astype(float_type), yds.astype(float_type), zds.astype(float_type) )
+        
+    def getAffineTrajectoryOperator(self,ts=None):
+        """Get the affine map from parameter vectors to trajectories, for fixed ts, tau, initial and attractor state.
+        
+        The forcing term is linear in the parameters of the function approximators (e.g. the 
+        weights of RBFN or the offsets of LWR), and the spring-damper system is linear. 
+        Therefore the trajectory is an affine function of the parameter vector (see 
+        getParameterVectorSelected).
+        """
+        if ts is None:
+            ts = self.ts_train_
+        n_time_steps = ts.size
+        n_dims = self.dim_orig_
+        
+        # Trajectory for the current parameter vector
+        ( xs, xds, forcing_terms, fa_outputs) = self.analyticalSolution(ts)
+        traj = self.statesAsTrajectory(ts,xs,xds)
+        
+        # Derivative of the forcing terms w.r.t. the parameters (T x n_dims x n_parameters)
+        # This is the derivative of the function approximator outputs, gated and scaled in 
+        # the same way as in analyticalSolution
+        xs_phase = xs[:,self.PHASE]
+        xs_gating = xs[:,self.GATING]
+        jacobian_forcing_terms = self.computeFunctionApproximatorOutputJacobian(xs_phase)
+        jacobian_forcing_terms *= np.reshape(xs_gating,(n_time_steps,1,1))
+        if (self.forcing_term_scaling_=="G_MINUS_Y0_SCALING"):
+            g_minus_y0 = (self.attractor_state_-self.initial_state_)
+            jacobian_forcing_terms *= np.reshape(g_minus_y0,(1,n_dims,1))
+        elif (self.forcing_term_scaling_=="AMPLITUDE_SCALING"):
+            jacobian_forcing_terms *= np.reshape(self.trajectory_amplitudes_,(1,n_dims,1))
+            
+        # Derivative of the trajectory w.r.t. the parameters. As the spring-damper system is 
+        # linear, this is its response to the derivative of the forcing terms, starting at 0
+        # with a goal of 0
+        zero_goal = np.zeros([n_time_steps,n_dims,1])
+        ( ys, zs, yds, zds ) = self.integrateSpringDamper(ts,zero_goal,jacobian_forcing_terms,0.0)
+        # Same as in statesAsTrajectory
+        jacobian = np.stack((ys, yds, zds/self.tau_, jacobian_forcing_terms))
+        
+        values = self.getParameterVectorSelected()
+        offset = np.stack((traj.ys_, traj.yds_, traj.ydds_, forcing_terms)) - np.dot(jacobian,values)
+        return AffineTrajectoryOperator(ts,jacobian,offset)
         
+    def getAffineTrajectoryOperatorKey(self,ts):
+        """Key of everything getAffineTrajectoryOperator(ts) depends on, except the parameter vector.
+        
+        If the key changes (e.g. after set_attractor_state or retraining), the operator must be 
+        computed again.
+        """
+        hashArray = ActivationCache.hashArray
+        fa_keys = tuple([ fa.getModelKey() for fa in self.function_approximators_ ])
+        return (self.tau_, hashArray(self.initial_state_), hashArray(self.attractor_state_), hashArray(np.asarray(ts)),
+            self.forcing_term_scaling_, hashArray(getattr(self,'trajectory_amplitudes_',None)),
+            self.spring_damper_integration_method_, np.dtype(getFloatType()).str, fa_keys)
+        
+    def computeFunctionApproximatorOutputJacobian(self,phase_state):
+        """Derivative of the function approximator outputs w.r.t. the parameter vector (n_time_steps x dim_orig x n_parameters)."""
+        n_time_steps = phase_state.size
+        n_dims = self.dim_orig_
+        jacobian = np.zeros([n_time_steps,n_dims,self.getParameterVectorSelectedSize()])
+        if self.shared_function_approximator_:
+            fa = self.function_approximators_[0]
+            if fa.isTrained():
+                jacobian[:,:,:] = fa.getParameterVectorSelectedJacobian(phase_state)
+            return jacobian
+            
+        # Same order as in getParameterVectorSelected
+        offset = 0
+        for i_fa in range(n_dims):
+            fa = self.function_approximators_[i_fa]
+            if fa and fa.isTrained():
+                cur_size = fa.getParameterVectorSelectedSize()
+                jacobian[:,i_fa,offset:offset+cur_size] = fa.getParameterVectorSelectedJacobian(phase_state)[:,0,:]
+                offset += cur_size
+        return jacobian
         
     def train(self,trajectory):
   
@@ -291,25 +717,89 @@ class Dmp(DynamicalSystem,Parameterizable):
   
         (fa_input_phase, f_target) = self.computeFunctionApproximatorInputsAndTargets(trajectory)
   
-        for dd in range(self.dim_orig_):
-
-            fa_target = f_target[:,dd]
-            self.function_approximators_[dd].train(fa_input_phase,fa_target)
+        if self.shared_function_approximator_:
+            # Train all dimensions at once
+            self.function_approximators_[0].train(fa_input_phase,f_target)
+        else:
+            for dd in range(self.dim_orig_):
+                fa_target = f_target[:,dd]
+                self.function_approximators_[dd].train(fa_input_phase,fa_target)
         
         # Save the times steps on which the Dmp was trained.
         # This is just a convenience function to be able to call 
         # analyticalSolution without the "ts" argument.
         self.ts_train_ = trajectory.ts_
+        
+        if self.parameter_buffer_ is not None:
+            # Training has replaced the model parameters of the function approximators
+            self.enableParameterVectorBuffer()
+            
+    def trainStreaming(self,trajectory_chunks):
+        """Train the Dmp on a trajectory that is too long to hold in memory, chunk by chunk.
+        
+        'trajectory_chunks' is a function that returns an iterable over consecutive chunks of 
+        the trajectory (Trajectory objects with the original times), for instance
+          lambda: Trajectory.readChunksFromFile(filename,10000)
+        It is iterated over twice: first to determine tau, the initial and attractor state 
+        and the range of the trajectory, and then to compute the targets of each chunk. The 
+        function approximators must implement trainIncremental, and accumulate the regression 
+        statistics so that only one chunk is in memory at a time. They must also implement 
+        initializeBasisFunctions, to place their basis functions in the range of the phase before 
+        the first chunk (otherwise they would only cover the phase of the first chunk).
+        """
+        for fa in self.function_approximators_:
+            for method in ['trainIncremental','initializeBasisFunctions']:
+                if not hasattr(fa,method):
+                    raise NotImplementedError(type(fa).__name__+' does not implement '+method+'(), which trainStreaming() requires.')
+        
+        # First pass: only keep the first and last state, and the range
+        y_init = None
+        for chunk in trajectory_chunks():
+            if y_init is None:
+                t_init = chunk.ts_[0]
+                y_init = chunk.ys_[0,:]
+                y_min = chunk.ys_.min(axis=0)
+                y_max = chunk.ys_.max(axis=0)
+            else:
+                y_min = np.minimum(y_min,chunk.ys_.min(axis=0))
+                y_max = np.maximum(y_max,chunk.ys_.max(axis=0))
+            tau = chunk.ts_[-1]
+            y_attr = chunk.ys_[-1,:]
+            
+        # Set tau, initial_state and attractor_state, as in train()
+        self.set_tau(tau)
+        self.set_initial_state(y_init)
+        self.set_attractor_state(y_attr)
+        self.trajectory_amplitudes_ = y_max-y_min
+        
+        # The range of the phase is known before seeing the data, so the basis functions of 
+        # the function approximators can be placed before training them incrementally
+        ( xs_phase, xds_phase ) = self.phase_system_.analyticalSolution(np.array([t_init,tau]))
+        for fa in self.function_approximators_:
+            fa.initializeBasisFunctions(xs_phase.min(),xs_phase.max())
+        
+        # Second pass: accumulate the statistics of each chunk in the function approximators
+        for chunk in trajectory_chunks():
+            (fa_input_phase, f_target) = self.computeFunctionApproximatorInputsAndTargets(chunk)
+            if self.shared_function_approximator_:
+                self.function_approximators_[0].trainIncremental(fa_input_phase,f_target)
+            else:
+                for dd in range(self.dim_orig_):
+                    self.function_approximators_[dd].trainIncremental(fa_input_phase,f_target[:,dd])
+                    
+        # The time steps are not stored, as there may be very many of them
+        self.ts_train_ = None
+        
+        if self.parameter_buffer_ is not None:
+            self.enableParameterVectorBuffer()
             
     def computeFunctionApproximatorInputsAndTargets(self,trajectory):
         n_time_steps = trajectory.ts_.size
         dim_data = trajectory.dim_
         assert(self.dim_orig_==dim_data)
 
-        (xs_ana,xds_ana,forcing_terms, fa_outputs) = self.analyticalSolution(trajectory.ts_)
-        xs_goal   = xs_ana[:,self.GOAL]
-        xs_gating = xs_ana[:,self.GATING]
-        xs_phase  = xs_ana[:,self.PHASE]
+        # Only the subsystems are needed, not the forcing term and the spring-damper system
+        ( xs_phase, xds_phase, xs_gating, xds_gating, xs_goal, xds_goal ) = self.analyticalSolutionSubsystems(trajectory.ts_)
         
         fa_inputs_phase = xs_phase
   
@@ -341,21 +831,62 @@ class Dmp(DynamicalSystem,Parameterizable):
  
         return  (fa_inputs_phase, f_target)
 
+    def useUnifiedModels(self):
+        """Replace the trained function approximators with their unified models.
+        
+        The outputs and parameter vectors of LWR, RBFN and RRRFF remain the same, see 
+        UnifiedModel. After this, the Dmp uses one prediction routine, whatever the type of 
+        the function approximators it was trained with.
+        """
+        self.function_approximators_ = [ fa.toUnifiedModel() if fa and fa.isTrained() else fa for fa in self.function_approximators_ ]
+        if self.parameter_buffer_ is not None:
+            self.enableParameterVectorBuffer()
+        
     def statesAsTrajectory(self,ts, x_in, xd_in):
       
         # Left column is time
         return Trajectory(ts,x_in[:,self.SPRING_Y], xd_in[:,self.SPRING_Y], xd_in[:,self.SPRING_Z]/self.tau_)
   
-    def getParameterVectorSelected(self):
-        values = np.empty(0)
+    def enableParameterVectorBuffer(self):
+        """Keep the selected parameters of all function approximators in one contiguous array.
+        
+        The function approximators then hold views into this buffer (if they support this, see
+        FunctionApproximator.setParameterVectorBuffer), so that setParameterVectorSelected is a 
+        single in-place copy, and getParameterVectorSelected returns the buffer itself, without
+        copying. Train the Dmp before calling this; training again re-creates the buffer.
+        """
+        buffer = np.empty(self.getParameterVectorSelectedSize())
+        # The function approximators that do not use the buffer directly, with their part of it
+        self.parameter_buffer_copies_ = []
+        offset = 0
         for fa in self.function_approximators_:
             if fa.isTrained():
-                values = np.append(values,fa.getParameterVectorSelected())
-        return values
+                cur_size = fa.getParameterVectorSelectedSize()
+                cur_values = buffer[offset:offset+cur_size]
+                if not fa.setParameterVectorBuffer(cur_values):
+                    self.parameter_buffer_copies_.append((fa, cur_values))
+                offset += cur_size
+        self.parameter_buffer_ = buffer
+        
+    def disableParameterVectorBuffer(self):
+        self.parameter_buffer_ = None
+        self.parameter_buffer_copies_ = []
+        
+    def getParameterVectorSelected(self):
+        if self.parameter_buffer_ is not None:
+            # The buffer itself; copy it before changing it, as this changes the Dmp
+            return self.parameter_buffer_
+        values = [ fa.getParameterVectorSelected() for fa in self.function_approximators_ if fa.isTrained() ]
+        return np.concatenate(values) if values else np.empty(0)
         
     def setParameterVectorSelected(self,values):
         size = self.getParameterVectorSelectedSize()
         assert(len(values)==size)
+        if self.parameter_buffer_ is not None:
+            self.parameter_buffer_[:] = values
+            for (fa, cur_values) in self.parameter_buffer_copies_:
+                fa.setParameterVectorSelected(cur_values)
+            return
         offset = 0
         for fa in self.function_approximators_:
             if fa.isTrained():
@@ -19,10 +19,12 @@
 import numpy as np
 import sys
 import os
+import itertools
 import matplotlib.pyplot as plt
 from scipy.signal import butter, lfilter, filtfilt
 
 from dmpbbo_lib.dmp.dmp_plotting import plotTrajectory
+from dmpbbo_lib.precision import asFloatType
 
 
 class Trajectory:
@@ -50,12 +52,13 @@ class Trajectory:
         if ys.ndim==2:
             self.dim_ = ys.shape[1]
             
-        self.ts_ = ts
+        # Trajectories are stored in the current float type (see precision.py)
+        self.ts_ = asFloatType(ts)
         self.dt_mean = dt_mean
-        self.ys_ = ys
-        self.yds_ = yds
-        self.ydds_ = ydds
-        self.misc_ = misc
+        self.ys_ = asFloatType(ys)
+        self.yds_ = asFloatType(yds)
+        self.ydds_ = asFloatType(ydds)
+        self.misc_ = None if misc is None else asFloatType(misc)
 
     def setMisc(self,misc):
         assert(misc.shape[0]==self.ts_.shape[0])
@@ -224,14 +227,14 @@ class Trajectory:
         return Trajectory(ts,ys,yds,ydds)
         
     def append(self,trajectory):
-        self.ts_ = np.concatenate((self.ts_, trajectory.ts_))
-        self.ys_ = np.concatenate((self.ys_, trajectory.ys_))
-        self.yds_ = np.concatenate((self.yds_, trajectory.yds_))
-        self.ydds_ = np.concatenate((self.ydds_, trajectory.ydds_))
+        self.ts_ = asFloatType(np.concatenate((self.ts_, trajectory.ts_)))
+        self.ys_ = asFloatType(np.concatenate((self.ys_, trajectory.ys_)))
+        self.yds_ = asFloatType(np.concatenate((self.yds_, trajectory.yds_)))
+        self.ydds_ = asFloatType(np.concatenate((self.ydds_, trajectory.ydds_)))
         if self.misc_ is None or trajectory.misc_ is None:
             self.misc_ = None
         else:
-            self.misc_ = np.concatenate((self.misc_, trajectory.misc_))
+            self.misc_ = asFloatType(np.concatenate((self.misc_, trajectory.misc_)))
         
     def asMatrix(self):
         as_matrix = np.column_stack((self.ts_, self.ys_, self.yds_, self.ydds_))
@@ -247,7 +250,21 @@ class Trajectory:
     @staticmethod
     def readFromFile(filename, n_dims_misc=0):
         data = np.loadtxt(filename)
+        return Trajectory.fromMatrix(data,n_dims_misc)
+        
+    @staticmethod
+    def readChunksFromFile(filename, n_time_steps_per_chunk, n_dims_misc=0):
+        """Read a trajectory from file as consecutive chunks, without reading the whole file at once."""
+        with open(filename) as f:
+            while True:
+                lines = list(itertools.islice(f,n_time_steps_per_chunk))
+                if not lines:
+                    return
+                yield Trajectory.fromMatrix(np.loadtxt(lines,ndmin=2),n_dims_misc)
         
+    @staticmethod
+    def fromMatrix(data, n_dims_misc=0):
+        # The inverse of asMatrix
         (n_time_steps, n_cols) = data.shape
         n_dims = (n_cols-1-n_dims_misc)//3
         
@@ -260,8 +277,8 @@ class Trajectory:
         return Trajectory(ts,ys,yds,ydds,misc)
         
     def recomputeDerivatives(self):
-        self.yds_  = diffnc(self.ys_,self.dt_mean)
-        self.ydds_ = diffnc(self.yds_,self.dt_mean)
+        self.yds_  = asFloatType(diffnc(self.ys_,self.dt_mean))
+        self.ydds_ = asFloatType(diffnc(self.yds_,self.dt_mean))
 
     def applyLowPassFilter(self,cutoff,order=3,axs=None):
         
@@ -274,7 +291,7 @@ class Trajectory:
         # Sample rate and desired cutoff frequencies (in Hz).
         dt_mean = np.mean(np.diff(self.ts_))
         sample_freq = 1.0/dt_mean
-        self.ys_  = butter_lowpass_filter(self.ys_, cutoff, sample_freq, order)
+        self.ys_  = asFloatType(butter_lowpass_filter(self.ys_, cutoff, sample_freq, order))
         self.recomputeDerivatives()
         
         if axs is not None:
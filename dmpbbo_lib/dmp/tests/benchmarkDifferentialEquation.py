@@ -0,0 +1,66 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+
+def timeIt(function, n_repetitions):
+    start = time.perf_counter()
+    for ii in range(n_repetitions):
+        function()
+    return (time.perf_counter()-start)/n_repetitions
+
+
+if __name__=='__main__':
+    """Compare the time per integration step for the differential equation backends of a Dmp."""
+    
+    tau = 1.0
+    n_dims = 7
+    y_init = np.zeros(n_dims)
+    y_attr = np.ones(n_dims)
+    ts = np.linspace(0,tau,101)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    
+    print('%-44s %14s %14s %9s' % ('','SUBSYSTEMS (us)','FUSED (us)','speedup'))
+    for trained in [False, True]:
+        dmp = Dmp(tau, y_init, y_attr, FunctionApproximatorRBFN(10), forcing_term_scaling="G_MINUS_Y0_SCALING")
+        if trained:
+            dmp.train(traj)
+        label = 'trained' if trained else 'untrained'
+        
+        (x, xd) = dmp.integrateStart()
+        x_updated = np.zeros(x.size)
+        workspace = np.zeros([4,x.size])
+        for method in ["EULER", "RUNGE_KUTTA"]:
+            dmp.integration_method_ = method
+            for (name, step) in [
+                ('integrateStep', lambda: dmp.integrateStep(0.01,x)),
+                ('integrateStepInPlace', lambda: dmp.integrateStepInPlace(0.01,x,x_updated,xd,workspace)),
+            ]:
+                times = []
+                for backend in ["SUBSYSTEMS", "FUSED"]:
+                    dmp.differential_equation_backend_ = backend
+                    times.append(1e6*timeIt(step,2000))
+                print('%-44s %14.2f %14.2f %9.2f' % ('%s %s (%s)' % (name,method.lower(),label),times[0],times[1],times[0]/times[1]))
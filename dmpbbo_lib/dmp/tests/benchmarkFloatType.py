@@ -0,0 +1,81 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.precision import *
+
+
+def timeIt(function, n_repetitions):
+    start = time.perf_counter()
+    for ii in range(n_repetitions):
+        function()
+    return (time.perf_counter()-start)/n_repetitions
+
+
+if __name__=='__main__':
+    """Compare the throughput of single and double precision computations."""
+    
+    print('%-28s %12s %12s %9s %10s' % ('','float64 (s)','float32 (s)','speedup','MB (f64)'))
+    
+    # Basis function activations
+    for n_basis_functions in [50, 500]:
+        n_samples = 100000
+        centers = np.linspace(0.0,1.0,n_basis_functions)
+        widths = np.full(n_basis_functions,0.5/n_basis_functions)
+        inputs = np.linspace(0.0,1.0,n_samples)
+        times = []
+        for float_type in [np.float64, np.float32]:
+            with floatType(float_type):
+                times.append(timeIt(lambda: Gaussian.activations(centers,widths,inputs,True),5))
+        megabytes = n_samples*n_basis_functions*8/1e6
+        print('%-28s %12.6f %12.6f %9.2f %10.1f' % ('activations B=%d' % n_basis_functions,times[0],times[1],times[0]/times[1],megabytes))
+
+    # Batches of rollouts with the affine operator of a Dmp
+    tau = 1.0
+    n_dims = 7
+    y_init = np.zeros(n_dims)
+    y_attr = np.ones(n_dims)
+    ts = np.linspace(0,tau,1001)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorRBFN(25) for i_dim in range(n_dims) ])
+    dmp.train(traj)
+    values = dmp.getParameterVectorSelected()
+    for n_samples in [10, 100]:
+        samples = values + np.random.normal(size=(n_samples,values.size))
+        times = []
+        for float_type in [np.float64, np.float32]:
+            with floatType(float_type):
+                operator = dmp.getAffineTrajectoryOperator(ts)
+                times.append(timeIt(lambda: operator.evaluate(samples),5))
+        megabytes = (operator.jacobian_.size+n_samples*operator.offset_.size)*8/1e6
+        print('%-28s %12.6f %12.6f %9.2f %10.1f' % ('affine rollouts S=%d' % n_samples,times[0],times[1],times[0]/times[1],megabytes))
+        
+    # Analytical solution of the Dmp
+    times = []
+    for float_type in [np.float64, np.float32]:
+        with floatType(float_type):
+            times.append(timeIt(lambda: dmp.analyticalSolution(ts),5))
+    print('%-28s %12.6f %12.6f %9.2f %10s' % ('analyticalSolution T=%d' % ts.size,times[0],times[1],times[0]/times[1],'-'))
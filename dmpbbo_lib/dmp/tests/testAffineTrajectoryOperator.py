@@ -0,0 +1,93 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+# TaskSolverDmp imports dmp_bbo.TaskSolver
+sys.path.append(os.path.abspath('../../'))
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.dmp_bbo.TaskSolverDmp import TaskSolverDmp
+
+if __name__=='__main__':
+    """Compare trajectories from the affine parameter-to-trajectory operator to those of analyticalSolution."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    
+    ts_exec = np.linspace(0,1.2*tau,61)
+    for scaling in ["NO_SCALING", "G_MINUS_Y0_SCALING", "AMPLITUDE_SCALING"]:
+        function_apps = [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ]
+        dmp = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling=scaling)
+        dmp.train(traj)
+        operator = dmp.getAffineTrajectoryOperator(ts_exec)
+        
+        values = dmp.getParameterVectorSelected()
+        samples = values + 10.0*np.random.normal(size=(5,values.size))
+        ( ys, yds, ydds, forcing_terms ) = operator.evaluate(samples)
+        
+        for i_sample in range(samples.shape[0]):
+            dmp.setParameterVectorSelected(samples[i_sample,:])
+            ( xs, xds, forcing_terms_ana, fa_outputs) = dmp.analyticalSolution(ts_exec)
+            traj_ana = dmp.statesAsTrajectory(ts_exec,xs,xds)
+            assert(np.allclose(ys[i_sample],traj_ana.ys_))
+            assert(np.allclose(yds[i_sample],traj_ana.yds_))
+            assert(np.allclose(ydds[i_sample],traj_ana.ydds_))
+            assert(np.allclose(forcing_terms[i_sample],forcing_terms_ana))
+            
+    # TaskSolverDmp computes the operator again when the Dmp changes between rollouts
+    function_apps = [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ]
+    dmp = Dmp(tau, y_init, y_attr, function_apps)
+    dmp.train(traj)
+    task_solver = TaskSolverDmp(dmp,0.01,1.2,use_affine_operator=True)
+    task_solver_ana = TaskSolverDmp(dmp,0.01,1.2)
+    values = dmp.getParameterVectorSelected()
+    samples = values + 10.0*np.random.normal(size=(3,values.size))
+    def checkRollouts():
+        all_cost_vars = task_solver.performRollouts(samples)
+        all_cost_vars_ana = task_solver_ana.performRollouts(samples)
+        for i_sample in range(samples.shape[0]):
+            assert(np.allclose(all_cost_vars[i_sample],all_cost_vars_ana[i_sample]))
+            cost_vars = task_solver.performRollout(samples[i_sample])
+            assert(np.allclose(cost_vars,all_cost_vars_ana[i_sample]))
+    checkRollouts()
+    operator = task_solver.affine_operator_
+    checkRollouts()
+    assert(task_solver.affine_operator_ is operator)
+    dmp.set_attractor_state(y_attr+0.3)
+    checkRollouts()
+    dmp.set_initial_state(y_init-0.2)
+    checkRollouts()
+    dmp.set_tau(0.8*tau)
+    checkRollouts()
+    # Retraining changes the centers and widths, which are not in the parameter vector
+    dmp.train(Trajectory.generateMinJerkTrajectory(np.linspace(0,0.8*tau,41), y_init-0.2, y_attr+0.3))
+    samples = dmp.getParameterVectorSelected() + np.random.normal(size=(3,values.size))
+    checkRollouts()
+            
+    print('Trajectories of the affine operator and analyticalSolution are the same.')
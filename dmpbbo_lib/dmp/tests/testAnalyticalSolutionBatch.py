@@ -0,0 +1,80 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+if __name__=='__main__':
+    """Compare the batched analytical solution of a Dmp to the one for each sample separately."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    ts_exec = np.linspace(0,1.2*tau,61)
+    
+    np.random.seed(0)
+    for scaling in ["NO_SCALING", "G_MINUS_Y0_SCALING", "AMPLITUDE_SCALING"]:
+        for function_apps in [ [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ], FunctionApproximatorRBFN(8) ]:
+            dmp = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling=scaling)
+            dmp.train(traj)
+            
+            values = dmp.getParameterVectorSelected().copy()
+            samples = values + 10.0*np.random.normal(size=(5,values.size))
+            results = dmp.analyticalSolutionBatch(samples,ts_exec)
+            assert(results[0].shape==(5,ts_exec.size,dmp.dim_))
+            # The parameters of the Dmp are not changed
+            assert(np.array_equal(values,dmp.getParameterVectorSelected()))
+            
+            for i_sample in range(samples.shape[0]):
+                dmp.setParameterVectorSelected(samples[i_sample])
+                results_sample = dmp.analyticalSolution(ts_exec)
+                for (result, result_sample) in zip(results,results_sample):
+                    assert(np.allclose(result[i_sample],result_sample))
+                    
+    # Time the batched and sequential analytical solutions
+    n_dims = 7
+    y_init = np.zeros(n_dims)
+    y_attr = np.ones(n_dims)
+    ts = np.linspace(0,1.0,501)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    dmp = Dmp(1.0, y_init, y_attr, [ FunctionApproximatorRBFN(10) for dd in range(n_dims) ])
+    dmp.train(traj)
+    values = dmp.getParameterVectorSelected().copy()
+    for n_samples in [10, 100]:
+        samples = values + np.random.normal(size=(n_samples,values.size))
+        start = time.perf_counter()
+        for i_sample in range(n_samples):
+            dmp.setParameterVectorSelected(samples[i_sample])
+            dmp.analyticalSolution(ts)
+        t_sequential = time.perf_counter()-start
+        start = time.perf_counter()
+        dmp.analyticalSolutionBatch(samples,ts)
+        t_batch = time.perf_counter()-start
+        print('%d samples: %.4fs sequential, %.4fs batched' % (n_samples,t_sequential,t_batch))
+            
+    print('Batched and sequential analytical solutions are the same.')
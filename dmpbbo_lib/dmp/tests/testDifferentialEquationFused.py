@@ -0,0 +1,68 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+if __name__=='__main__':
+    """Compare the fused differential equation of a Dmp to the one that calls the subsystems."""
+
+    tau = 0.6
+    n_dims = 3
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,61)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    ts_exec = np.linspace(0,1.5*tau,91)
+    
+    for scaling in ["NO_SCALING", "G_MINUS_Y0_SCALING", "AMPLITUDE_SCALING"]:
+        for function_apps in [ [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8), FunctionApproximatorRBFN(9) ], FunctionApproximatorRBFN(8) ]:
+            dmp = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling=scaling)
+            dmp.train(traj)
+            for new_tau in [tau, 0.8*tau]:
+                # Constants must be updated when tau changes
+                dmp.set_tau(new_tau)
+                for method in ["EULER", "RUNGE_KUTTA"]:
+                    dmp.integration_method_ = method
+                    xs = {}
+                    for backend in ["SUBSYSTEMS", "FUSED"]:
+                        dmp.differential_equation_backend_ = backend
+                        (x, xd) = dmp.integrateStart()
+                        xs[backend] = [np.concatenate((x,xd))]
+                        for tt in range(1,ts_exec.size):
+                            (x, xd) = dmp.integrateStep(ts_exec[tt]-ts_exec[tt-1],x)
+                            xs[backend].append(np.concatenate((x,xd)))
+                    assert(np.allclose(xs["SUBSYSTEMS"],xs["FUSED"],rtol=1e-10,atol=1e-10))
+            
+    # Without a goal system, the goal is the attractor state
+    dmp.goal_system_ = None
+    dmp.updateFusedConstants()
+    xds = {}
+    for backend in ["SUBSYSTEMS", "FUSED"]:
+        dmp.differential_equation_backend_ = backend
+        xds[backend] = dmp.differentialEquation(np.linspace(0.0,1.0,dmp.dim_))
+    assert(np.allclose(xds["SUBSYSTEMS"],xds["FUSED"]))
+    
+    print('The fused and subsystem differential equations of the Dmp are the same.')
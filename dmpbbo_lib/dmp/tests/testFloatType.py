@@ -0,0 +1,110 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+import tempfile
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRRRFF import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGPR import *
+from dmpbbo_lib.precision import *
+
+def relativeError(values, values_reference):
+    return np.max(np.abs(values-values_reference))/max(1.0,np.max(np.abs(values_reference)))
+
+if __name__=='__main__':
+    """Compare the results of single precision (float32) computations to double precision ones."""
+
+    tol = 1e-4
+    
+    # Function approximators, trained in double precision
+    inputs = np.linspace(0.0,2.0,201)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    function_apps = [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(10), FunctionApproximatorRRRFF(20,1e-6,5.0,seed=1), FunctionApproximatorGMR(4), FunctionApproximatorGPR(1.0,0.2,1e-4) ]
+    for fa in function_apps:
+        fa.train(inputs,targets)
+        outputs64 = fa.predict(inputs)
+        with floatType(np.float32):
+            outputs32 = fa.predict(inputs)
+        assert(outputs64.dtype==np.float64)
+        assert(outputs32.dtype==np.float32)
+        assert(relativeError(outputs32,outputs64)<tol)
+    assert(getFloatType()==np.float64)
+
+    # Dmp integration, and the affine operator
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    ts_exec = np.linspace(0,1.2*tau,61)
+    
+    dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ])
+    dmp.train(traj)
+    values = dmp.getParameterVectorSelected()
+    samples = values + np.random.RandomState(0).normal(size=(5,values.size))
+    
+    # The phase of numerical integration stops at 1.0, and rounding errors may make it take one
+    # time step more or less to get there. Therefore the comparison stops before that.
+    ts_num = np.linspace(0,0.9*tau,46)
+    
+    results64 = dmp.analyticalSolution(ts_exec)
+    ( xs_num64, xds_num64 ) = DynamicalSystem.analyticalSolution(dmp,ts_num)
+    trajs64 = dmp.getAffineTrajectoryOperator(ts_exec).evaluate(samples)
+    with floatType(np.float32):
+        results32 = dmp.analyticalSolution(ts_exec)
+        ( xs_num32, xds_num32 ) = DynamicalSystem.analyticalSolution(dmp,ts_num)
+        trajs32 = dmp.getAffineTrajectoryOperator(ts_exec).evaluate(samples)
+    
+    for ( result32, result64 ) in zip(results32+(xs_num32,xds_num32)+trajs32,results64+(xs_num64,xds_num64)+trajs64):
+        assert(result64.dtype==np.float64)
+        assert(result32.dtype==np.float32)
+        assert(relativeError(result32,result64)<tol)
+    
+    # Trajectories are stored in the current float type, also when generated, read or appended
+    directory = tempfile.mkdtemp()
+    traj.saveToFile(directory,'traj.txt')
+    for float_type in [np.float32, np.float64]:
+        with floatType(float_type):
+            trajs = [ Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr),
+                      Trajectory.generatePolynomialTrajectory(ts, y_init, np.zeros(n_dims), np.zeros(n_dims), y_attr, np.zeros(n_dims), np.zeros(n_dims)),
+                      Trajectory.readFromFile(directory+'/traj.txt') ]
+            trajs += list(Trajectory.readChunksFromFile(directory+'/traj.txt',20))
+            trajs[0].append(trajs[1])
+            trajs[2].applyLowPassFilter(5.0)
+            for cur_traj in trajs:
+                for values in [cur_traj.ts_, cur_traj.ys_, cur_traj.yds_, cur_traj.ydds_]:
+                    assert(values.dtype==float_type)
+        
+    # The float type is restored, also after an exception
+    try:
+        with floatType(np.float32):
+            raise ValueError
+    except ValueError:
+        pass
+    assert(getFloatType()==np.float64)
+            
+    print('Results in single precision are within %g of those in double precision.' % tol)
@@ -0,0 +1,105 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.dynamicalsystems.ExponentialSystem import ExponentialSystem
+from dmpbbo_lib.dynamicalsystems.SigmoidSystem import SigmoidSystem
+from dmpbbo_lib.dynamicalsystems.TimeSystem import TimeSystem
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+def countEvaluations(system):
+    """Count the calls to the differential equation of the system."""
+    counter = [0]
+    differential_equation = system.differentialEquationInPlace
+    def counting(x, xd):
+        counter[0] += 1
+        differential_equation(x,xd)
+    system.differentialEquationInPlace = counting
+    return counter
+
+if __name__=='__main__':
+    """Compare adaptive Dormand-Prince integration to analytical and fixed-step solutions."""
+
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    tau = 0.6
+    ts = np.linspace(0,1.5*tau,101)
+    
+    # Systems with a closed-form analytical solution
+    systems = [ 
+        ExponentialSystem(tau,y_init,y_attr,6.0),
+        SigmoidSystem(tau,y_init+1.0,-10.0,0.5*tau),
+        TimeSystem(tau),
+    ]
+    # The phase of the TimeSystem has a kink at tau, which the dense output does not resolve as
+    # accurately as the tolerances
+    for system in systems:
+        (xs, xds) = system.analyticalSolution(ts)
+        (xs_adaptive, xds_adaptive) = system.integrateAdaptive(ts)
+        assert(np.allclose(xs,xs_adaptive,atol=1e-4))
+        # The dense output is as accurate as the states at the step ends
+        (xs_adaptive, xds_adaptive) = system.integrateAdaptive(ts[::25])
+        assert(np.allclose(xs[::25],xs_adaptive,atol=1e-4))
+        
+        # The integration method is available for integrateStep
+        system.integration_method_ = "DORMAND_PRINCE"
+        (x, xd) = system.integrateStart()
+        for tt in range(1,ts.size):
+            (x, xd) = system.integrateStep(ts[tt]-ts[tt-1],x)
+        assert(np.allclose(xs[-1],np.ravel(x),atol=1e-4))
+        
+    # Dmp, compared to Runge-Kutta integration with small steps
+    traj = Trajectory.generateMinJerkTrajectory(np.linspace(0,tau,61), y_init, y_attr)
+    dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ])
+    dmp.train(traj)
+    n_sub = 100
+    dmp.integration_method_ = "RUNGE_KUTTA"
+    (xs_rk, xds_rk) = DynamicalSystem.analyticalSolution(dmp,np.linspace(0,ts[-1],(ts.size-1)*n_sub+1))
+    xs_rk = xs_rk[::n_sub]
+    
+    # (The phase is not compared, because fixed steps overshoot its kink at tau)
+    errors = []
+    for rtol in [1e-4, 1e-8]:
+        evaluations = countEvaluations(dmp)
+        (xs_adaptive, xds_adaptive) = dmp.integrateAdaptive(ts,rtol=rtol)
+        del dmp.differentialEquationInPlace
+        errors.append(np.max(np.abs(xs_adaptive[:,dmp.SPRING]-xs_rk[:,dmp.SPRING])))
+        print('rtol=%g: max error %.2e with %d evaluations' % (rtol,errors[-1],evaluations[0]))
+    # Stricter tolerances lead to more accurate results
+    assert(errors[0]<1e-2)
+    assert(errors[1]<1e-5)
+    assert(errors[1]<0.1*errors[0])
+    # The output times do not affect the steps. Apart from those for the steps, there is one 
+    # evaluation for each output time (to compute xds).
+    n_evaluations = []
+    for ts_out in [ts, np.linspace(0,ts[-1],10001)]:
+        evaluations = countEvaluations(dmp)
+        dmp.integrateAdaptive(ts_out)
+        del dmp.differentialEquationInPlace
+        n_evaluations.append(evaluations[0]-ts_out.size)
+    assert(n_evaluations[0]==n_evaluations[1])
+    
+    print('Dormand-Prince integration is accurate, with adaptive steps.')
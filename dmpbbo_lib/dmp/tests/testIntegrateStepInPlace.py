@@ -0,0 +1,144 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, tracemalloc
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.dynamicalsystems.ExponentialSystem import ExponentialSystem
+from dmpbbo_lib.dynamicalsystems.SigmoidSystem import SigmoidSystem
+from dmpbbo_lib.dynamicalsystems.SpringDamperSystem import SpringDamperSystem
+from dmpbbo_lib.dynamicalsystems.TimeSystem import TimeSystem
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+def integrate(system, dt, n_time_steps):
+    (x, xd) = system.integrateStart()
+    xs = [x]
+    for tt in range(n_time_steps):
+        (x, xd) = system.integrateStep(dt,x)
+        # TimeSystem.differentialEquation returns a 1x1 array
+        xs.append(np.ravel(x))
+    return np.array(xs)
+    
+def integrateInPlace(system, dt, n_time_steps):
+    (x, xd) = system.integrateStart()
+    xs = np.zeros([n_time_steps+1,system.dim_])
+    xs[0] = x
+    xd = np.zeros(system.dim_)
+    workspace = np.zeros([4,system.dim_])
+    for tt in range(n_time_steps):
+        system.integrateStepInPlace(dt,xs[tt],xs[tt+1],xd,workspace)
+    return xs
+    
+def numpyAllocations(function, n_calls):
+    """Peak memory allocated while calling function n_calls times."""
+    function() # Warm up
+    tracemalloc.start()
+    for ii in range(n_calls):
+        function()
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+if __name__=='__main__':
+    """Compare integrateStepInPlace to integrateStep, and check that it does not allocate arrays."""
+
+    n_dims = 3
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    tau = 0.6
+    systems = [ 
+        ExponentialSystem(tau,y_init,y_attr,6.0),
+        SigmoidSystem(tau,y_init+1.0,-10.0,0.5*tau),
+        SpringDamperSystem(tau,y_init,y_attr,20.0),
+        TimeSystem(tau),
+        TimeSystem(tau,True),
+    ]
+    
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    for scaling in ["NO_SCALING", "G_MINUS_Y0_SCALING", "AMPLITUDE_SCALING"]:
+        for function_apps in [ [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8), FunctionApproximatorRBFN(9) ], FunctionApproximatorRBFN(8) ]:
+            dmp = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling=scaling)
+            dmp.train(traj)
+            systems.append(dmp)
+
+    for system in systems:
+        for method in ["EULER", "RUNGE_KUTTA"]:
+            system.integration_method_ = method
+            xs = integrate(system,0.01,80)
+            xs_in_place = integrateInPlace(system,0.01,80)
+            assert(np.allclose(xs,xs_in_place,atol=1e-12))
+            
+    # Two interleaved integrations of the same Dmp give the same result as one
+    dmp = systems[-1]
+    dmp.integration_method_ = "EULER"
+    (x, xd) = dmp.integrateStart()
+    (x1, x2, x1_next, x2_next) = (x.copy(), x.copy(), np.zeros(x.size), np.zeros(x.size))
+    x2[dmp.SPRING_Y] += 0.1
+    for tt in range(50):
+        dmp.integrateStepInPlace(0.01,x1,x1_next,xd)
+        dmp.integrateStepInPlace(0.01,x2,x2_next,xd)
+        (x1, x1_next, x2, x2_next) = (x1_next, x1, x2_next, x2)
+    xs = integrate(dmp,0.01,50)
+    assert(np.allclose(xs[-1],x1,atol=1e-12))
+        
+    # predictInPlace gives the same outputs as predict, for one and several outputs and inputs
+    inputs = np.random.uniform(-0.5,1.5,[20,2])
+    targets = np.column_stack((np.sin(3*inputs[:,0])*inputs[:,1],np.cos(inputs[:,0]+inputs[:,1])))
+    for (fa_inputs, fa_targets, n_bfs) in [ (inputs[:,0], targets[:,0], 5), (inputs, targets[:,0], [4,3]), (inputs, targets, [4,3]) ]:
+        for fa in [ FunctionApproximatorLWR(n_bfs), FunctionApproximatorRBFN(n_bfs,regularization=1e-6) ]:
+            fa.train(fa_inputs,fa_targets)
+            outputs = np.zeros(fa_targets.shape)
+            fa.predictInPlace(fa_inputs,outputs)
+            assert(np.allclose(outputs,fa.predict(fa_inputs),atol=1e-12))
+        
+    # No arrays are allocated, also not for the forcing term of trained function approximators. 
+    # With many dimensions, temporary arrays would be large in comparison 
+    # to the views onto x and xd.
+    n_dims = 2000
+    y_init = np.zeros(n_dims)
+    y_attr = np.ones(n_dims)
+    n_bytes_temporary = 8*n_dims
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    systems = [ 
+        ExponentialSystem(tau,y_init,y_attr,6.0),
+        SpringDamperSystem(tau,y_init,y_attr,20.0),
+    ]
+    # Shared function approximators with many outputs, and one for each dimension
+    for (function_apps, backend) in [ (FunctionApproximatorRBFN(20), "SUBSYSTEMS"), (FunctionApproximatorLWR(20), "FUSED"), ([ FunctionApproximatorRBFN(5) for dd in range(n_dims) ], "SUBSYSTEMS") ]:
+        dmp = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling="G_MINUS_Y0_SCALING")
+        dmp.train(traj)
+        dmp.differential_equation_backend_ = backend
+        systems.append(dmp)
+    for system in systems:
+        for method in ["EULER", "RUNGE_KUTTA"]:
+            system.integration_method_ = method
+            (x, xd) = system.integrateStart()
+            x_updated = np.zeros(x.size)
+            workspace = np.zeros([4,x.size])
+            step = lambda: system.integrateStepInPlace(0.01,x,x_updated,xd,workspace)
+            assert(numpyAllocations(step,3)<n_bytes_temporary)
+            step = lambda: system.integrateStep(0.01,x)
+            assert(numpyAllocations(step,3)>n_bytes_temporary)
+    
+    print('integrateStepInPlace is the same as integrateStep, and does not allocate arrays.')
@@ -0,0 +1,108 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib import kernels
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+
+def compareBackends(dmp, ts, function_apps, inputs_per_fa):
+    """Compare the results of the NUMPY backend to those of the current one."""
+    ( xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+    samples = dmp.getParameterVectorSelected()[np.newaxis,:]
+    trajectories = dmp.getAffineTrajectoryOperator(ts).evaluate(samples)
+    outputs = [ fa.predict(inputs) for (fa, inputs) in zip(function_apps,inputs_per_fa) ]
+    with kernels.backend("NUMPY"):
+        ( xs_numpy, xds_numpy, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+        trajectories_numpy = dmp.getAffineTrajectoryOperator(ts).evaluate(samples)
+        outputs_numpy = [ fa.predict(inputs) for (fa, inputs) in zip(function_apps,inputs_per_fa) ]
+    assert(np.allclose(xs,xs_numpy,rtol=1e-12,atol=1e-12))
+    assert(np.allclose(xds,xds_numpy,rtol=1e-12,atol=1e-12))
+    for (values, values_numpy) in zip(trajectories,trajectories_numpy):
+        assert(np.allclose(values,values_numpy))
+    for (output, output_numpy) in zip(outputs,outputs_numpy):
+        assert(output.shape==output_numpy.shape)
+        assert(output.dtype==output_numpy.dtype)
+        assert(np.allclose(output,output_numpy,rtol=1e-12,atol=1e-12))
+
+if __name__=='__main__':
+    """Check that the kernels give the same results as the NumPy implementations."""
+    
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    function_apps = [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ]
+    dmp = Dmp(tau, y_init, y_attr, function_apps)
+    dmp.train(traj)
+    ts_exec = np.linspace(0,1.5*tau,76)
+    
+    # Function approximators with multi-dimensional inputs and multiple outputs
+    inputs = np.random.uniform(-0.5,1.5,[200,2])
+    targets = np.column_stack((np.sin(3*inputs[:,0])*inputs[:,1],np.cos(inputs[:,0]+inputs[:,1])))
+    fas_multi = []
+    for fa in [ FunctionApproximatorLWR([5,4]), FunctionApproximatorRBFN([5,4],regularization=1e-6) ]:
+        fa.train(inputs,targets)
+        fas_multi.append(fa)
+    inputs_1d = np.linspace(-0.2,1.2,101)
+    inputs_per_fa = [ inputs_1d, inputs_1d, inputs, inputs ]
+    function_apps_all = function_apps + fas_multi
+    
+    # Gaussian activations, also for inputs far from all centers (normalization with zero sum)
+    (centers, widths) = Gaussian.centersAndWidths(np.array([0.0,0.0]),np.array([1.0,1.0]),[4,3])
+    inputs_far = np.vstack((inputs,[[1e3,1e3]]))
+    
+    # The loops give the same results when run as Python functions. This emulates the NUMBA
+    # backend in environments without numba.
+    if not kernels.isNumbaAvailable():
+        compiled = kernels.compiled
+        kernels.compiled = lambda loops: loops
+        kernels._backend = "NUMBA"
+        try:
+            compareBackends(dmp, ts_exec, function_apps_all, inputs_per_fa)
+            for normalized in [False, True]:
+                activations = Gaussian.activations(centers,widths,inputs_far,normalized)
+                with kernels.backend("NUMPY"):
+                    activations_numpy = Gaussian.activations(centers,widths,inputs_far,normalized)
+                assert(np.allclose(activations,activations_numpy,rtol=1e-12,atol=1e-15))
+        finally:
+            kernels.compiled = compiled
+            kernels._backend = "NUMPY"
+            
+        # The NUMBA backend cannot be selected without numba
+        try:
+            kernels.setBackend("NUMBA")
+            assert(False)
+        except ImportError:
+            pass
+        assert(kernels.getBackend()=="NUMPY")
+        print('numba is not installed; kernels were compared to NumPy as Python functions.')
+        
+    else:
+        with kernels.backend("NUMBA"):
+            compareBackends(dmp, ts_exec, function_apps_all, inputs_per_fa)
+        print('Compiled kernels give the same results as NumPy.')
@@ -0,0 +1,92 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+
+if __name__=='__main__':
+    """Compare a Dmp with a flat parameter buffer to one without."""
+
+    tau = 0.5
+    n_dims = 3
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    
+    np.random.seed(0)
+    fa_factories = [ lambda: [FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8), FunctionApproximatorGMR(3)], lambda: FunctionApproximatorRBFN(10) ]
+    for fa_factory in fa_factories:
+        dmp = Dmp(tau, y_init, y_attr, fa_factory())
+        dmp.train(traj)
+        dmp_buffer = Dmp(tau, y_init, y_attr, fa_factory())
+        dmp_buffer.train(traj)
+        dmp_buffer.enableParameterVectorBuffer()
+        
+        values = dmp.getParameterVectorSelected()
+        values_buffer = dmp_buffer.getParameterVectorSelected()
+        assert(np.allclose(values,values_buffer))
+        
+        # Getting the parameters does not copy them, and LWR and RBFN use them directly
+        assert(dmp_buffer.getParameterVectorSelected() is values_buffer)
+        for fa in dmp_buffer.function_approximators_:
+            if isinstance(fa,FunctionApproximatorLWR):
+                assert(np.shares_memory(fa.model_offsets_,values_buffer))
+            if isinstance(fa,FunctionApproximatorRBFN):
+                assert(np.shares_memory(fa.model_weights_,values_buffer))
+        
+        for i_sample in range(3):
+            sample = values + np.random.normal(size=values.size)
+            dmp.setParameterVectorSelected(sample)
+            dmp_buffer.setParameterVectorSelected(sample)
+            assert(np.array_equal(dmp_buffer.getParameterVectorSelected(),sample))
+            assert(np.allclose(dmp.analyticalSolution(ts)[0],dmp_buffer.analyticalSolution(ts)[0]))
+            
+        # Training again re-creates the buffer
+        dmp_buffer.train(traj)
+        dmp.train(traj)
+        assert(np.allclose(dmp.getParameterVectorSelected(),dmp_buffer.getParameterVectorSelected()))
+        assert(np.allclose(dmp.analyticalSolution(ts)[0],dmp_buffer.analyticalSolution(ts)[0]))
+        
+    # Time getting and setting the parameters
+    n_dims = 7
+    y_init = np.zeros(n_dims)
+    y_attr = np.ones(n_dims)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorRBFN(50) for dd in range(n_dims) ])
+    dmp.train(traj)
+    sample = dmp.getParameterVectorSelected()
+    n_repetitions = 10000
+    for enable in [False, True]:
+        if enable:
+            dmp.enableParameterVectorBuffer()
+        start = time.perf_counter()
+        for ii in range(n_repetitions):
+            dmp.setParameterVectorSelected(sample)
+            dmp.getParameterVectorSelected()
+        print('Buffer %s: %.2f us to set and get the parameters' % ('enabled ' if enable else 'disabled',1e6*(time.perf_counter()-start)/n_repetitions))
+    
+    print('Dmps with and without a parameter buffer are the same.')
@@ -0,0 +1,62 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+if __name__=='__main__':
+    """Compare a Dmp with one function approximator per dimension to one with a shared function approximator."""
+
+    tau = 0.5
+    n_dims = 3
+    n_time_steps = 51
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,n_time_steps)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    
+    for fa_class in [FunctionApproximatorLWR, FunctionApproximatorRBFN]:
+        dmp_per_dim = Dmp(tau, y_init, y_attr, [fa_class(10) for dd in range(n_dims)])
+        dmp_per_dim.train(traj)
+        dmp_shared = Dmp(tau, y_init, y_attr, fa_class(10))
+        dmp_shared.train(traj)
+        
+        # Same parameters and same rollouts
+        values = dmp_per_dim.getParameterVectorSelected()
+        assert(np.allclose(values,dmp_shared.getParameterVectorSelected()))
+        xs_per_dim = dmp_per_dim.analyticalSolution(ts)[0]
+        xs_shared = dmp_shared.analyticalSolution(ts)[0]
+        assert(np.allclose(xs_per_dim,xs_shared))
+
+        # Same rollouts after changing the parameters
+        values = values*np.linspace(0.5,1.5,values.size)
+        dmp_per_dim.setParameterVectorSelected(values)
+        dmp_shared.setParameterVectorSelected(values)
+        xs_per_dim = dmp_per_dim.analyticalSolution(ts)[0]
+        xs_shared = dmp_shared.analyticalSolution(ts)[0]
+        assert(np.allclose(xs_per_dim,xs_shared))
+        
+    print('Dmps with per-dimension and shared function approximators are the same.')
@@ -0,0 +1,107 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+if __name__=='__main__':
+    """Compare the exact solution of the spring-damper system to closed-form and Euler solutions."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    function_apps = [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ]
+    dmp = Dmp(tau, y_init, y_attr, function_apps)
+    dmp.train(traj)
+    dmp.spring_damper_integration_method_ = "EXACT"
+    
+    # Critically damped system with a constant goal and forcing term:
+    #   y(t) = g + (y0-g)*(1+omega*t)*exp(-omega*t), with omega = alpha/(2*tau)
+    # A constant forcing term f moves the goal to g + f/k
+    spring = dmp.spring_system_
+    omega = spring.damping_coefficient_/(2*tau)
+    goal = y_attr
+    forcing_term = np.array([0.0, 3.0])
+    goal_equilibrium = goal + forcing_term/spring.spring_constant_
+    ts_uniform = np.linspace(0,1.5*tau,76)
+    ts_nonuniform = np.concatenate(([0.0],np.sort(np.random.uniform(0,1.5*tau,75))))
+    for ts_exec in [ts_uniform, ts_nonuniform]:
+        xs_goal = np.tile(goal,(ts_exec.size,1))
+        forcing_terms = np.tile(forcing_term,(ts_exec.size,1))
+        ( ys, zs, yds, zds ) = dmp.integrateSpringDamper(ts_exec,xs_goal,forcing_terms,y_init)
+        
+        ts_rep = ts_exec[:,np.newaxis]
+        ys_closed = goal_equilibrium + (y_init-goal_equilibrium)*(1+omega*ts_rep)*np.exp(-omega*ts_rep)
+        yds_closed = -(y_init-goal_equilibrium)*omega*omega*ts_rep*np.exp(-omega*ts_rep)
+        assert(np.allclose(ys,ys_closed,atol=1e-10))
+        assert(np.allclose(yds,yds_closed,atol=1e-9))
+        
+    # The linear filter for constant time steps gives the same result as the recurrence
+    ts_perturbed = ts_uniform.copy()
+    ts_perturbed[1:] += 1e-9*np.random.uniform(size=ts_uniform.size-1)
+    ( xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts_uniform)
+    ( xs_perturbed, xds_perturbed, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts_perturbed)
+    # (The phase velocity is discontinuous at tau, so only the spring-damper states are compared)
+    assert(np.allclose(xs[:,dmp.SPRING],xs_perturbed[:,dmp.SPRING],atol=1e-6))
+    assert(np.allclose(xds[:,dmp.SPRING],xds_perturbed[:,dmp.SPRING],atol=1e-5))
+    
+    # Euler integration converges to the exact solution for small time steps
+    n_sub = 1000
+    ts_fine = np.linspace(0,1.5*tau,(ts_uniform.size-1)*n_sub+1)
+    dmp.spring_damper_integration_method_ = "EULER"
+    ( xs_euler, xds_euler, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts_fine)
+    assert(np.allclose(xs_euler[::n_sub,dmp.SPRING_Y],xs[:,dmp.SPRING_Y],atol=1e-3))
+    ( xs_euler_coarse, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts_uniform)
+    # ... and the exact solution is much closer to it than Euler with the same time step
+    error_exact = np.max(np.abs(xs_euler[::n_sub]-xs))
+    error_euler = np.max(np.abs(xs_euler[::n_sub]-xs_euler_coarse))
+    assert(error_exact<0.1*error_euler)
+    
+    # Both give the same affine trajectory operator as analyticalSolution
+    dmp.spring_damper_integration_method_ = "EXACT"
+    operator = dmp.getAffineTrajectoryOperator(ts_nonuniform)
+    values = dmp.getParameterVectorSelected().copy()
+    samples = values + 10.0*np.random.normal(size=(3,values.size))
+    ( ys, yds, ydds, forcing_terms ) = operator.evaluate(samples)
+    for i_sample in range(samples.shape[0]):
+        dmp.setParameterVectorSelected(samples[i_sample,:])
+        ( xs, xds, forcing_terms_ana, fa_outputs) = dmp.analyticalSolution(ts_nonuniform)
+        traj_ana = dmp.statesAsTrajectory(ts_nonuniform,xs,xds)
+        assert(np.allclose(ys[i_sample],traj_ana.ys_))
+        assert(np.allclose(ydds[i_sample],traj_ana.ydds_))
+    dmp.setParameterVectorSelected(values)
+    
+    # Timing for a long horizon
+    ts_long = np.linspace(0,1.5*tau,100001)
+    for method in ["EULER","EXACT"]:
+        dmp.spring_damper_integration_method_ = method
+        start = time.perf_counter()
+        dmp.analyticalSolution(ts_long)
+        print('%s: %.4fs for %d time steps' % (method,time.perf_counter()-start,ts_long.size))
+        
+    print('The exact solution of the spring-damper system is correct.')
@@ -0,0 +1,110 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, tracemalloc
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+def integrateWithChanges(dmp, dt, n_time_steps, changes):
+    """Integrate with integrateStep, applying changes[tt](dmp) before time step tt."""
+    (x, xd) = dmp.integrateStart()
+    xs = [x]
+    xds = [xd]
+    for tt in range(1,n_time_steps):
+        if tt in changes:
+            changes[tt](dmp)
+        (x, xd) = dmp.integrateStep(dt,x)
+        xs.append(x)
+        xds.append(xd)
+    return (np.array(xs), np.array(xds))
+
+if __name__=='__main__':
+    """Compare streaming the states of a Dmp to integrating it with integrateStep."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    traj = Trajectory.generateMinJerkTrajectory(np.linspace(0,tau,51), y_init, y_attr)
+    
+    dt = 0.01
+    n_time_steps = 83
+    changes = {
+        20: lambda dmp: dmp.set_attractor_state(1.5*y_attr),
+        35: lambda dmp: dmp.setParameterVectorSelected(dmp.getParameterVectorSelected()+1.0),
+        50: lambda dmp: dmp.set_tau(1.2*tau),
+    }
+    
+    for method in ["EULER", "RUNGE_KUTTA"]:
+        dmps = []
+        for ii in range(3):
+            dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ], forcing_term_scaling="G_MINUS_Y0_SCALING")
+            dmp.train(traj)
+            dmp.integration_method_ = method
+            dmps.append(dmp)
+        
+        (xs, xds) = integrateWithChanges(dmps[0],dt,n_time_steps,changes)
+        
+        # Step by step, with changes that take effect at the next step
+        xs_stream = []
+        for (t, x, xd) in dmps[1].stream(dt,n_time_steps):
+            tt = len(xs_stream)
+            assert(np.isclose(t,tt*dt))
+            assert(np.array_equal(x,xs[tt]))
+            assert(np.array_equal(xd,xds[tt]))
+            xs_stream.append(x.copy())
+            if tt+1 in changes:
+                changes[tt+1](dmps[1])
+        assert(len(xs_stream)==n_time_steps)
+        
+        # Chunks of 10 time steps, with changes in between chunks (at multiples of 10)
+        chunk_changes = { 10*(tt//10): change for (tt, change) in changes.items() }
+        dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorLWR(10), FunctionApproximatorRBFN(8) ], forcing_term_scaling="G_MINUS_Y0_SCALING")
+        dmp.train(traj)
+        dmp.integration_method_ = method
+        (xs, xds) = integrateWithChanges(dmp,dt,n_time_steps,chunk_changes)
+        tt = 0
+        for (ts_chunk, xs_chunk, xds_chunk) in dmps[2].stream(dt,n_time_steps,chunk_size=10):
+            n_chunk = ts_chunk.size
+            assert(n_chunk==min(10,n_time_steps-tt))
+            assert(np.allclose(ts_chunk,dt*np.arange(tt,tt+n_chunk)))
+            assert(np.array_equal(xs_chunk,xs[tt:tt+n_chunk]))
+            assert(np.array_equal(xds_chunk,xds[tt:tt+n_chunk]))
+            tt += n_chunk
+            if tt in chunk_changes:
+                chunk_changes[tt](dmps[2])
+        assert(tt==n_time_steps)
+        
+    # Without n_time_steps, the stream does not end, and uses constant memory
+    stream = dmps[1].stream(dt)
+    for ii in range(100):
+        next(stream)
+    tracemalloc.start()
+    for ii in range(2000):
+        (t, x, xd) = next(stream)
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert(peak<10000)
+    
+    print('Streaming the states of a Dmp is the same as integrating it with integrateStep.')
@@ -0,0 +1,97 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.precision import floatType
+
+def assertSameSolutions(solutions1, solutions2):
+    for (solution1, solution2) in zip(solutions1,solutions2):
+        assert(np.allclose(solution1,solution2))
+
+if __name__=='__main__':
+    """Check that the cached solutions of the Dmp subsystems are reused and cleared when needed."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    traj = Trajectory.generateMinJerkTrajectory(np.linspace(0,tau,51), y_init, y_attr)
+    ts = np.linspace(0,1.2*tau,61)
+    
+    dmp = Dmp(tau, y_init, y_attr, FunctionApproximatorRBFN(8))
+    dmp.train(traj)
+    solutions = dmp.analyticalSolutionSubsystems(ts)
+    # The solutions are reused for the same times, and must not be changed
+    assert(dmp.analyticalSolutionSubsystems(ts.copy()) is solutions)
+    for solution in solutions:
+        assert(not solution.flags.writeable)
+    assert(dmp.analyticalSolutionSubsystems(ts[:-1]) is not solutions)
+    solutions = dmp.analyticalSolutionSubsystems(ts)
+    with floatType(np.float32):
+        assert(dmp.analyticalSolutionSubsystems(ts)[0].dtype==np.float32)
+        
+    # Changes of tau, the initial and attractor state clear the cache. The solutions are then 
+    # the same as those of a new Dmp with these values.
+    new_tau = 0.8*tau
+    new_y_init = y_init-0.2
+    new_y_attr = 2.0*y_attr
+    dmp.set_tau(new_tau)
+    dmp.set_initial_state(new_y_init)
+    solutions = dmp.analyticalSolutionSubsystems(ts)
+    dmp.set_attractor_state(new_y_attr)
+    assert(dmp.analyticalSolutionSubsystems(ts) is not solutions)
+    dmp_new = Dmp(new_tau, new_y_init, new_y_attr, FunctionApproximatorRBFN(8))
+    assertSameSolutions(dmp.analyticalSolutionSubsystems(ts),dmp_new.analyticalSolutionSubsystems(ts))
+    
+    # The solution of the whole Dmp is as without the cache
+    (xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+    dmp.clearSubsystemSolutions()
+    (xs_uncached, xds_uncached, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+    assert(np.array_equal(xs,xs_uncached))
+    assert(np.array_equal(xds,xds_uncached))
+    
+    # Rollouts as in TaskSolverDmp.performRollout, which only compute the subsystems once
+    dmp = Dmp(tau, y_init, y_attr, [ FunctionApproximatorRBFN(10) for dd in range(n_dims) ])
+    dmp.train(traj)
+    # With the exact spring-damper solution, the subsystems are a larger part of the rollout
+    dmp.spring_damper_integration_method_ = "EXACT"
+    ts = np.linspace(0,1.2*tau,1201)
+    values = dmp.getParameterVectorSelected().copy()
+    samples = values + np.random.normal(size=(50,values.size))
+    times = []
+    for use_cache in [False, True]:
+        start = time.perf_counter()
+        for sample in samples:
+            if not use_cache:
+                dmp.clearSubsystemSolutions()
+            dmp.setParameterVectorSelected(sample)
+            (xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+        times.append(time.perf_counter()-start)
+        if use_cache:
+            assert(np.array_equal(xs,xs_uncached))
+        xs_uncached = xs
+    print('%d rollouts: %.4fs without cache, %.4fs with cache' % (samples.shape[0],times[0],times[1]))
+    
+    print('Solutions of the Dmp subsystems are cached correctly.')
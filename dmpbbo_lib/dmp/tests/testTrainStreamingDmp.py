@@ -0,0 +1,70 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+import tempfile
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGPR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+
+if __name__=='__main__':
+    """Compare training a Dmp on a whole trajectory to training it chunk by chunk from file."""
+
+    tau = 2.0
+    n_dims = 2
+    n_time_steps = 2001
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,n_time_steps)
+    traj = Trajectory.generatePolynomialTrajectoryThroughViapoint(ts,y_init,np.array([-0.2,0.4,0,0,0,0]),0.5*tau,y_attr)
+    
+    directory = tempfile.mkdtemp()
+    traj.saveToFile(directory,'traj.txt')
+    filename = directory+'/traj.txt'
+    traj = Trajectory.readFromFile(filename)
+    
+    for (FunctionApproximatorClass, meta_parameters) in [(FunctionApproximatorLWR, [10]), (FunctionApproximatorRBFN, [10, 0.7, 1e-6])]:
+        for scaling in ["NO_SCALING","AMPLITUDE_SCALING"]:
+            dmp = Dmp(tau, y_init, y_attr, [FunctionApproximatorClass(*meta_parameters) for dd in range(n_dims)], forcing_term_scaling=scaling)
+            dmp.train(traj)
+        
+            # Per-dimension and shared function approximators, with chunks that do not divide the trajectory evenly
+            for function_apps in [[FunctionApproximatorClass(*meta_parameters) for dd in range(n_dims)], FunctionApproximatorClass(*meta_parameters)]:
+                dmp_streaming = Dmp(tau, y_init, y_attr, function_apps, forcing_term_scaling=scaling)
+                dmp_streaming.trainStreaming(lambda: Trajectory.readChunksFromFile(filename,300))
+                assert(np.allclose(dmp_streaming.getParameterVectorSelected(),dmp.getParameterVectorSelected()))
+                assert(np.allclose(dmp_streaming.analyticalSolution(ts)[0],dmp.analyticalSolution(ts)[0]))
+        
+    # Function approximators without trainIncremental (GPR), or whose basis functions cannot be
+    # placed before seeing the data (GMR), are rejected before reading the trajectory
+    for function_apps in [[FunctionApproximatorGPR(1.0,0.1) for dd in range(n_dims)], [FunctionApproximatorGMR(5) for dd in range(n_dims)]]:
+        dmp_rejected = Dmp(tau, y_init, y_attr, function_apps)
+        try:
+            dmp_rejected.trainStreaming(lambda: Trajectory.readChunksFromFile(filename,300))
+            assert(False)
+        except NotImplementedError:
+            pass
+        
+    print('Dmps trained on the whole trajectory and chunk by chunk are the same.')
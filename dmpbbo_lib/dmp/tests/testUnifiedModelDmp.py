@@ -0,0 +1,65 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.dmp.Dmp import *
+from dmpbbo_lib.dmp.Trajectory import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRRRFF import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGPR import *
+
+if __name__=='__main__':
+    """Compare a Dmp with function approximators to one that uses their unified models."""
+
+    tau = 0.5
+    n_dims = 2
+    y_init = np.linspace(0.0,0.7,n_dims)
+    y_attr = np.linspace(0.4,0.5,n_dims)
+    ts = np.linspace(0,tau,51)
+    traj = Trajectory.generateMinJerkTrajectory(ts, y_init, y_attr)
+    ts_exec = np.linspace(0,1.2*tau,61)
+    
+    np.random.seed(0)
+    fa_factories = [ lambda: FunctionApproximatorLWR(10), lambda: FunctionApproximatorRBFN(10), lambda: FunctionApproximatorRRRFF(20,1e-6,5.0,seed=1), lambda: FunctionApproximatorGMR(4), lambda: FunctionApproximatorGPR(1.0,0.05,1e-4) ]
+    for fa_factory in fa_factories:
+        for shared in [False, True]:
+            function_apps = fa_factory() if shared else [ fa_factory() for dd in range(n_dims) ]
+            dmp = Dmp(tau, y_init, y_attr, function_apps)
+            dmp.train(traj)
+            xs = dmp.analyticalSolution(ts_exec)[0]
+            
+            dmp.useUnifiedModels()
+            xs_unified = dmp.analyticalSolution(ts_exec)[0]
+            assert(np.allclose(xs,xs_unified))
+            
+            # The affine operator works on the unified models
+            values = dmp.getParameterVectorSelected()
+            samples = values + np.random.normal(size=(3,values.size))
+            ys = dmp.getAffineTrajectoryOperator(ts_exec).evaluate(samples)[0]
+            for i_sample in range(samples.shape[0]):
+                dmp.setParameterVectorSelected(samples[i_sample])
+                xs_sample = dmp.analyticalSolution(ts_exec)[0]
+                assert(np.allclose(xs_sample[:,dmp.SPRING_Y],ys[i_sample]))
+        
+    print('Dmps with function approximators and their unified models are the same.')
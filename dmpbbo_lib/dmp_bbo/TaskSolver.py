@@ -30,6 +30,15 @@ class TaskSolver:
         """
         raise NotImplementedError('subclasses must override performRollout()!')
         
+    def performRollouts(self,samples):
+        """ Perform the rollouts for all the samples (n_samples x n_parameters).
+        
+        This default implementation calls performRollout() for each sample. Subclasses may 
+        override it to perform all rollouts at once.
+        \return A list with the variables relevant to computing the cost, for each sample.
+        """
+        return [ self.performRollout(sample) for sample in samples ]
+        
     def plotRollout(self,cost_vars,ax):
         #print("plotRollout not implemented.")
         pass
@@ -27,22 +27,59 @@ from dmp_bbo.TaskSolver import TaskSolver
 
 class TaskSolverDmp(TaskSolver):
 
-    def __init__(self,dmp, dt, integrate_dmp_beyond_tau_factor):
+    def __init__(self,dmp, dt, integrate_dmp_beyond_tau_factor, use_affine_operator=False):
         self.dmp_ = dmp
         self.integrate_time_ = dmp.tau_ * integrate_dmp_beyond_tau_factor
         self.n_time_steps_ = int(np.floor(self.integrate_time_/dt)) + 1
+        # The same times for all rollouts, so that the Dmp reuses the solutions of its phase, 
+        # gating and goal systems (see Dmp.analyticalSolutionSubsystems)
+        self.ts_ = np.linspace(0.0, self.integrate_time_, self.n_time_steps_)
+        
+        # If True, rollouts are computed with Dmp.getAffineTrajectoryOperator. It is computed at
+        # the first rollout, and again whenever the Dmp changes in a way that changes the operator,
+        # see getAffineOperator()
+        self.use_affine_operator_ = use_affine_operator
+        self.affine_operator_ = None
+        self.affine_operator_key_ = None
+        
+    def getAffineOperator(self):
+        """Return the affine operator for the current Dmp, computing it again if it is stale."""
+        key = self.dmp_.getAffineTrajectoryOperatorKey(self.ts_)
+        if self.affine_operator_ is None or key!=self.affine_operator_key_:
+            self.affine_operator_ = self.dmp_.getAffineTrajectoryOperator(self.ts_)
+            self.affine_operator_key_ = key
+        return self.affine_operator_
     
     def performRollout(self,sample,task_parameters=None):
         self.dmp_.setParameterVectorSelected(sample)
         
-        ts = np.linspace(0.0, self.integrate_time_, self.n_time_steps_)
+        if self.use_affine_operator_:
+            traj = self.getAffineOperator().evaluateAsTrajectory(sample)
+            return traj.asMatrix()
+        
+        ts = self.ts_
         (xs, xds, forcing_terms, fa_outputs) = self.dmp_.analyticalSolution(ts)
         traj = self.dmp_.statesAsTrajectory(ts,xs,xds)
         traj.setMisc(forcing_terms)
         cost_vars = traj.asMatrix()
         return cost_vars
         
-        
-        
-    
-
+    def performRollouts(self,samples):
+        ts = self.ts_
+        if self.use_affine_operator_:
+            # One matrix product for all samples
+            (ys, yds, ydds, forcing_terms) = self.getAffineOperator().evaluate(samples)
+            # Same as Trajectory.asMatrix
+            all_cost_vars = [ np.column_stack((ts,ys[i_sample],yds[i_sample],ydds[i_sample])) for i_sample in range(samples.shape[0]) ]
+        else:
+            # Integrate the Dmp for all samples at once
+            (xs, xds, forcing_terms, fa_outputs) = self.dmp_.analyticalSolutionBatch(samples,ts)
+            all_cost_vars = []
+            for i_sample in range(samples.shape[0]):
+                traj = self.dmp_.statesAsTrajectory(ts,xs[i_sample],xds[i_sample])
+                traj.setMisc(forcing_terms[i_sample])
+                all_cost_vars.append(traj.asMatrix())
+            
+        # As after calling performRollout for each sample, the Dmp has the parameters of the last one
+        self.dmp_.setParameterVectorSelected(samples[-1])
+        return all_cost_vars
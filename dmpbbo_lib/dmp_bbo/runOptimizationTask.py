@@ -60,10 +60,12 @@ def runOptimizationTask(task, task_solver, initial_distribution, updater, n_upda
         # 2. Evaluate the samples
         costs = np.full(n_samples_per_update,0.0)
         rollouts = []
+        
+        # 2A. Perform the rollouts, for all samples at once
+        all_cost_vars = task_solver.performRollouts(samples)
+        
         for i_sample in range(n_samples_per_update):
-            
-            # 2A. Perform the rollouts
-            cost_vars = task_solver.performRollout(samples[i_sample,:])
+            cost_vars = all_cost_vars[i_sample]
       
             # 2B. Evaluate the rollouts
             cur_costs = task.evaluateRollout(cost_vars,samples[i_sample,:])
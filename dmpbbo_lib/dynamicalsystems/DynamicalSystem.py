@@ -20,6 +20,30 @@ import numpy as np
 import sys
 import os
 
+from dmpbbo_lib.precision import getFloatType
+
+# Coefficients of the Dormand-Prince method, see DynamicalSystem.integrateDormandPrince(). The 
+# row of the last stage contains the weights of the 5th order solution.
+DORMAND_PRINCE_A = [
+    np.array([1/5]),
+    np.array([3/40, 9/40]),
+    np.array([44/45, -56/15, 32/9]),
+    np.array([19372/6561, -25360/2187, 64448/6561, -212/729]),
+    np.array([9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]),
+    np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]),
+]
+# Difference between the weights of the 5th and 4th order solutions
+DORMAND_PRINCE_E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+# Coefficients of the 4th order dense output, in powers of theta = (t-t_step)/dt
+DORMAND_PRINCE_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]])
+
 class DynamicalSystem:
 
     def __init__(self,  order, tau, initial_state, attractor_state, name):
@@ -44,14 +68,18 @@ class DynamicalSystem:
         
         self.integration_method_=  "EULER"
         
+        # Tolerances of the adaptive "DORMAND_PRINCE" integration method
+        self.integration_rtol_ = 1e-6
+        self.integration_atol_ = 1e-9
+        
     def differentialEquation(self,x):
         raise NotImplementedError('subclasses must override updateDistribution()!')
         
     def analyticalSolution(self,ts):
         # Default implementation: call differentialEquation
         n_time_steps = ts.size
-        xs = np.zeros([n_time_steps,self.dim_])
-        xds = np.zeros([n_time_steps,self.dim_])
+        xs = np.zeros([n_time_steps,self.dim_],dtype=getFloatType())
+        xds = np.zeros([n_time_steps,self.dim_],dtype=getFloatType())
     
         (xs[0,:], xds[0,:]) = self.integrateStart()
         for tt in range(1,n_time_steps):
@@ -67,17 +95,26 @@ class DynamicalSystem:
         # Pad the end with zeros: Why? In the spring-damper system, the state
         # consists of x = [y z]. 
         # The initial state only applies to y. Therefore, we set x = [y 0] 
-        x = np.zeros(self.dim_)
+        x = np.zeros(self.dim_,dtype=getFloatType())
         x[0:self.dim_orig_] = self.initial_state_
         
         # Return value (rates of change)
         return (x,self.differentialEquation(x))
         
+    def differentialEquationInPlace(self,x,xd):
+        """Write the rates of change of state x into xd.
+        
+        Subclasses override this to avoid allocating arrays, see integrateStepInPlace().
+        """
+        xd[:] = self.differentialEquation(x)
+        
     def integrateStep(self,dt, x):
       assert(dt>0.0)
       assert(x.size==self.dim_)
       if (self.integration_method_.upper() == "RUNGE_KUTTA" or self.integration_method_.upper() == "RUNGEKUTTA"):
         return self.integrateStepRungeKutta(dt, x)
+      elif (self.integration_method_.upper() == "DORMAND_PRINCE"):
+        return self.integrateStepDormandPrince(dt, x)
       else:
         return self.integrateStepEuler(  dt, x)
             
@@ -102,7 +139,136 @@ class DynamicalSystem:
         x_updated = x + dt*(k1 + 2.0*(k2+k3) + k4)/6.0
         xd_updated = self.differentialEquation(x_updated)
         return (x_updated,xd_updated)
+        
+    def integrateStepDormandPrince(self, dt, x):
+        # Adaptive steps within dt, see integrateDormandPrince()
+        xs = self.integrateDormandPrince(x,np.array([0.0, dt]))
+        x_updated = xs[-1].astype(x.dtype)
+        xd_updated = self.differentialEquation(x_updated)
+        return (x_updated,xd_updated)
+        
+    def integrateAdaptive(self, ts, rtol=None, atol=None, dt_max=None):
+        """Integrate the system from integrateStart() with adaptive steps, and return the states at ts.
+        
+        Unlike analyticalSolution(), the number of steps does not depend on ts, but on the 
+        tolerances. See integrateDormandPrince().
+        """
+        (x, xd) = self.integrateStart()
+        xs = np.zeros([ts.size,self.dim_],dtype=getFloatType())
+        xds = np.zeros([ts.size,self.dim_],dtype=getFloatType())
+        xs[:,:] = self.integrateDormandPrince(x,ts,rtol,atol,dt_max)
+        for tt in range(ts.size):
+            self.differentialEquationInPlace(xs[tt],xds[tt])
+        return (xs,xds)
+        
+    def integrateDormandPrince(self, x, ts, rtol=None, atol=None, dt_max=None):
+        """Integrate from state x at time ts[0] with the Dormand-Prince method, and return the states at ts.
+        
+        The step size is adapted so that the estimated error of each step is within the relative 
+        and absolute tolerances (by default integration_rtol_ and integration_atol_). States in 
+        between steps are interpolated with the 4th order dense output of the method. See 
+        Hairer, Norsett and Wanner (1993), "Solving Ordinary Differential Equations I".
+        """
+        if rtol is None:
+            rtol = self.integration_rtol_
+        if atol is None:
+            atol = self.integration_atol_
+        t = ts[0]
+        t_end = ts[-1]
+        if dt_max is None:
+            dt_max = t_end-t
+        
+        xs = np.zeros([ts.size,self.dim_])
+        x = np.array(x,dtype=float).reshape(self.dim_)
+        xs[0] = x
+        if ts.size==1 or t_end<=t:
+            return xs
+        
+        # Rates of change for each stage. The last stage is the first of the next step.
+        ks = np.zeros([7,self.dim_])
+        self.differentialEquationInPlace(x,ks[0])
+        
+        # Initial step size, see Hairer et al. (1993), Section II.4
+        scale = atol + rtol*np.abs(x)
+        d0 = np.sqrt(np.mean(np.square(x/scale)))
+        d1 = np.sqrt(np.mean(np.square(ks[0]/scale)))
+        dt = 0.01*d0/d1 if (d0>1e-5 and d1>1e-5) else 1e-6
+        dt = min(dt,dt_max)
+        
+        i_out = 1
+        while i_out<ts.size:
+            last_step = (dt>=t_end-t)
+            if last_step:
+                dt = t_end-t
+                
+            for i_stage in range(1,7):
+                x_new = x + dt*DORMAND_PRINCE_A[i_stage-1].dot(ks[0:i_stage])
+                self.differentialEquationInPlace(x_new,ks[i_stage])
+                
+            # Error estimate from the difference between the 5th and 4th order solutions
+            scale = atol + rtol*np.maximum(np.abs(x),np.abs(x_new))
+            error = np.sqrt(np.mean(np.square(dt*DORMAND_PRINCE_E.dot(ks)/scale)))
+            
+            if error<=1.0:
+                t_new = t_end if last_step else t+dt
+                # Dense output for the times within this step
+                q = ks.T.dot(DORMAND_PRINCE_P)
+                while i_out<ts.size and ts[i_out]<=t_new:
+                    theta = (ts[i_out]-t)/dt
+                    xs[i_out] = x + dt*q.dot(np.power(theta,np.arange(1,5)))
+                    i_out += 1
+                t = t_new
+                x = x_new
+                ks[0] = ks[6]
+                factor = 5.0 if error==0.0 else min(5.0,0.9*error**-0.2)
+            else:
+                factor = max(0.2,0.9*error**-0.2)
+            dt = min(dt*factor,dt_max)
+            
+        return xs
 
+    def integrateStepInPlace(self, dt, x, x_updated, xd_updated, workspace=None):
+        """Integration step that writes into the caller-provided arrays x_updated and xd_updated.
+        
+        For systems that override differentialEquationInPlace(), no arrays are allocated. All 
+        intermediate results are stored in the arguments, so several loops may integrate the same 
+        system concurrently. x_updated must be a different array than x. Runge-Kutta integration 
+        requires a workspace of size 4 x dim.
+        """
+        assert(dt>0.0)
+        assert(x.size==self.dim_)
+        assert(x_updated is not x)
+        if (self.integration_method_.upper() == "DORMAND_PRINCE"):
+            # Adaptive steps require memory for their stages, and are therefore not allocation-free
+            (x_updated[:], xd_updated[:]) = self.integrateStepDormandPrince(dt, x)
+        elif (self.integration_method_.upper() == "RUNGE_KUTTA" or self.integration_method_.upper() == "RUNGEKUTTA"):
+            assert(workspace is not None and workspace.shape==(4,self.dim_))
+            (k1, k2, k3, k4) = workspace
+            # Same operations as integrateStepRungeKutta, with x_updated holding the inputs
+            self.differentialEquationInPlace(x,k1)
+            np.multiply(k1,dt*0.5,out=x_updated)
+            x_updated += x
+            self.differentialEquationInPlace(x_updated,k2)
+            np.multiply(k2,dt*0.5,out=x_updated)
+            x_updated += x
+            self.differentialEquationInPlace(x_updated,k3)
+            np.multiply(k3,dt,out=x_updated)
+            x_updated += x
+            self.differentialEquationInPlace(x_updated,k4)
+            # k1 + 2.0*(k2+k3) + k4
+            k2 += k3
+            k2 *= 2.0
+            k2 += k1
+            k2 += k4
+            k2 *= dt
+            k2 /= 6.0
+            np.add(x,k2,out=x_updated)
+            self.differentialEquationInPlace(x_updated,xd_updated)
+        else:
+            self.differentialEquationInPlace(x,xd_updated)
+            np.multiply(xd_updated,dt,out=x_updated)
+            x_updated += x
+        
     def set_tau(self,tau):
         assert(tau>0.0)
         self.tau_ = tau
@@ -21,6 +21,7 @@ import sys
 import os
 
 from dmpbbo_lib.dynamicalsystems.DynamicalSystem import DynamicalSystem#
+from dmpbbo_lib.precision import asFloatType
 
 
 class ExponentialSystem(DynamicalSystem):
@@ -33,6 +34,13 @@ class ExponentialSystem(DynamicalSystem):
         xd = self.alpha_*(self.attractor_state_-x)/self.tau_
         return xd
 
+    def differentialEquationInPlace(self, x, xd, attractor_state=None):
+        if attractor_state is None:
+            attractor_state = self.attractor_state_
+        np.subtract(attractor_state,x,out=xd)
+        xd *= self.alpha_
+        xd /= self.tau_
+
     def analyticalSolution(self, ts):
         T = ts.size
 
@@ -51,4 +59,4 @@ class ExponentialSystem(DynamicalSystem):
         vel_scale_repeat = np.repeat(np.atleast_2d(vel_scale),self.dim_,axis=0) 
         xds = np.multiply(val_range_repeat,vel_scale_repeat.T)
 
-        return (xs, xds)
\ No newline at end of file
+        return (asFloatType(xs), asFloatType(xds))
\ No newline at end of file
@@ -22,6 +22,7 @@ import os
 
 
 from dmpbbo_lib.dynamicalsystems.DynamicalSystem import DynamicalSystem#
+from dmpbbo_lib.precision import getFloatType
 
 
 class SigmoidSystem(DynamicalSystem):
@@ -89,13 +90,19 @@ class SigmoidSystem(DynamicalSystem):
         xd = self.max_rate_*x*(1-(np.divide(x,self.Ks_)))
         return xd
 
+    def differentialEquationInPlace(self, x, xd):
+        np.divide(x,self.Ks_,out=xd)
+        np.subtract(1,xd,out=xd)
+        xd *= x
+        xd *= self.max_rate_
+
     def analyticalSolution(self, ts):
         # Auxillary variables to improve legibility
         r = self.max_rate_
         exp_rt = np.exp(-r*ts)
       
-        xs = np.empty([ts.size,self.dim_])
-        xds = np.empty([ts.size,self.dim_])
+        xs = np.empty([ts.size,self.dim_],dtype=getFloatType())
+        xds = np.empty([ts.size,self.dim_],dtype=getFloatType())
 
         for dd in range(self.dim_):
             # Auxillary variables to improve legibility
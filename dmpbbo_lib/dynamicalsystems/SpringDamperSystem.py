@@ -19,6 +19,7 @@
 import numpy as np
 import sys
 import os
+from scipy import linalg
 
 from dmpbbo_lib.dynamicalsystems.DynamicalSystem import DynamicalSystem
 
@@ -53,3 +54,42 @@ class SpringDamperSystem(DynamicalSystem):
         xd = np.concatenate((yd,zd))
   
         return xd
+
+    def exactDiscretization(self, dt):
+        """Matrices of the exact discrete-time solution for a time step dt.
+        
+        The state [y z] evolves as yd = z/tau and zd = (-k*y - d*z)/(m*tau) + u, where the input u
+        (due to the attractor state and external forces) is interpolated linearly during the time 
+        step. Then
+          [y z](t+dt) = Phi*[y z](t) + Gamma_0*u(t) + Gamma_1*(u(t+dt)-u(t))/dt
+        Returns (Phi, Gamma_0, Gamma_1), with Phi 2x2, and Gamma_0 and Gamma_1 of size 2.
+        """
+        mass_tau = self.mass_*self.tau_
+        # Augmented system with [y z u ud] as its state, see for instance 
+        # https://en.wikipedia.org/wiki/Discretization#Discretization_of_linear_state_space_models
+        M = np.zeros([4,4])
+        M[0,1] = 1.0/self.tau_
+        M[1,0] = -self.spring_constant_/mass_tau
+        M[1,1] = -self.damping_coefficient_/mass_tau
+        M[1,2] = 1.0
+        M[2,3] = 1.0
+        E = linalg.expm(M*dt)
+        return (E[0:2,0:2], E[0:2,2], E[0:2,3])
+
+    def differentialEquationInPlace(self, x, xd, attractor_state=None):
+        # Same as differentialEquation, but without allocating arrays. The attractor state may be
+        # passed, so that it need not be set in the system.
+        if attractor_state is None:
+            attractor_state = self.attractor_state_
+        y = x[0:self.dim_orig_]
+        z = x[self.dim_orig_:]
+        yd = xd[0:self.dim_orig_]
+        zd = xd[self.dim_orig_:]
+        
+        # yd is used as temporary storage for damping_coefficient_*z
+        np.subtract(y,attractor_state,out=zd)
+        zd *= -self.spring_constant_
+        np.multiply(z,self.damping_coefficient_,out=yd)
+        zd -= yd
+        zd /= self.mass_*self.tau_
+        np.divide(z,self.tau_,out=yd)
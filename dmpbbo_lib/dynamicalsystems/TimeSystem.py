@@ -21,6 +21,7 @@ import sys
 import os
 
 from dmpbbo_lib.dynamicalsystems.DynamicalSystem import DynamicalSystem#
+from dmpbbo_lib.precision import getFloatType
 
 
 class TimeSystem(DynamicalSystem):
@@ -43,37 +44,31 @@ class TimeSystem(DynamicalSystem):
                 
         return xd
 
-#    def analyticalSolution(self, ts):
-#        T = ts.size
-#
-#        # Prepare output arguments to be of right size
-#        xs = np.zeros([T,self.dim_]);
-#        xds = np.zeros([T,self.dim_]);
-#  
-#        # Find first index at which the time is larger than tau. Then velocities should be set to zero.
-#        velocity_stop_index = -1;
-#  int i=0;
-#  while (velocity_stop_index<0 && i<ts.size())
-#    if (ts[i++]>tau())
-#      velocity_stop_index = i-1;
-#    
-#  if (velocity_stop_index<0)
-#    velocity_stop_index = ts.size();
-#
-#  if (count_down_)
-#  {
-#    xs.topRows(velocity_stop_index) = (-ts.segment(0,velocity_stop_index).array()/tau()).array()+1.0;
-#    xs.bottomRows(xs.size()-velocity_stop_index).fill(0.0);
-#  
-#    xds.topRows(velocity_stop_index).fill(-1.0/tau());
-#    xds.bottomRows(xds.size()-velocity_stop_index).fill(0.0);
-#  }
-#  else
-#  {
-#    xs.topRows(velocity_stop_index) = ts.segment(0,velocity_stop_index).array()/tau();
-#    xs.bottomRows(xs.size()-velocity_stop_index).fill(1.0);
-#  
-#    xds.topRows(velocity_stop_index).fill(1.0/tau());
-#    xds.bottomRows(xds.size()-velocity_stop_index).fill(0.0);
-#  }
-  
+    def differentialEquationInPlace(self, x, xd):
+        xd[0] = 0.0
+        if self.count_down_:
+            if x[0]>0:
+                xd[0] = -1.0/self.tau_
+        else:
+            if x[0]<1.0:
+                xd[0] = 1.0/self.tau_
+
+    def analyticalSolution(self, ts):
+        T = ts.size
+
+        # Prepare output arguments to be of right size
+        xs = np.zeros([T,self.dim_],dtype=getFloatType())
+        xds = np.zeros([T,self.dim_],dtype=getFloatType())
+        
+        # The time runs until tau, after which the velocities are zero. As each time step is 
+        # computed independently, this also works for ts that do not start at 0.
+        moving = (ts<=self.tau_)
+        if self.count_down_:
+            xs[moving,0] = 1.0 - ts[moving]/self.tau_
+            xds[moving,0] = -1.0/self.tau_
+        else:
+            xs[moving,0] = ts[moving]/self.tau_
+            xs[~moving,0] = 1.0
+            xds[moving,0] = 1.0/self.tau_
+            
+        return (xs,xds)
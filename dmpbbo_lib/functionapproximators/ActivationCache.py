@@ -0,0 +1,83 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from scipy import sparse
+
+
+class ActivationCache:
+    """Least-recently-used cache for basis function activations.
+    
+    During optimization, a Dmp is often integrated many times on the same time steps, with 
+    only the parameter vector changing. The basis function activations are then the same for 
+    each rollout, and need not be recomputed. The cache is keyed on the contents of the 
+    inputs and of the model arrays that determine the activations (e.g. centers and widths),
+    so changing the model automatically invalidates the cached activations.
+    """
+    
+    def __init__(self, max_size=16):
+        assert(max_size>0)
+        self.max_size_ = max_size
+        self.entries_ = OrderedDict()
+        self.n_hits_ = 0
+        self.n_misses_ = 0
+        
+    def getActivations(self, inputs, compute_activations, model=()):
+        """Get the activations for the inputs from the cache, or compute and cache them.
+        
+        compute_activations(inputs) is called on a cache miss. 'model' contains the arrays and
+        values that compute_activations depends on, besides the inputs.
+        """
+        key = (ActivationCache.hashArray(inputs),) + tuple(ActivationCache.hashArray(m) for m in model)
+        
+        activations = self.entries_.get(key)
+        if activations is not None:
+            self.n_hits_ += 1
+            self.entries_.move_to_end(key)
+            return activations
+            
+        self.n_misses_ += 1
+        activations = compute_activations(inputs)
+        # Cached activations are shared between callers, so they should not be changed
+        if sparse.issparse(activations):
+            activations.data.setflags(write=False)
+        else:
+            activations.setflags(write=False)
+        self.entries_[key] = activations
+        if len(self.entries_)>self.max_size_:
+            # Evict the least recently used entry
+            self.entries_.popitem(last=False)
+        return activations
+        
+    def clear(self):
+        self.entries_.clear()
+        
+    def size(self):
+        return len(self.entries_)
+        
+    def hashArray(values):
+        if values is None or np.isscalar(values):
+            return values
+        values = np.ascontiguousarray(values)
+        digest = hashlib.sha1(values.reshape(-1).view(np.uint8)).hexdigest()
+        return (values.shape, values.dtype.str, digest)
+        
+    def __str__(self):
+        return 'ActivationCache(size=%d/%d, hits=%d, misses=%d)' % (self.size(),self.max_size_,self.n_hits_,self.n_misses_)
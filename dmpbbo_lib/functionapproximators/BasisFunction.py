@@ -16,18 +16,78 @@
 # along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
-import numpy.matlib
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from dmpbbo_lib import kernels
+from dmpbbo_lib.precision import getFloatType
 
 class Gaussian:
-    def activations(centers, widths, inputs, normalized_basis_functions=False):
+    def centersAndWidths(min_vals, max_vals, n_basis_functions_per_dim, intersection_height=0.5):
+        """Place the basis functions on a grid that spans the range of the inputs.
+        
+        Neighbouring basis functions intersect at 'intersection_height' along each dimension.
+        For one input dimension, centers and widths are vectors (n_basis_functions). 
+        Otherwise, they are n_basis_functions x n_dims, with one row for each point of the grid.
+        n_basis_functions_per_dim may be one number for all dimensions, or one for each.
+        """
+        min_vals = np.atleast_1d(min_vals)
+        max_vals = np.atleast_1d(max_vals)
+        n_dims = min_vals.size
+        n_basis_functions_per_dim = np.broadcast_to(n_basis_functions_per_dim,(n_dims,))
+        
+        centers_per_dim = []
+        widths_per_dim = []
+        for i_dim in range(n_dims):
+            n_centers = n_basis_functions_per_dim[i_dim]
+            centers = np.linspace(min_vals[i_dim],max_vals[i_dim],n_centers)
+            widths = np.ones(n_centers)
+            if n_centers>1:
+                # Consider two neighbouring basis functions, exp(-0.5(x-c0)^2/w^2) and exp(-0.5(x-c1)^2/w^2)
+                # Assuming the widths are the same for both, they are certain to intersect at x = 0.5(c0+c1)
+                # And we want the activation at x to be 'intersection'. So
+                #            y = exp(-0.5(x-c0)^2/w^2)
+                # intersection = exp(-0.5((0.5(c0+c1))-c0)^2/w^2)
+                # intersection = exp(-0.5((0.5*c1-0.5*c0)^2/w^2))
+                # intersection = exp(-0.5((0.5*(c1-c0))^2/w^2))
+                # intersection = exp(-0.5(0.25*(c1-c0)^2/w^2))
+                # intersection = exp(-0.125((c1-c0)^2/w^2))
+                #            w = sqrt((c1-c0)^2/-8*ln(intersection))
+                widths[:-1] = np.sqrt(np.square(np.diff(centers))/(-8*np.log(intersection_height)))
+                widths[-1] = widths[-2]
+            centers_per_dim.append(centers)
+            widths_per_dim.append(widths)
+            
+        if n_dims==1:
+            return (centers_per_dim[0], widths_per_dim[0])
+            
+        # All combinations of the centers (and widths) in each dimension
+        centers = np.stack(np.meshgrid(*centers_per_dim,indexing='ij'),axis=-1).reshape(-1,n_dims)
+        widths = np.stack(np.meshgrid(*widths_per_dim,indexing='ij'),axis=-1).reshape(-1,n_dims)
+        return (centers, widths)
+        
+    def activations(centers, widths, inputs, normalized_basis_functions=False, out=None):
+        """Compute the activations (n_samples x n_basis_functions) of Gaussian basis functions.
+        
+        For one input dimension, centers and widths are vectors. Otherwise, they are 
+        n_basis_functions x n_dims, and inputs is n_samples x n_dims.
+        If 'out' is passed, the activations are written into it (and it is returned).
+        """
 
         assert(centers.shape==widths.shape)
 
-        n_basis_functions = centers.size
-        n_samples         = inputs.size
-        n_dims            = 1
+        n_basis_functions = centers.shape[0]
+        n_dims            = centers.size//n_basis_functions
+        n_samples         = inputs.size//n_dims
+        centers = np.reshape(centers,(n_basis_functions,n_dims))
+        widths  = np.reshape(widths,(n_basis_functions,n_dims))
+        inputs  = np.reshape(inputs,(n_samples,n_dims))
   
-        kernel_activations = np.ones([n_samples,n_basis_functions])
+        if out is None:
+            kernel_activations = np.empty([n_samples,n_basis_functions],dtype=getFloatType())
+        else:
+            assert(out.shape==(n_samples,n_basis_functions))
+            kernel_activations = out
   
         if normalized_basis_functions and n_basis_functions==1:
             # Locally Weighted Regression with only one basis function is pretty odd.
@@ -38,38 +98,196 @@ class Gaussian:
             # (normalizing a Gaussian basis function with itself leads to 1 everywhere).
             kernel_activations.fill(1.0)
             return kernel_activations
+            
+        if kernels.useCompiled():
+            kernel_activations[:,:] = kernels.gaussianActivations(centers,widths,inputs,normalized_basis_functions)
+            return kernel_activations
   
-  
-        for bb in range(n_basis_functions):
-            # Here, we compute the values of a (unnormalized) multi-variate Gaussian:
-            #   activation = exp(-0.5*(x-mu)*Sigma^-1*(x-mu))
-            # Because Sigma is diagonal in our case, this simplifies to
-            #   activation = exp(\sum_d=1^D [-0.5*(x_d-mu_d)^2/Sigma_(d,d)]) 
-            #              = \prod_d=1^D exp(-0.5*(x_d-mu_d)^2/Sigma_(d,d)) 
-            # This last product is what we compute below incrementally
-    
-
-            for i_dim in range(n_dims):
-               c = centers[bb] # c = centers[bb,i_dim]
-               for i_s in range(n_samples):
-                   x = inputs[i_s] # x = inputs[i_s,i_dim]
-                   w = widths[bb]  # w = widths[bb,i_dim]
-        
-                   kernel_activations[i_s,bb] *= np.exp(-0.5*np.square(x-c)/(w*w))
-                   
-        #np.set_printoptions(precision=3,suppress=True)
-        #print(kernel_activations)
+        # Here, we compute the values of a (unnormalized) multi-variate Gaussian:
+        #   activation = exp(-0.5*(x-mu)*Sigma^-1*(x-mu))
+        # Because Sigma is diagonal in our case, this simplifies to
+        #   activation = exp(\sum_d=1^D [-0.5*(x_d-mu_d)^2/Sigma_(d,d)]) 
+        #              = \prod_d=1^D exp(-0.5*(x_d-mu_d)^2/Sigma_(d,d)) 
+        # For all samples and basis functions at once, (x_d-mu_d)/sigma_d is computed by
+        # broadcasting the inputs (as a column) against the centers (as a row).
+        # All operations below are done in place in kernel_activations (and one buffer for
+        # the other dimensions).
+        for i_dim in range(n_dims):
+            if i_dim==0:
+                buffer = kernel_activations
+            elif i_dim==1:
+                buffer = np.empty_like(kernel_activations)
+            np.subtract(inputs[:,i_dim:i_dim+1],np.reshape(centers[:,i_dim],(1,n_basis_functions)),out=buffer)
+            np.divide(buffer,np.reshape(widths[:,i_dim],(1,n_basis_functions)),out=buffer)
+            np.square(buffer,out=buffer)
+            if i_dim>0:
+                np.add(kernel_activations,buffer,out=kernel_activations)
+        np.multiply(kernel_activations,-0.5,out=kernel_activations)
+        np.exp(kernel_activations,out=kernel_activations)
                    
         if (normalized_basis_functions):
             # Normalize the basis value; they should sum to 1.0 for each time step.
-            for i_sample in range(n_samples):
-                sum_kernel_activations = kernel_activations[i_sample,:].sum()
-                for i_basis in range(n_basis_functions):
-                    if (sum_kernel_activations==0.0):
-                        # Apparently, no basis function was active. Set all to same value
-                        kernel_activations[i_sample,i_basis] = 1.0/n_basis_functions
-                    else:
-                        # Standard case, normalize so that they sum to 1.0
-                        kernel_activations[i_sample,i_basis] /= sum_kernel_activations
+            sum_kernel_activations = kernel_activations.sum(axis=1,keepdims=True)
+            # If no basis function was active for a sample, set all to same value
+            inactive = (sum_kernel_activations[:,0]==0.0)
+            if np.any(inactive):
+                sum_kernel_activations[inactive] = 1.0
+                kernel_activations[inactive,:] = 1.0/n_basis_functions
+            # Standard case, normalize so that they sum to 1.0
+            np.divide(kernel_activations,sum_kernel_activations,out=kernel_activations)
                         
-        return kernel_activations
\ No newline at end of file
+        return kernel_activations
+
+    def activationsSparse(centers, widths, inputs, normalized_basis_functions=False, cutoff=3.0):
+        """Compute the activations of Gaussian basis functions, truncated beyond 'cutoff' standard deviations.
+        
+        Only the band of neighbouring basis functions within the cutoff is evaluated for each
+        sample, so the cost is O(n_samples*n_active) rather than O(n_samples*n_basis_functions).
+        For one input dimension, the centers must be sorted. For several input dimensions, see
+        activationsSparseMultiDim. Returns a scipy.sparse.csr_matrix (n_samples x n_basis_functions).
+        """
+        
+        assert(centers.shape==widths.shape)
+        assert(cutoff>0.0)
+        
+        if centers.ndim>1 and centers.shape[1]>1:
+            return Gaussian.activationsSparseMultiDim(centers,widths,inputs,normalized_basis_functions,cutoff)
+
+        centers = np.reshape(centers,-1)
+        widths  = np.reshape(widths,-1)
+        inputs  = np.reshape(inputs,-1)
+        n_basis_functions = centers.size
+        n_samples         = inputs.size
+        assert(np.all(np.diff(centers)>=0.0))
+        
+        if normalized_basis_functions and n_basis_functions==1:
+            # See Gaussian.activations
+            return sparse.csr_matrix(np.ones([n_samples,1],dtype=getFloatType()))
+        
+        # Basis function bb is within the cutoff for input x if
+        #   centers[bb]-radii[bb] <= x <= centers[bb]+radii[bb]
+        # The running max/min below make these bounds monotonic, so that the first and last
+        # basis function within the cutoff can be found with a binary search. If the widths 
+        # differ, this band may contain some basis functions beyond the cutoff; this is harmless.
+        radii = cutoff*np.abs(widths)
+        upper = np.maximum.accumulate(centers+radii)
+        lower = np.minimum.accumulate((centers-radii)[::-1])[::-1]
+        first = np.searchsorted(upper,inputs,side='left')
+        last  = np.searchsorted(lower,inputs,side='right') # Exclusive
+        
+        # Always include the nearest basis function, so that no row is empty
+        nearest = np.clip(np.searchsorted(centers,inputs),1,max(1,n_basis_functions-1))
+        if n_basis_functions>1:
+            left_is_nearer = (inputs-centers[nearest-1])<(centers[nearest]-inputs)
+            nearest[left_is_nearer] -= 1
+        else:
+            nearest[:] = 0
+        first = np.minimum(first,nearest)
+        last  = np.maximum(last,nearest+1)
+        
+        # Compute the activations for the band of each sample
+        n_active = last-first
+        band = np.arange(n_active.max())
+        in_band = band<np.reshape(n_active,(n_samples,1))
+        indices = np.minimum(np.reshape(first,(n_samples,1))+band,n_basis_functions-1)
+        values = np.exp(-0.5*np.square((np.reshape(inputs,(n_samples,1))-centers[indices])/widths[indices]))
+        values = values.astype(getFloatType(),copy=False)
+        values[~in_band] = 0.0
+        
+        if (normalized_basis_functions):
+            # Normalize the basis value; they should sum to 1.0 for each time step.
+            sum_values = values.sum(axis=1)
+            inactive = (sum_values==0.0)
+            if np.any(inactive):
+                # Apparently, no basis function was active. Set all in the band to same value
+                sum_values[inactive] = 1.0
+                values[inactive,:] = in_band[inactive,:]/np.reshape(n_active[inactive],(-1,1))
+            values /= np.reshape(sum_values,(n_samples,1))
+            
+        indptr = np.concatenate(([0],np.cumsum(n_active)))
+        return sparse.csr_matrix((values[in_band],indices[in_band],indptr),shape=(n_samples,n_basis_functions))
+        
+    def activationsSparseMultiDim(centers, widths, inputs, normalized_basis_functions=False, cutoff=3.0):
+        """Compute truncated activations for several input dimensions, with a k-d tree of the centers.
+        
+        The k-d tree finds the basis functions within the cutoff of each sample, so that only 
+        these are evaluated. For a grid, their number does not depend on the size of the grid.
+        centers and widths are n_basis_functions x n_dims, inputs is n_samples x n_dims. 
+        Returns a scipy.sparse.csr_matrix (n_samples x n_basis_functions).
+        """
+        (n_basis_functions, n_dims) = centers.shape
+        inputs = np.reshape(inputs,(-1,n_dims))
+        n_samples = inputs.shape[0]
+        
+        if normalized_basis_functions and n_basis_functions==1:
+            # See Gaussian.activations
+            return sparse.csr_matrix(np.ones([n_samples,1],dtype=getFloatType()))
+        
+        # Search in a space scaled by the largest width in each dimension. A basis function that
+        # is within the cutoff is also within the cutoff in this space, because its widths are 
+        # not larger. The other way around need not be true; these are removed below.
+        scale = np.abs(widths).max(axis=0)
+        centers_tree = cKDTree(centers/scale)
+        inputs_tree = cKDTree(inputs/scale)
+        pairs = inputs_tree.sparse_distance_matrix(centers_tree,cutoff,output_type='ndarray')
+        
+        # Always include the nearest basis function, so that no row is empty
+        (distances, nearest) = centers_tree.query(inputs/scale)
+        
+        # Sorted by sample, without duplicates
+        keys = np.unique(np.concatenate((pairs['i']*n_basis_functions+pairs['j'],np.arange(n_samples)*n_basis_functions+nearest)))
+        rows = keys//n_basis_functions
+        cols = keys%n_basis_functions
+        
+        square_distances = np.sum(np.square((inputs[rows]-centers[cols])/widths[cols]),axis=1)
+        keep = (square_distances<=cutoff*cutoff) | (cols==nearest[rows])
+        rows = rows[keep]
+        cols = cols[keep]
+        values = np.exp(-0.5*square_distances[keep]).astype(getFloatType(),copy=False)
+        
+        n_active = np.bincount(rows,minlength=n_samples)
+        if (normalized_basis_functions):
+            # Normalize the basis value; they should sum to 1.0 for each time step.
+            sum_values = np.bincount(rows,weights=values,minlength=n_samples)
+            inactive = (sum_values==0.0)
+            if np.any(inactive):
+                # Apparently, no basis function was active. Set all in the row to same value
+                values[inactive[rows]] = 1.0
+                sum_values[inactive] = n_active[inactive]
+            values /= sum_values[rows]
+            
+        indptr = np.concatenate(([0],np.cumsum(n_active)))
+        return sparse.csr_matrix((values,cols,indptr),shape=(n_samples,n_basis_functions))
+        
+    def cutoffFromActivationThreshold(threshold):
+        """Convert a minimum (unnormalized) activation into a cutoff in standard deviations.
+        
+        Solves exp(-0.5*cutoff^2) = threshold for the cutoff.
+        """
+        assert(0.0<threshold<1.0)
+        return np.sqrt(-2.0*np.log(threshold))
+
+
+class Cosine:
+    def activations(angular_frequencies, phases, inputs, out=None):
+        """Compute the activations (n_samples x n_basis_functions) of cosine basis functions.
+        
+        angular_frequencies is n_basis_functions x n_dims, phases is n_basis_functions.
+        If 'out' is passed, the activations are written into it (and it is returned).
+        """
+        n_basis_functions = phases.size
+        n_dims = angular_frequencies.shape[1]
+        
+        if out is None:
+            out = np.empty([np.size(inputs)//n_dims,n_basis_functions],dtype=getFloatType())
+        else:
+            assert(out.shape==(np.size(inputs)//n_dims,n_basis_functions))
+        # np.dot requires all arguments to have the type of 'out'
+        inputs = np.reshape(inputs,(-1,n_dims)).astype(out.dtype,copy=False)
+        angular_frequencies = angular_frequencies.astype(out.dtype,copy=False)
+        
+        # activation = cos(inputs*freqs^T + phases), for all samples and basis functions at once 
+        np.dot(inputs,angular_frequencies.T,out=out)
+        np.add(out,np.reshape(phases,(1,n_basis_functions)),out=out)
+        np.cos(out,out=out)
+        return out
@@ -16,8 +16,12 @@
 # along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
 
 import os, sys
+import numpy as np
+from scipy import sparse
 
 from dmpbbo_lib.functionapproximators.Parameterizable import Parameterizable
+from dmpbbo_lib.functionapproximators.ActivationCache import ActivationCache
+from dmpbbo_lib.precision import getFloatType
 
 class FunctionApproximator(Parameterizable):
     
@@ -29,3 +33,92 @@ class FunctionApproximator(Parameterizable):
         
     def isTrained(self):
         raise NotImplementedError('subclasses must override isTrained()!')
+        
+    def predictInPlace(self,inputs,outputs):
+        """Write the outputs of predict(inputs) into 'outputs', which has as many elements.
+        
+        This default implementation calls predict(). Subclasses may override it so that no 
+        arrays are allocated, e.g. for integrating a Dmp step by step.
+        """
+        outputs[...] = np.reshape(self.predict(inputs),outputs.shape)
+        
+    def getPredictBuffer(self,name,shape):
+        """Array of the float type, which predictInPlace() reuses between calls."""
+        if getattr(self,'predict_buffers_',None) is None:
+            self.predict_buffers_ = {}
+        buffer = self.predict_buffers_.get(name)
+        if buffer is None or buffer.shape!=shape or buffer.dtype!=getFloatType():
+            buffer = np.empty(shape,dtype=getFloatType())
+            self.predict_buffers_[name] = buffer
+        return buffer
+
+    def getParameterVectorSelectedJacobian(self,inputs):
+        """Derivative of the outputs w.r.t. the parameter vector (n_samples x n_outputs x n_parameters).
+        
+        This default implementation uses central differences. Subclasses whose outputs are 
+        linear in the parameters may override it with the exact derivative.
+        """
+        values = np.array(self.getParameterVectorSelected(),dtype=float)
+        n_samples = inputs.shape[0]
+        jacobian = np.zeros([n_samples,0,values.size])
+        for i_value in range(values.size):
+            step = 1e-6*max(1.0,abs(values[i_value]))
+            perturbed = values.copy()
+            perturbed[i_value] += step
+            self.setParameterVectorSelected(perturbed)
+            outputs_plus = np.reshape(self.predict(inputs),(n_samples,-1))
+            perturbed[i_value] -= 2*step
+            self.setParameterVectorSelected(perturbed)
+            outputs_minus = np.reshape(self.predict(inputs),(n_samples,-1))
+            if i_value==0:
+                jacobian = np.zeros([n_samples,outputs_plus.shape[1],values.size])
+            jacobian[:,:,i_value] = (outputs_plus-outputs_minus)/(2*step)
+        self.setParameterVectorSelected(values)
+        return jacobian
+        
+    def setParameterVectorBuffer(self,buffer):
+        """Copy the selected parameters into 'buffer', and let the model use it if possible.
+        
+        Returns True if the model now reads its parameters from the buffer (as a view), so that 
+        changing the buffer in place changes the model. This default implementation returns 
+        False; setParameterVectorSelected(buffer) must then be called after changing it.
+        """
+        buffer[:] = self.getParameterVectorSelected()
+        return False
+        
+    def getModelKey(self):
+        """Key of the part of the model that is not in the parameter vector.
+        
+        It changes when the model is (re)trained, but not when the parameter vector is set. This
+        default implementation hashes all model_* arrays that are not views of the parameters.
+        """
+        values = self.getParameterVectorSelected()
+        key = []
+        for name in sorted(vars(self)):
+            model = getattr(self,name)
+            if name.startswith('model_') and isinstance(model,np.ndarray) and not np.may_share_memory(model,values):
+                key.append((name,ActivationCache.hashArray(model)))
+        return tuple(key)
+        
+    def enableActivationCache(self,max_size=16):
+        """Cache the basis function activations for the 'max_size' most recently used inputs."""
+        self.activation_cache_ = ActivationCache(max_size)
+        
+    def disableActivationCache(self):
+        self.activation_cache_ = None
+
+
+def linearParameterJacobian(activations, parameters_shape):
+    """Jacobian of outputs that are the activations times the parameters (n_basis_functions, or n_basis_functions x n_outputs).
+    
+    The parameters of each output are consecutive in the parameter vector, see for instance 
+    FunctionApproximatorRBFN.getParameterVectorSelected, so the Jacobian is block-diagonal.
+    """
+    if sparse.issparse(activations):
+        activations = activations.toarray()
+    (n_samples, n_basis_functions) = activations.shape
+    n_outputs = 1 if len(parameters_shape)==1 else parameters_shape[1]
+    jacobian = np.zeros([n_samples,n_outputs,n_basis_functions*n_outputs])
+    for i_output in range(n_outputs):
+        jacobian[:,i_output,i_output*n_basis_functions:(i_output+1)*n_basis_functions] = activations
+    return jacobian
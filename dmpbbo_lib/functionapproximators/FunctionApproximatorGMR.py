@@ -0,0 +1,340 @@
+# This file is part of DmpBbo, a set of libraries and programs for the
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import warnings
+import numpy as np
+
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib.precision import asFloatType
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
+
+class FunctionApproximatorGMR(FunctionApproximator):
+    """Gaussian Mixture Regression.
+
+    A Gaussian mixture model is fit to the joint [inputs targets] data with expectation-maximization,
+    and the outputs are the mean of the distribution of the targets, conditioned on the inputs.
+    All steps are vectorized over the samples and the Gaussians.
+    """
+
+    def __init__(self,number_of_gaussians, max_iterations=50):
+
+        self.meta_number_of_gaussians_ = number_of_gaussians
+        self.meta_max_iterations_ = max_iterations
+
+        # The Gaussians in the joint [inputs targets] space
+        self.model_priors_ = None # n_gaussians
+        self.model_means_ = None  # n_gaussians x n_dims
+        self.model_covars_ = None # n_gaussians x n_dims x n_dims
+        self.model_n_dims_in_ = None
+        self.model_n_observations_ = 0
+        # Whether the targets passed to train were 1D, in which case predict also returns 1D
+        self.targets_1d_ = False
+        self.is_trained_ = False
+
+    def train(self,inputs,targets):
+        data = self.getData(inputs,targets)
+
+        # Initialize the Gaussians
+        n_gaussians = self.meta_number_of_gaussians_
+        if self.model_n_dims_in_==1:
+            (priors, means, covars) = FunctionApproximatorGMR.firstDimSlicingInit(data,n_gaussians)
+        else:
+            (priors, means, covars) = FunctionApproximatorGMR.kMeansInit(data,n_gaussians)
+
+        (priors, means, covars, n_observations) = FunctionApproximatorGMR.expectationMaximization(data,priors,means,covars,self.meta_max_iterations_)
+        self.setModel(priors,means,covars,n_observations)
+
+    def trainIncremental(self,inputs,targets):
+        """Update the model with new data, without retraining on the data seen so far.
+
+        The current model summarizes the previous observations, see expectationMaximization().
+        """
+        if not self.is_trained_:
+            self.train(inputs,targets)
+            return
+
+        n_dims_in = self.model_n_dims_in_
+        data = self.getData(inputs,targets)
+        assert(self.model_n_dims_in_==n_dims_in)
+        assert(data.shape[1]==self.model_means_.shape[1])
+
+        (priors, means, covars, n_observations) = FunctionApproximatorGMR.expectationMaximization(data,
+            self.model_priors_,self.model_means_,self.model_covars_,self.meta_max_iterations_,self.model_n_observations_)
+        self.setModel(priors,means,covars,n_observations)
+
+    def getData(self,inputs,targets):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        self.targets_1d_ = (targets.ndim==1)
+        if targets.ndim==1:
+            targets = np.atleast_2d(targets).T
+        self.model_n_dims_in_ = inputs.shape[1]
+        return np.column_stack((inputs,targets))
+
+    def setModel(self,priors,means,covars,n_observations):
+        self.model_priors_ = priors
+        self.model_means_ = means
+        self.model_covars_ = covars
+        self.model_n_observations_ = n_observations
+        self.cacheModel()
+        self.is_trained_ = True
+
+    def cacheModel(self):
+        """Precompute all the terms in predict() that depend only on the covariance matrices."""
+        n_in = self.model_n_dims_in_
+        covars_x = self.model_covars_[:,:n_in,:n_in]
+        covars_y = self.model_covars_[:,n_in:,n_in:]
+        covars_y_x = self.model_covars_[:,n_in:,:n_in]
+
+        self.model_covars_x_inv_ = np.linalg.inv(covars_x)
+        (sign, log_det) = np.linalg.slogdet(covars_x)
+        # log( prior / sqrt( (2pi)^n_in * |covar_x| ) )
+        self.model_log_scales_ = np.log(self.model_priors_) - 0.5*(n_in*np.log(2*np.pi) + log_det)
+        # C_y_x * inv(C_x), i.e. the slopes of the local linear models
+        self.model_regressions_ = np.matmul(covars_y_x,self.model_covars_x_inv_)
+        # diag( C_y - C_y_x * inv(C_x) * C_x_y )
+        conditional = covars_y - np.matmul(self.model_regressions_,np.swapaxes(covars_y_x,1,2))
+        self.model_conditional_variances_ = np.diagonal(conditional,axis1=1,axis2=2)
+
+    def getResponsibilities(self,inputs):
+        """Normalized probability that each Gaussian generated each input (n_samples x n_gaussians).
+
+        Also returns inv(C_x)*(input-mu_x) for each sample and Gaussian (n_samples x n_gaussians x n_dims_in).
+        """
+        n_in = self.model_n_dims_in_
+        diffs = inputs[:,np.newaxis,:] - self.model_means_[np.newaxis,:,:n_in]
+        covars_times_diffs = np.einsum('kij,nkj->nki',self.model_covars_x_inv_,diffs)
+        log_probabilities = self.model_log_scales_ - 0.5*np.sum(diffs*covars_times_diffs,axis=2)
+        # Subtract the maximum before exponentiating, for numerical stability far from all Gaussians
+        log_probabilities -= log_probabilities.max(axis=1,keepdims=True)
+        probabilities = np.exp(log_probabilities)
+        probabilities /= probabilities.sum(axis=1,keepdims=True)
+        return (probabilities, diffs, covars_times_diffs)
+
+    def predictDetails(self,inputs):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        (probabilities, diffs, covars_times_diffs) = self.getResponsibilities(inputs)
+        # mu_y + C_y_x * inv(C_x) * (input-mu_x), for each sample and Gaussian
+        means_y = self.model_means_[:,self.model_n_dims_in_:]
+        local_outputs = means_y[np.newaxis,:,:] + np.einsum('koi,nki->nko',self.model_regressions_,diffs)
+        return (probabilities, covars_times_diffs, local_outputs)
+
+    def formatOutputs(self,outputs):
+        # The model is evaluated in double precision, but returned in the float type
+        outputs = asFloatType(outputs)
+        if self.targets_1d_:
+            return outputs[:,0]
+        return outputs
+
+    def predict(self,inputs):
+        (probabilities, covars_times_diffs, local_outputs) = self.predictDetails(inputs)
+        outputs = np.einsum('nk,nko->no',probabilities,local_outputs)
+        return self.formatOutputs(outputs)
+
+    def predictVariance(self,inputs):
+        (probabilities, covars_times_diffs, local_outputs) = self.predictDetails(inputs)
+        variances = np.square(probabilities).dot(self.model_conditional_variances_)
+        # Avoid slightly negative variances due to numerical issues
+        variances = np.maximum(variances,0.0)
+        return self.formatOutputs(variances)
+
+    def predictDot(self,inputs):
+        """Return the outputs, and their derivative w.r.t. the inputs.
+
+        The derivative is n_samples x n_outputs x n_dims_in, or n_samples x n_outputs for 1D inputs.
+        """
+        (probabilities, covars_times_diffs, local_outputs) = self.predictDetails(inputs)
+        outputs = np.einsum('nk,nko->no',probabilities,local_outputs)
+
+        # Derivative of the normalized probabilities: p_k * ( g_k - sum_j p_j*g_j ),
+        # with g_k = -inv(C_x)*(input-mu_x) the derivative of the log of the pdf of Gaussian k
+        gradients = -covars_times_diffs
+        gradients -= np.einsum('nk,nki->ni',probabilities,gradients)[:,np.newaxis,:]
+        probabilities_dot = probabilities[:,:,np.newaxis]*gradients
+
+        outputs_dot = np.einsum('nki,nko->noi',probabilities_dot,local_outputs)
+        outputs_dot += np.einsum('nk,koi->noi',probabilities,self.model_regressions_)
+
+        if self.model_n_dims_in_==1:
+            outputs_dot = outputs_dot[:,:,0]
+        return (self.formatOutputs(outputs), self.formatOutputs(outputs_dot))
+
+    def toUnifiedModel(self):
+        # The normalized activations are the responsibilities. The priors include the scaling 
+        # of the pdfs, so that they are exactly the same.
+        n_in = self.model_n_dims_in_
+        means_x = self.model_means_[:,:n_in]
+        covars_x = self.model_covars_[:,:n_in,:n_in]
+        priors = np.exp(self.model_log_scales_)
+        # The line segments are mu_y + C_y_x * inv(C_x) * (input-mu_x)
+        slopes = np.swapaxes(self.model_regressions_,1,2)
+        offsets = self.model_means_[:,n_in:] - np.einsum('koi,ki->ko',self.model_regressions_,means_x)
+        if self.targets_1d_:
+            slopes = slopes[:,:,0]
+            offsets = offsets[:,0]
+        normalized_basis_functions = True
+        return UnifiedModel(means_x,covars_x,offsets,slopes,priors,normalized_basis_functions)
+
+    def isTrained(self):
+        return self.is_trained_
+
+    def getParameterVectorSelected(self):
+        # The means of the Gaussians in the output space, output after output
+        if self.is_trained_:
+            return self.model_means_[:,self.model_n_dims_in_:].ravel(order='F')
+        else:
+            warnings.warn('FunctionApproximatorGMR is not trained.')
+            return [];
+
+    def setParameterVectorSelected(self,values):
+        # The cached terms depend only on the covariance matrices, so they remain valid
+        if self.is_trained_:
+            assert(len(values)==self.getParameterVectorSelectedSize())
+            n_in = self.model_n_dims_in_
+            shape = self.model_means_[:,n_in:].shape
+            self.model_means_[:,n_in:] = np.reshape(values,shape,order='F')
+        else:
+            warnings.warn('FunctionApproximatorGMR is not trained.')
+
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # The outputs are linear in the output means, with the responsibilities as coefficients
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        (probabilities, diffs, covars_times_diffs) = self.getResponsibilities(inputs)
+        return linearParameterJacobian(probabilities,self.model_means_[:,self.model_n_dims_in_:].shape)
+
+    def getParameterVectorSelectedSize(self):
+        return self.model_means_[:,self.model_n_dims_in_:].size
+
+    def getCovariances(data,assign,means):
+        """Covariance matrix of the data assigned to each Gaussian (n_gaussians x n_dims x n_dims)."""
+        n_gaussians = means.shape[0]
+        one_hot = np.zeros([data.shape[0],n_gaussians])
+        one_hot[np.arange(data.shape[0]),assign] = 1.0
+        n_points = np.maximum(one_hot.sum(axis=0),1.0)
+        diffs = data - means[assign]
+        covars = np.einsum('nk,ni,nj->kij',one_hot,diffs,diffs)/n_points[:,np.newaxis,np.newaxis]
+        covars += 1e-5*np.eye(data.shape[1])
+        return covars
+
+    def firstDimSlicingInit(data,n_gaussians):
+        """Initialize the Gaussians on equally sized slices along the first dimension of the data."""
+        first_dim = data[:,0]
+        min_val = first_dim.min()
+        max_val = first_dim.max()
+        if max_val>min_val:
+            assign = ((first_dim-min_val)/(max_val-min_val)*n_gaussians).astype(int)
+        else:
+            # A constant first dimension cannot be sliced, so slice the samples in their order
+            assign = np.arange(data.shape[0])*n_gaussians//data.shape[0]
+        assign = np.minimum(assign,n_gaussians-1)
+
+        n_points = np.bincount(assign,minlength=n_gaussians)
+        means = np.zeros([n_gaussians,data.shape[1]])
+        np.add.at(means,assign,data)
+        means /= np.maximum(n_points,1)[:,np.newaxis]
+
+        covars = FunctionApproximatorGMR.getCovariances(data,assign,means)
+        priors = np.full(n_gaussians,1.0/n_gaussians)
+        return (priors, means, covars)
+
+    def kMeansInit(data,n_gaussians,n_max_iter=1000):
+        """Initialize the Gaussians with k-means clustering, using the Mahalanobis distance of the data."""
+        # The pseudo-inverse, because targets may be linearly dependent on the inputs
+        data_cov_inv = np.linalg.pinv(np.atleast_2d(np.cov(data,rowvar=False,bias=True)))
+
+        means = data[np.random.permutation(data.shape[0])[:n_gaussians]].copy()
+        assign = None
+        for i_iter in range(n_max_iter):
+            diffs = data[:,np.newaxis,:] - means[np.newaxis,:,:]
+            distances = np.einsum('nki,ij,nkj->nk',diffs,data_cov_inv,diffs)
+            new_assign = np.argmin(distances,axis=1)
+            if assign is not None and np.array_equal(new_assign,assign):
+                break
+            assign = new_assign
+
+            n_points = np.bincount(assign,minlength=n_gaussians)
+            sums = np.zeros(means.shape)
+            np.add.at(sums,assign,data)
+            # Gaussians without any points keep their previous center
+            has_points = n_points>0
+            means[has_points] = sums[has_points]/n_points[has_points,np.newaxis]
+
+        covars = FunctionApproximatorGMR.getCovariances(data,assign,means)
+        priors = np.full(n_gaussians,1.0/n_gaussians)
+        return (priors, means, covars)
+
+    def logNormalPdf(data,means,covars):
+        """Log of the pdf of each Gaussian, for each sample (n_samples x n_gaussians)."""
+        chol = np.linalg.cholesky(covars)
+        diffs = data[np.newaxis,:,:] - means[:,np.newaxis,:]
+        # Solve L*z = (x-mu) for all Gaussians at once, so that z'*z = (x-mu)'*inv(C)*(x-mu)
+        solved = np.linalg.solve(chol,np.swapaxes(diffs,1,2))
+        mahalanobis = np.sum(np.square(solved),axis=1)
+        log_det = 2.0*np.sum(np.log(np.diagonal(chol,axis1=1,axis2=2)),axis=1)
+        log_scale = -0.5*(data.shape[1]*np.log(2*np.pi) + log_det)
+        return (log_scale[:,np.newaxis] - 0.5*mahalanobis).T
+
+    def expectationMaximization(data,priors,means,covars,n_max_iter=50,n_observations_prev=0):
+        """Fit a Gaussian mixture model to the data with expectation-maximization.
+
+        If n_observations_prev>0, priors, means and covars are taken to summarize that many previous
+        observations, and are updated incrementally with the new data, rather than refit to it.
+        Returns (priors, means, covars, n_observations), with n_observations including the previous ones.
+        """
+        n_observations = data.shape[0]
+        regularization = 1e-5*np.eye(data.shape[1])
+
+        # Expected number of previous observations generated by each Gaussian
+        priors_prev = priors
+        means_prev = means
+        # The regularization was added to the covariances when they were estimated, and is added
+        # again below, so remove it from the previous ones to avoid adding it with each update
+        covars_prev = covars - regularization
+        E_prev = priors_prev*n_observations_prev
+
+        old_loglik = None
+        for i_iter in range(n_max_iter):
+
+            # E-step
+            log_assign = np.log(priors) + FunctionApproximatorGMR.logNormalPdf(data,means,covars)
+            log_max = log_assign.max(axis=1,keepdims=True)
+            assign = np.exp(log_assign-log_max)
+            assign_sum = assign.sum(axis=1,keepdims=True)
+            loglik = np.mean(np.log(assign_sum)+log_max)
+            assign /= assign_sum
+
+            if old_loglik is not None and abs(loglik/old_loglik-1) < 1e-8:
+                break
+            old_loglik = loglik
+
+            # M-step
+            E = assign.sum(axis=0)
+            E_total = np.maximum(E + E_prev,np.finfo(float).tiny)
+            means = (E_prev[:,np.newaxis]*means_prev + assign.T.dot(data))/E_total[:,np.newaxis]
+            priors = (E + E_prev)/(n_observations + n_observations_prev)
+
+            diffs = data[np.newaxis,:,:] - means[:,np.newaxis,:]
+            covars = np.einsum('nk,kni,knj->kij',assign,diffs,diffs)
+            if n_observations_prev>0:
+                diffs_prev = means_prev - means
+                covars += E_prev[:,np.newaxis,np.newaxis]*(covars_prev + np.einsum('ki,kj->kij',diffs_prev,diffs_prev))
+            covars /= E_total[:,np.newaxis,np.newaxis]
+            covars += regularization
+
+        return (priors, means, covars, n_observations + n_observations_prev)
@@ -0,0 +1,166 @@
+# This file is part of DmpBbo, a set of libraries and programs for the
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import warnings
+import numpy as np
+from scipy import linalg
+
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib.precision import asFloatType
+from dmpbbo_lib.functionapproximators.ActivationCache import ActivationCache
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
+
+class FunctionApproximatorGPR(FunctionApproximator):
+    """Gaussian process regression with a squared exponential kernel.
+
+    The Cholesky factor of the kernel (gram) matrix is cached. Adding a training point extends it
+    in O(n^2), and changing the targets (the parameter vector) only requires two triangular solves.
+    """
+
+    def __init__(self,maximum_covariance, length, noise_variance=1e-8):
+
+        self.meta_maximum_covariance_ = maximum_covariance
+        # Length scale of the kernel, either a scalar or one for each input dimension
+        self.meta_length_ = length
+        # Added to the diagonal of the gram matrix, which is required for duplicate inputs
+        self.meta_noise_variance_ = noise_variance
+
+        self.model_train_inputs_ = None
+        self.model_train_targets_ = None
+        self.model_cholesky_ = None # Lower triangular, gram = L*L^T
+        self.model_weights_ = None  # inv(gram)*targets
+        self.is_trained_ = False
+
+    def train(self,inputs,targets):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        assert(inputs.shape[0]==targets.shape[0])
+
+        gram = self.kernelActivations(inputs,inputs)
+        gram[np.diag_indices_from(gram)] += self.meta_noise_variance_
+
+        self.model_train_inputs_ = inputs.copy()
+        self.model_cholesky_ = linalg.cholesky(gram,lower=True)
+        self.setTargets(targets)
+        self.is_trained_ = True
+
+    def addTrainingPoint(self,input,target):
+        """Add one training point, by extending the cached Cholesky factor in O(n^2)."""
+        if not self.is_trained_:
+            self.train(np.reshape(input,(1,-1)),np.reshape(target,(1,)+np.shape(target)))
+            return
+
+        input = np.reshape(input,(1,-1))
+        n = self.model_train_inputs_.shape[0]
+
+        # With gram = [ G k; k^T kappa ], its Cholesky factor is [ L 0; l^T d ], with
+        # L*l = k and d = sqrt(kappa - l^T*l)
+        k = self.kernelActivations(self.model_train_inputs_,input)[:,0]
+        kappa = self.meta_maximum_covariance_ + self.meta_noise_variance_
+        l = linalg.solve_triangular(self.model_cholesky_,k,lower=True)
+        d = np.sqrt(max(kappa - l.dot(l),self.meta_noise_variance_))
+
+        cholesky = np.zeros([n+1,n+1])
+        cholesky[:n,:n] = self.model_cholesky_
+        cholesky[n,:n] = l
+        cholesky[n,n] = d
+        self.model_cholesky_ = cholesky
+
+        self.model_train_inputs_ = np.vstack((self.model_train_inputs_,input))
+        targets = self.model_train_targets_
+        target = np.reshape(target,(1,)+targets.shape[1:])
+        self.setTargets(np.concatenate((targets,target)))
+
+    def setTargets(self,targets):
+        # The targets are stored in column-major order, see FunctionApproximatorRBFN.train
+        self.model_train_targets_ = np.asfortranarray(targets,dtype=float)
+        self.model_weights_ = linalg.cho_solve((self.model_cholesky_,True),self.model_train_targets_)
+
+    def kernelActivations(self,inputs,centers):
+        """Squared exponential kernel between inputs and centers (n_inputs x n_centers)."""
+        sigmas = np.broadcast_to(self.meta_length_,(inputs.shape[1],))
+        scaled_inputs = inputs/sigmas
+        scaled_centers = centers/sigmas
+        # |x-c|^2 = |x|^2 + |c|^2 - 2x^T*c, for all inputs and centers at once
+        square_distances = np.sum(np.square(scaled_inputs),axis=1)[:,np.newaxis] + np.sum(np.square(scaled_centers),axis=1)[np.newaxis,:]
+        square_distances -= 2.0*scaled_inputs.dot(scaled_centers.T)
+        np.maximum(square_distances,0.0,out=square_distances)
+        return self.meta_maximum_covariance_*np.exp(-0.5*square_distances)
+
+    def predict(self,inputs):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        ks = self.kernelActivations(inputs,self.model_train_inputs_)
+        # The model is evaluated in double precision, but returned in the float type
+        return asFloatType(ks.dot(self.model_weights_))
+
+    def predictVariance(self,inputs):
+        (outputs, variances) = self.predictMeanAndVariance(inputs)
+        return variances
+
+    def predictMeanAndVariance(self,inputs):
+        """Return the mean and variance of the outputs for all inputs, computing the kernel only once."""
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        ks = self.kernelActivations(inputs,self.model_train_inputs_)
+        outputs = ks.dot(self.model_weights_)
+        # k^T*inv(gram)*k = |inv(L)*k|^2, for all inputs with one triangular solve
+        solved = linalg.solve_triangular(self.model_cholesky_,ks.T,lower=True)
+        variances = self.meta_maximum_covariance_ - np.sum(np.square(solved),axis=0)
+        variances = np.maximum(variances,0.0)
+        return (asFloatType(outputs), asFloatType(variances))
+
+    def toUnifiedModel(self):
+        # One basis function for each training input, all with the same widths
+        centers = self.model_train_inputs_
+        widths = np.broadcast_to(self.meta_length_,centers.shape)
+        weights = self.meta_maximum_covariance_*self.model_weights_
+        normalized_basis_functions = False
+        return UnifiedModel(centers,widths,weights,None,None,normalized_basis_functions)
+
+    def isTrained(self):
+        return self.is_trained_
+
+    # The parameter vector consists of the training targets. The outputs are linear in them.
+    def getParameterVectorSelected(self):
+        if self.is_trained_:
+            return self.model_train_targets_.ravel(order='F')
+        else:
+            warnings.warn('FunctionApproximatorGPR is not trained.')
+            return [];
+
+    def setParameterVectorSelected(self,values):
+        if self.is_trained_:
+            assert(len(values)==self.getParameterVectorSelectedSize())
+            self.setTargets(np.reshape(values,self.model_train_targets_.shape,order='F'))
+        else:
+            warnings.warn('FunctionApproximatorGPR is not trained.')
+
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # outputs = k^T*inv(gram)*targets, so the coefficients of the targets are k^T*inv(gram)
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        ks = self.kernelActivations(inputs,self.model_train_inputs_)
+        coefficients = linalg.cho_solve((self.model_cholesky_,True),ks.T).T
+        return linearParameterJacobian(coefficients,self.model_train_targets_.shape)
+
+    def getModelKey(self):
+        # The weights follow from the targets (the parameter vector), the rest from the inputs
+        return (ActivationCache.hashArray(self.model_train_inputs_),self.meta_maximum_covariance_,ActivationCache.hashArray(np.asarray(self.meta_length_)),self.meta_noise_variance_)
+
+    def getParameterVectorSelectedSize(self):
+        return self.model_train_targets_.size
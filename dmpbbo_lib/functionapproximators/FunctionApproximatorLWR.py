@@ -16,18 +16,29 @@
 # along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
 
 import os, sys
+import numpy as np
+from scipy import sparse
 
-from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib import kernels
+from dmpbbo_lib.precision import getFloatType, asFloatType
 from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
 from dmpbbo_lib.functionapproximators.leastSquares import *
 
 class FunctionApproximatorLWR(FunctionApproximator):
     
-    def __init__(self,n_basis_functions_per_dim, intersection_height=0.5, regularization=0.0):
+    def __init__(self,n_basis_functions_per_dim, intersection_height=0.5, regularization=0.0, activation_cutoff=None, forgetting_factor=1.0):
         
         self.meta_n_basis_functions_per_dim_ = n_basis_functions_per_dim
         self.meta_intersection_height_ = intersection_height
         self.meta_regularization_ = regularization
+        # If not None, activations beyond this many standard deviations are truncated to 0,
+        # and the activations are computed and used as a sparse matrix
+        self.meta_activation_cutoff_ = activation_cutoff
+        # In trainIncremental, the statistics of previous samples are multiplied by this 
+        # factor for each new sample. 1.0 means that nothing is forgotten.
+        self.meta_forgetting_factor_ = forgetting_factor
 
         self.model_centers_ = None
         self.model_widths_ = None
@@ -35,60 +46,113 @@ class FunctionApproximatorLWR(FunctionApproximator):
         self.model_offsets_ = None
         self.is_trained_ = False
         
+        # See enableActivationCache()
+        self.activation_cache_ = None
+        
+        # Weighted sufficient statistics (X^T W X, X^T W y) of the regressions of all kernels, 
+        # accumulated over all the samples seen so far. See trainIncremental()
+        self.statistics_ = None
+        
     def train(self,inputs,targets):
 
         
         # Determine the centers and widths of the basis functions, given the range of the input data
-        min_vals = np.asscalar(inputs.min(axis=0))
-        max_vals = np.asscalar(inputs.max(axis=0))
+        min_vals = inputs.min(axis=0)
+        max_vals = inputs.max(axis=0)
+        self.initializeBasisFunctions(min_vals,max_vals)
+        
+        # Fit the model to these samples only. The statistics are kept, so that training can 
+        # continue with trainIncremental(), but the regressions are solved with all the samples, 
+        # which is numerically more stable (see weightedLeastSquaresFactorization)
+        activations = self.getActivations(inputs)
+        forgetting_factor = 1.0
+        self.accumulateStatistics(inputs,targets,forgetting_factor,activations)
+        use_offset = True
+        betas = weightedLeastSquaresBatch(inputs,targets,activations,use_offset,self.meta_regularization_)
+        self.setBetas(betas)
+        
+    def trainIncremental(self,inputs,targets):
+        """Update the model with new samples, without storing the samples seen so far.
+        
+        Each call adds the samples to the sufficient statistics of the regressions, whose size 
+        does not depend on the number of samples. The basis functions must first be placed in 
+        the range of all inputs with initializeBasisFunctions() (or train()), as the inputs of 
+        the first samples usually do not cover it, e.g. for samples ordered in time.
+        """
+        if self.model_centers_ is None:
+            raise RuntimeError('Call initializeBasisFunctions(min_vals,max_vals) with the range of all inputs before trainIncremental().')
+        self.accumulateStatistics(inputs,targets,self.meta_forgetting_factor_)
+        self.solveStatistics()
+        
+    def initializeBasisFunctions(self,min_vals,max_vals):
+        """Place the basis functions on a grid in the range of inputs, and reset the statistics."""
 
-        n_centers = self.meta_n_basis_functions_per_dim_
-        centers = np.linspace(min_vals,max_vals,n_centers)
-        widths = np.ones(n_centers)
-        if n_centers>1:
-            # Consider two neighbouring basis functions, exp(-0.5(x-c0)^2/w^2) and exp(-0.5(x-c1)^2/w^2)
-            # Assuming the widths are the same for both, they are certain to intersect at x = 0.5(c0+c1)
-            # And we want the activation at x to be 'intersection'. So
-            #            y = exp(-0.5(x-c0)^2/w^2)
-            # intersection = exp(-0.5((0.5(c0+c1))-c0)^2/w^2)
-            # intersection = exp(-0.5((0.5*c1-0.5*c0)^2/w^2))
-            # intersection = exp(-0.5((0.5*(c1-c0))^2/w^2))
-            # intersection = exp(-0.5(0.25*(c1-c0)^2/w^2))
-            # intersection = exp(-0.125((c1-c0)^2/w^2))
-            #            w = sqrt((c1-c0)^2/-8*ln(intersection))
-            for cc in range(n_centers-1):
-                w = np.sqrt(np.square(centers[cc+1]-centers[cc])/(-8*np.log(self.meta_intersection_height_)))
-                widths[cc] = w
-                
-            widths[n_centers-1] = widths[n_centers-2]
-       
-        # Get the activations of the basis functions 
+        (centers, widths) = Gaussian.centersAndWidths(min_vals,max_vals,self.meta_n_basis_functions_per_dim_,self.meta_intersection_height_)
+        
         self.model_widths_ = widths
         self.model_centers_ = centers
-        activations = self.getActivations(inputs)
-
-        # Parameters for the weighted least squares regressions
+        if self.activation_cache_ is not None:
+            # The model has changed, so the cached activations are stale
+            self.activation_cache_.clear()
+        self.statistics_ = None
+        
+    def accumulateStatistics(self,inputs,targets,forgetting_factor,activations=None):
+        if activations is None:
+            activations = self.getActivations(inputs)
+        
+        n_samples = activations.shape[0]
+        if forgetting_factor<1.0:
+            # The last sample has weight 1, the one before forgetting_factor, etc.
+            decay = np.power(forgetting_factor,np.arange(n_samples-1,-1,-1))
+            if sparse.issparse(activations):
+                activations = activations.multiply(decay[:,np.newaxis]).tocsr()
+            else:
+                activations = activations*decay[:,np.newaxis]
+        
+        # The statistics of the weighted least squares regressions of all kernels, at once.
+        # The kernel activations are the weights of the samples in each regression.
         use_offset = True
-        n_kernels = n_centers
-        n_betas = 1
-        if (use_offset):
-            n_betas += 1
-        betas = np.ones([n_kernels,n_betas])
-        
-        # Perform one weighted least squares regression for each kernel
-        reg = self.meta_regularization_
-        for i_kernel in range(n_kernels):
-            weights = activations[:,i_kernel]
-            beta = weightedLeastSquares(inputs,targets,weights,use_offset,reg)
-            betas[i_kernel,:] = beta.T
-    
-        self.model_offsets_ = betas[:,-1]
-        self.model_slopes_ = betas[:,0:-1]
+        (XtWX, XtWy) = weightedLeastSquaresStatistics(inputs,targets,activations,use_offset)
+        if self.statistics_ is not None:
+            # The previous samples are forgotten once for each new sample
+            previous_decay = forgetting_factor**n_samples
+            XtWX += previous_decay*self.statistics_[0]
+            XtWy += previous_decay*self.statistics_[1]
+        self.statistics_ = (XtWX, XtWy)
+        self.targets_1d_ = (np.ndim(targets)==1)
+        
+    def solveStatistics(self):
+        # If targets has multiple columns (n_samples x n_outputs), all outputs share the same 
+        # activations, and are solved for at once.
+        (XtWX, XtWy) = self.statistics_
+        betas = leastSquaresFromStatistics(XtWX,XtWy,self.meta_regularization_)
+        if self.targets_1d_:
+            betas = betas[:,:,0]
+        self.setBetas(betas)
+        
+    def setBetas(self,betas):
+        # The offsets are n_kernels (or n_kernels x n_outputs). They are stored in column-major
+        # order, so that the parameter vector (see getParameterVectorSelected) contains the 
+        # offsets of each output consecutively, without copying.
+        self.model_offsets_ = np.asfortranarray(betas[:,-1])
+        # The slopes are n_kernels x n_dims (x n_outputs), with the slopes for each input dimension
+        # stored contiguously, so that predictInPlace does not need temporary copies of them.
+        self.model_slopes_ = np.moveaxis(np.ascontiguousarray(np.moveaxis(betas[:,0:-1],1,0)),0,1)
         self.is_trained_ = True
 
     def getActivations(self,inputs):
+        if self.activation_cache_ is not None:
+            model = (self.model_centers_, self.model_widths_, self.meta_activation_cutoff_, np.dtype(getFloatType()).str)
+            return self.activation_cache_.getActivations(inputs,self.computeActivations,model)
+        return self.computeActivations(inputs)
+        
+    def computeActivations(self,inputs):
         normalize_activations = True
-        activations = Gaussian.activations(self.model_centers_,self.model_widths_,inputs,normalize_activations)
+        if self.meta_activation_cutoff_ is None:
+            activations = Gaussian.activations(self.model_centers_,self.model_widths_,inputs,normalize_activations)
+        else:
+            cutoff = self.meta_activation_cutoff_
+            activations = Gaussian.activationsSparse(self.model_centers_,self.model_widths_,inputs,normalize_activations,cutoff)
         return activations
         
     def getLines(self,inputs):
@@ -96,17 +160,8 @@ class FunctionApproximatorLWR(FunctionApproximator):
             # Otherwise matrix multiplication below will not work
             inputs = np.atleast_2d(inputs).T
             
-        slopes = self.model_slopes_ 
-        offsets = self.model_offsets_
-        
-        # Compute the line segments
-        n_lines = self.model_offsets_.size 
-        n_samples = inputs.shape[0]
-        lines = np.zeros([n_samples,n_lines])
-        for i_line in range(n_lines):
-            # Apparently, not everybody has python3.5 installed, so don't use @
-            #lines[:,i_line] =  inputs@slopes[i_line,:].T + offsets[i_line]
-            lines[:,i_line] = np.dot(inputs,slopes[i_line,:].T) + offsets[i_line]
+        # Compute the line segments (n_samples x n_lines, or n_samples x n_lines x n_outputs)
+        lines = np.tensordot(inputs,self.model_slopes_,axes=([1],[1])) + self.model_offsets_
 
         return lines
 
@@ -118,23 +173,75 @@ class FunctionApproximatorLWR(FunctionApproximator):
         if inputs.ndim==1:
             # Otherwise matrix multiplication below will not work
             inputs = np.atleast_2d(inputs).T
-            
-        lines = self.getLines(inputs)
+        inputs = asFloatType(inputs)
+        
+        if kernels.useCompiled() and self.activation_cache_ is None and self.meta_activation_cutoff_ is None:
+            # The weighted sum of the lines, without storing the activations or the lines
+            n_basis_functions = self.model_offsets_.shape[0]
+            centers = np.reshape(self.model_centers_,(n_basis_functions,-1))
+            widths = np.reshape(self.model_widths_,(n_basis_functions,-1))
+            offsets = np.reshape(self.model_offsets_,(n_basis_functions,-1))
+            slopes = np.reshape(self.model_slopes_,(n_basis_functions,inputs.shape[1],-1))
+            outputs = kernels.lwrPredict(centers,widths,offsets,slopes,inputs)
+            return asFloatType(np.reshape(outputs,(inputs.shape[0],)+self.model_offsets_.shape[1:]))
             
         # Weight the values for each line with the normalized basis function activations  
         # Get the activations of the basis functions 
         activations = self.getActivations(inputs)
         
-        outputs = (lines*activations).sum(axis=1)
+        # The weighted sum of the lines is
+        #   sum_b a_b*(x*slopes_b + offsets_b) = A*offsets + sum_i (A.*x_i)*slopes_i
+        # so that the lines themselves need not be computed. This works for dense and sparse
+        # activations, and for all outputs at once.
+        outputs = activations.dot(asFloatType(self.model_offsets_))
+        for i_dim in range(inputs.shape[1]):
+            if sparse.issparse(activations):
+                weighted_activations = activations.multiply(inputs[:,i_dim:i_dim+1]).tocsr()
+            else:
+                weighted_activations = activations*inputs[:,i_dim:i_dim+1]
+            outputs += weighted_activations.dot(asFloatType(self.model_slopes_[:,i_dim]))
         return outputs
         
+    def predictInPlace(self,inputs,outputs):
+        offsets = self.model_offsets_
+        if self.activation_cache_ is not None or self.meta_activation_cutoff_ is not None or not outputs.flags.c_contiguous or not outputs.dtype==offsets.dtype==np.dtype(getFloatType()):
+            # Cached or sparse activations, conversions to the float type, or non-contiguous
+            # outputs require temporary arrays
+            FunctionApproximator.predictInPlace(self,inputs,outputs)
+            return
+            
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        (n_samples, n_dims) = inputs.shape
+        n_basis_functions = offsets.shape[0]
+        offsets = np.reshape(offsets,(n_basis_functions,-1))
+        slopes = np.reshape(self.model_slopes_,(n_basis_functions,n_dims,-1))
+        outputs = np.reshape(outputs,(n_samples,-1))
+        
+        activations = self.getPredictBuffer('activations',(n_samples,n_basis_functions))
+        Gaussian.activations(self.model_centers_,self.model_widths_,inputs,True,out=activations)
+        # The lines of all basis functions for one sample, and the term of one input dimension
+        lines = self.getPredictBuffer('lines',offsets.shape)
+        line_terms = self.getPredictBuffer('line_terms',offsets.shape)
+        for i_sample in range(n_samples):
+            np.copyto(lines,offsets)
+            for i_dim in range(n_dims):
+                np.multiply(slopes[:,i_dim,:],inputs[i_sample,i_dim],out=line_terms)
+                np.add(lines,line_terms,out=lines)
+            np.dot(activations[i_sample],lines,out=outputs[i_sample])
+        
+    def toUnifiedModel(self):
+        # The activations of the unified model are not truncated, see meta_activation_cutoff_
+        normalized_basis_functions = True
+        return UnifiedModel(self.model_centers_,self.model_widths_,self.model_offsets_,self.model_slopes_,None,normalized_basis_functions)
+        
     def isTrained(self):
         return self.is_trained_
 
 
     def getParameterVectorSelected(self):
         if self.is_trained_:
-            return self.model_offsets_
+            return self.model_offsets_.ravel(order='F')
         else:
             warning('FunctionApproximatorLWR is not trained.')
             return [];
@@ -142,9 +249,19 @@ class FunctionApproximatorLWR(FunctionApproximator):
     def setParameterVectorSelected(self,values):
         if self.is_trained_:
             assert(len(values)==self.getParameterVectorSelectedSize())
-            self.model_offsets_ = values
+            self.model_offsets_ = np.reshape(values,self.model_offsets_.shape,order='F')
         else:
             warning('FunctionApproximatorLWR is not trained.')
 
+    def setParameterVectorBuffer(self,buffer):
+        # The offsets become a view into the buffer. This relies on their column-major order.
+        buffer[:] = self.getParameterVectorSelected()
+        self.model_offsets_ = np.reshape(buffer,self.model_offsets_.shape,order='F')
+        return True
+            
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # The outputs are linear in the offsets, with the activations as coefficients
+        return linearParameterJacobian(self.getActivations(inputs),self.model_offsets_.shape)
+        
     def getParameterVectorSelectedSize(self):
-        return len(self.model_offsets_)
+        return self.model_offsets_.size
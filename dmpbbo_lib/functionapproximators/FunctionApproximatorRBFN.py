@@ -16,68 +16,118 @@
 # along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
 
 import os, sys
+import numpy as np
 
-from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib import kernels
+from dmpbbo_lib.precision import getFloatType, asFloatType
 from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
 from dmpbbo_lib.functionapproximators.leastSquares import *
 
 class FunctionApproximatorRBFN(FunctionApproximator):
     
-    def __init__(self,n_basis_functions_per_dim, intersection_height=0.7, regularization=0.0):
+    def __init__(self,n_basis_functions_per_dim, intersection_height=0.7, regularization=0.0, activation_cutoff=None):
         
         self.meta_n_basis_functions_per_dim_ = n_basis_functions_per_dim
         self.meta_intersection_height_ = intersection_height
         self.meta_regularization_ = regularization
+        # If not None, activations beyond this many standard deviations are truncated to 0,
+        # and the activations are computed and used as a sparse matrix
+        self.meta_activation_cutoff_ = activation_cutoff
 
         self.model_centers_ = None
         self.model_widths_ = None
         self.model_weights_ = None
         self.is_trained_ = False
         
+        # See enableActivationCache()
+        self.activation_cache_ = None
+        
+        # Sufficient statistics (X^T X, X^T y) of the regression, accumulated over all the 
+        # samples seen so far. See trainIncremental()
+        self.statistics_ = None
+        
     def train(self,inputs,targets):
 
         
         # Determine the centers and widths of the basis functions, given the range of the input data
-        min_vals = np.asscalar(inputs.min(axis=0))
-        max_vals = np.asscalar(inputs.max(axis=0))
-
-        n_centers = self.meta_n_basis_functions_per_dim_
-        centers = np.linspace(min_vals,max_vals,n_centers)
-        widths = np.ones(n_centers)
-        if n_centers>1:
-            # Consider two neighbouring basis functions, exp(-0.5(x-c0)^2/w^2) and exp(-0.5(x-c1)^2/w^2)
-            # Assuming the widths are the same for both, they are certain to intersect at x = 0.5(c0+c1)
-            # And we want the activation at x to be 'intersection'. So
-            #            y = exp(-0.5(x-c0)^2/w^2)
-            # intersection = exp(-0.5((0.5(c0+c1))-c0)^2/w^2)
-            # intersection = exp(-0.5((0.5*c1-0.5*c0)^2/w^2))
-            # intersection = exp(-0.5((0.5*(c1-c0))^2/w^2))
-            # intersection = exp(-0.5(0.25*(c1-c0)^2/w^2))
-            # intersection = exp(-0.125((c1-c0)^2/w^2))
-            #            w = sqrt((c1-c0)^2/-8*ln(intersection))
-            for cc in range(n_centers-1):
-                w = np.sqrt(np.square(centers[cc+1]-centers[cc])/(-8*np.log(self.meta_intersection_height_)))
-                widths[cc] = w
-                
-            widths[n_centers-1] = widths[n_centers-2]
+        min_vals = inputs.min(axis=0)
+        max_vals = inputs.max(axis=0)
+        self.initializeBasisFunctions(min_vals,max_vals)
        
         # Get the activations of the basis functions 
-        self.model_widths_ = widths
-        self.model_centers_ = centers
         activations = self.getActivations(inputs)
-
         
-        # Perform one weighted least squares regression for each kernel
+        # The statistics are kept, so that training can continue with trainIncremental()
+        self.accumulateStatistics(activations,targets)
+        
+        # Perform one least squares regression for the weights of all kernels
+        # If targets has multiple columns (n_samples x n_outputs), all outputs share the same 
+        # activations, and are solved for at once.
         use_offset = False
         reg = self.meta_regularization_
-        self.model_weights_ = leastSquares(activations,targets,use_offset,reg)
+        weights = leastSquares(activations,targets,use_offset,reg)
+        # The weights are n_kernels (or n_kernels x n_outputs). They are stored in column-major
+        # order, so that the parameter vector (see getParameterVectorSelected) contains the 
+        # weights of each output consecutively, without copying.
+        self.model_weights_ = np.asfortranarray(weights)
     
         self.is_trained_ = True
         
+    def trainIncremental(self,inputs,targets):
+        """Update the model with new samples, without storing the samples seen so far.
+        
+        As in FunctionApproximatorLWR.trainIncremental, the basis functions must first be placed 
+        in the range of all inputs with initializeBasisFunctions() (or train()).
+        """
+        if self.model_centers_ is None:
+            raise RuntimeError('Call initializeBasisFunctions(min_vals,max_vals) with the range of all inputs before trainIncremental().')
+            
+        activations = self.getActivations(inputs)
+        self.accumulateStatistics(activations,targets)
+        
+        (XtX, Xty) = self.statistics_
+        weights = leastSquaresFromStatistics(XtX,Xty,self.meta_regularization_)
+        if np.ndim(targets)==1:
+            weights = weights[:,0]
+        # Column-major order, see train()
+        self.model_weights_ = np.asfortranarray(weights)
+        self.is_trained_ = True
+        
+    def accumulateStatistics(self,activations,targets):
+        # The activations are the inputs of the regression, with all samples weighted equally
+        use_offset = False
+        (XtX, Xty) = weightedLeastSquaresStatistics(activations,targets,np.ones(activations.shape[0]),use_offset)
+        if self.statistics_ is not None:
+            XtX += self.statistics_[0]
+            Xty += self.statistics_[1]
+        self.statistics_ = (XtX, Xty)
+        
+
+    def initializeBasisFunctions(self,min_vals,max_vals):
+        """Place the basis functions on a grid in the range of inputs."""
+        (centers, widths) = Gaussian.centersAndWidths(min_vals,max_vals,self.meta_n_basis_functions_per_dim_,self.meta_intersection_height_)
+        self.model_widths_ = widths
+        self.model_centers_ = centers
+        if self.activation_cache_ is not None:
+            # The model has changed, so the cached activations are stale
+            self.activation_cache_.clear()
+        self.statistics_ = None
 
     def getActivations(self,inputs):
+        if self.activation_cache_ is not None:
+            model = (self.model_centers_, self.model_widths_, self.meta_activation_cutoff_, np.dtype(getFloatType()).str)
+            return self.activation_cache_.getActivations(inputs,self.computeActivations,model)
+        return self.computeActivations(inputs)
+        
+    def computeActivations(self,inputs):
         normalize_activations = False
-        activations = Gaussian.activations(self.model_centers_,self.model_widths_,inputs,normalize_activations)
+        if self.meta_activation_cutoff_ is None:
+            activations = Gaussian.activations(self.model_centers_,self.model_widths_,inputs,normalize_activations)
+        else:
+            cutoff = self.meta_activation_cutoff_
+            activations = Gaussian.activationsSparse(self.model_centers_,self.model_widths_,inputs,normalize_activations,cutoff)
         return activations
 
     def predict(self,inputs):
@@ -88,25 +138,50 @@ class FunctionApproximatorRBFN(FunctionApproximator):
             # Otherwise matrix multiplication below will not work
             inputs = np.atleast_2d(inputs).T
             
+        if kernels.useCompiled() and self.activation_cache_ is None and self.meta_activation_cutoff_ is None:
+            # The weighted sum of the activations, without storing them
+            n_basis_functions = self.model_weights_.shape[0]
+            centers = np.reshape(self.model_centers_,(n_basis_functions,-1))
+            widths = np.reshape(self.model_widths_,(n_basis_functions,-1))
+            weights = np.reshape(self.model_weights_,(n_basis_functions,-1))
+            outputs = kernels.rbfnPredict(centers,widths,weights,np.reshape(inputs,(inputs.shape[0],-1)))
+            return asFloatType(np.reshape(outputs,(inputs.shape[0],)+self.model_weights_.shape[1:]))
+            
         # Get the activations of the basis functions 
         activations = self.getActivations(inputs)
-        n_basis_functions = activations.shape[1]
         
-        outputs = activations
-        for ii in range(n_basis_functions):
-            outputs[:,ii] = outputs[:,ii]*self.model_weights_[ii]
-            
-        outputs = outputs.sum(axis=1)
+        # Weighted sum of the activations. This works for dense and sparse activations, and 
+        # for all outputs at once.
+        outputs = activations.dot(asFloatType(self.model_weights_))
             
         return outputs
         
+    def predictInPlace(self,inputs,outputs):
+        weights = self.model_weights_
+        if self.activation_cache_ is not None or self.meta_activation_cutoff_ is not None or not outputs.flags.c_contiguous or not outputs.dtype==weights.dtype==np.dtype(getFloatType()):
+            # Cached or sparse activations, conversions to the float type, or non-contiguous
+            # outputs require temporary arrays
+            FunctionApproximator.predictInPlace(self,inputs,outputs)
+            return
+            
+        # The activations are computed in a buffer, and the weighted sum directly in 'outputs'
+        n_basis_functions = weights.shape[0]
+        activations = self.getPredictBuffer('activations',(inputs.shape[0],n_basis_functions))
+        Gaussian.activations(self.model_centers_,self.model_widths_,inputs,False,out=activations)
+        np.dot(activations,np.reshape(weights,(n_basis_functions,-1)),out=np.reshape(outputs,(inputs.shape[0],-1)))
+
+    def toUnifiedModel(self):
+        # The activations of the unified model are not truncated, see meta_activation_cutoff_
+        normalized_basis_functions = False
+        return UnifiedModel(self.model_centers_,self.model_widths_,self.model_weights_,None,None,normalized_basis_functions)
+        
     def isTrained(self):
         return self.is_trained_
 
 
     def getParameterVectorSelected(self):
         if self.is_trained_:
-            return self.model_weights_
+            return self.model_weights_.ravel(order='F')
         else:
             warning('FunctionApproximatorRBFN is not trained.')
             return [];
@@ -114,9 +189,19 @@ class FunctionApproximatorRBFN(FunctionApproximator):
     def setParameterVectorSelected(self,values):
         if self.is_trained_:
             assert(len(values)==self.getParameterVectorSelectedSize())
-            self.model_weights_ = values
+            self.model_weights_ = np.reshape(values,self.model_weights_.shape,order='F')
         else:
             warning('FunctionApproximatorRBFN is not trained.')
             
+    def setParameterVectorBuffer(self,buffer):
+        # The weights become a view into the buffer. This relies on their column-major order.
+        buffer[:] = self.getParameterVectorSelected()
+        self.model_weights_ = np.reshape(buffer,self.model_weights_.shape,order='F')
+        return True
+            
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # The outputs are linear in the weights, with the activations as coefficients
+        return linearParameterJacobian(self.getActivations(inputs),self.model_weights_.shape)
+        
     def getParameterVectorSelectedSize(self):
-        return len(self.model_weights_)
+        return self.model_weights_.size
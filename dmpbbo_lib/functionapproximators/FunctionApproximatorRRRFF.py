@@ -0,0 +1,131 @@
+# This file is part of DmpBbo, a set of libraries and programs for the
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import os, sys
+import numpy as np
+
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib.precision import getFloatType, asFloatType
+from dmpbbo_lib.functionapproximators.ActivationCache import ActivationCache
+from dmpbbo_lib.functionapproximators.BasisFunction import Cosine
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
+from dmpbbo_lib.functionapproximators.leastSquares import *
+
+class FunctionApproximatorRRRFF(FunctionApproximator):
+    """Ridge regression on random Fourier features.
+
+    The cost of training and prediction is linear in the number of samples and features.
+    """
+
+    def __init__(self,number_of_basis_functions, regularization=0.0, gamma=1.0, seed=None):
+
+        self.meta_number_of_basis_functions_ = number_of_basis_functions
+        self.meta_regularization_ = regularization
+        # Standard deviation of the angular frequencies is sqrt(2*gamma)
+        self.meta_gamma_ = gamma
+        # Seed for generating the features. With the same seed, the features (and thus the
+        # trained model) are the same in all processes.
+        self.meta_seed_ = seed
+
+        self.model_angular_frequencies_ = None
+        self.model_phases_ = None
+        self.model_weights_ = None
+        self.is_trained_ = False
+
+        # Factorization of the least squares problem for the last training inputs. Retraining
+        # on the same inputs (with other targets or regularization) reuses it.
+        self.factorization_ = None
+        self.factorization_key_ = None
+
+        # See enableActivationCache()
+        self.activation_cache_ = None
+
+    def train(self,inputs,targets):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        n_dims = inputs.shape[1]
+
+        # Generate the random features (only once, so that retraining uses the same features)
+        if self.model_angular_frequencies_ is None or self.model_angular_frequencies_.shape[1]!=n_dims:
+            n_cos = self.meta_number_of_basis_functions_
+            rng = np.random.RandomState(self.meta_seed_)
+            self.model_angular_frequencies_ = rng.normal(0.0,np.sqrt(2*self.meta_gamma_),[n_cos,n_dims])
+            self.model_phases_ = rng.uniform(0.0,2*np.pi,n_cos)
+            self.factorization_ = None
+            if self.activation_cache_ is not None:
+                # The model has changed, so the cached activations are stale
+                self.activation_cache_.clear()
+
+        key = (ActivationCache.hashArray(inputs),ActivationCache.hashArray(self.model_angular_frequencies_),ActivationCache.hashArray(self.model_phases_))
+        if self.factorization_ is None or key!=self.factorization_key_:
+            activations = self.getActivations(inputs)
+            use_offset = False
+            self.factorization_ = weightedLeastSquaresFactorization(activations,np.ones(inputs.shape[0]),use_offset)
+            self.factorization_key_ = key
+
+        weights = self.factorization_.solve(targets,self.meta_regularization_)
+        # The weights are stored in column-major order, see FunctionApproximatorRBFN.train
+        self.model_weights_ = np.asfortranarray(weights)
+        self.is_trained_ = True
+
+    def getActivations(self,inputs):
+        if self.activation_cache_ is not None:
+            model = (self.model_angular_frequencies_, self.model_phases_, np.dtype(getFloatType()).str)
+            return self.activation_cache_.getActivations(inputs,self.computeActivations,model)
+        return self.computeActivations(inputs)
+
+    def computeActivations(self,inputs):
+        return Cosine.activations(self.model_angular_frequencies_,self.model_phases_,inputs)
+
+    def predict(self,inputs):
+        if inputs.ndim==1:
+            inputs = np.atleast_2d(inputs).T
+        activations = self.getActivations(inputs)
+        return activations.dot(asFloatType(self.model_weights_))
+
+    def toUnifiedModel(self):
+        return UnifiedModel(self.model_phases_,self.model_angular_frequencies_,self.model_weights_,cosine_basis_functions=True)
+
+    def isTrained(self):
+        return self.is_trained_
+
+    def getParameterVectorSelected(self):
+        if self.is_trained_:
+            return self.model_weights_.ravel(order='F')
+        else:
+            warning('FunctionApproximatorRRRFF is not trained.')
+            return [];
+
+    def setParameterVectorSelected(self,values):
+        if self.is_trained_:
+            assert(len(values)==self.getParameterVectorSelectedSize())
+            self.model_weights_ = np.reshape(values,self.model_weights_.shape,order='F')
+        else:
+            warning('FunctionApproximatorRRRFF is not trained.')
+
+    def setParameterVectorBuffer(self,buffer):
+        # The weights become a view into the buffer. This relies on their column-major order.
+        buffer[:] = self.getParameterVectorSelected()
+        self.model_weights_ = np.reshape(buffer,self.model_weights_.shape,order='F')
+        return True
+            
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # The outputs are linear in the weights, with the activations as coefficients
+        return linearParameterJacobian(self.getActivations(inputs),self.model_weights_.shape)
+
+    def getParameterVectorSelectedSize(self):
+        return self.model_weights_.size
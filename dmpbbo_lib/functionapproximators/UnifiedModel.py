@@ -0,0 +1,148 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import os, sys
+import numpy as np
+
+from dmpbbo_lib.functionapproximators.FunctionApproximator import FunctionApproximator, linearParameterJacobian
+from dmpbbo_lib.precision import getFloatType, asFloatType
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian, Cosine
+
+class UnifiedModel(FunctionApproximator):
+    """Model that can represent the models of all other function approximators.
+    
+    The output is the sum of line segments, weighted with the activations of the basis functions
+      outputs = sum_b a_b(x)*(x*slopes_b + offsets_b)
+    The function approximators are converted with their toUnifiedModel() method, so that one
+    prediction routine serves all of them. As in the C++ UnifiedModel, the parameter vector 
+    consists of the offsets (the weights for RBFN, GPR and RRRFF).
+    """
+    
+    def __init__(self, centers, widths, offsets, slopes=None, priors=None, normalized_basis_functions=False, cosine_basis_functions=False):
+        """Construct the unified model.
+        
+        centers is n_basis_functions x n_dims. widths is n_basis_functions x n_dims (standard 
+        deviations along each dimension), or n_basis_functions x n_dims x n_dims (covariance 
+        matrices). offsets is n_basis_functions (x n_outputs), and slopes is 
+        n_basis_functions x n_dims (x n_outputs), or None for constant segments. The activation
+        of each basis function is multiplied with its prior before normalization.
+        For cosine basis functions, centers are the phases and widths the angular frequencies,
+        see BasisFunction.Cosine.
+        """
+        n_basis_functions = np.shape(offsets)[0]
+        self.cosine_basis_functions_ = cosine_basis_functions
+        self.normalized_basis_functions_ = normalized_basis_functions
+        if cosine_basis_functions:
+            self.centers_ = np.reshape(centers,n_basis_functions)
+            self.widths_ = np.reshape(widths,(n_basis_functions,-1))
+        else:
+            self.centers_ = np.reshape(centers,(n_basis_functions,-1))
+            if np.ndim(widths)==3:
+                self.widths_ = np.array(widths,dtype=float)
+            else:
+                self.widths_ = np.reshape(widths,(n_basis_functions,-1))
+        self.priors_ = np.ones(n_basis_functions) if priors is None else np.array(priors,dtype=float)
+        
+        # Stored in column-major order, see FunctionApproximatorRBFN.train
+        self.offsets_ = np.array(offsets,dtype=float,order='F')
+        self.slopes_ = None if slopes is None else np.array(slopes,dtype=float)
+        
+        self.cacheModel()
+        
+        # See enableActivationCache()
+        self.activation_cache_ = None
+        
+    def cacheModel(self):
+        # Gaussian basis functions with covariance matrices or priors are computed with the 
+        # inverse covariance matrices, in the log domain. Otherwise, Gaussian.activations is used.
+        self.covars_inv_ = None
+        if self.cosine_basis_functions_:
+            return
+        if self.widths_.ndim==3:
+            self.covars_inv_ = np.linalg.inv(self.widths_)
+        elif np.any(self.priors_!=1.0):
+            self.covars_inv_ = np.einsum('bi,ij->bij',1.0/np.square(self.widths_),np.eye(self.widths_.shape[1]))
+        with np.errstate(divide='ignore'):
+            self.log_priors_ = np.log(self.priors_)
+        
+    def train(self,inputs,targets):
+        raise NotImplementedError('A UnifiedModel cannot be trained, but is converted from a trained function approximator with toUnifiedModel()')
+        
+    def getActivations(self,inputs):
+        if self.activation_cache_ is not None:
+            model = (self.centers_, self.widths_, self.priors_, self.normalized_basis_functions_, np.dtype(getFloatType()).str)
+            return self.activation_cache_.getActivations(inputs,self.computeActivations,model)
+        return self.computeActivations(inputs)
+        
+    def computeActivations(self,inputs):
+        """Compute the activations of the basis functions (n_samples x n_basis_functions)."""
+        if self.cosine_basis_functions_:
+            return Cosine.activations(self.widths_,self.centers_,inputs)
+        if self.covars_inv_ is None:
+            return Gaussian.activations(self.centers_,self.widths_,inputs,self.normalized_basis_functions_)
+        
+        # log(prior*exp(-0.5*(x-mu)*Sigma^-1*(x-mu))), for all samples and basis functions at once
+        n_dims = self.centers_.shape[1]
+        diffs = np.reshape(inputs,(-1,1,n_dims)) - self.centers_[np.newaxis,:,:]
+        log_activations = self.log_priors_ - 0.5*np.einsum('nbi,bij,nbj->nb',diffs,self.covars_inv_,diffs)
+        if self.normalized_basis_functions_:
+            # Subtracting the maximum does not change the normalized activations, but avoids
+            # that they all underflow far away from the centers
+            log_activations -= log_activations.max(axis=1,keepdims=True)
+            activations = np.exp(log_activations)
+            activations /= activations.sum(axis=1,keepdims=True)
+        else:
+            activations = np.exp(log_activations)
+        return asFloatType(activations)
+
+    def predict(self,inputs):
+        if inputs.ndim==1:
+            # Otherwise matrix multiplication below will not work
+            inputs = np.atleast_2d(inputs).T
+        inputs = asFloatType(inputs)
+            
+        activations = self.getActivations(inputs)
+        
+        # The weighted sum of the lines, see FunctionApproximatorLWR.predict
+        outputs = activations.dot(asFloatType(self.offsets_))
+        if self.slopes_ is not None:
+            for i_dim in range(inputs.shape[1]):
+                outputs += (activations*inputs[:,i_dim:i_dim+1]).dot(asFloatType(self.slopes_[:,i_dim]))
+        return outputs
+        
+    def isTrained(self):
+        return True
+
+    def getParameterVectorSelected(self):
+        return self.offsets_.ravel(order='F')
+        
+    def setParameterVectorSelected(self,values):
+        assert(len(values)==self.getParameterVectorSelectedSize())
+        self.offsets_ = np.reshape(values,self.offsets_.shape,order='F')
+            
+    def setParameterVectorBuffer(self,buffer):
+        # The offsets become a view into the buffer. This relies on their column-major order.
+        buffer[:] = self.getParameterVectorSelected()
+        self.offsets_ = np.reshape(buffer,self.offsets_.shape,order='F')
+        return True
+            
+    def getParameterVectorSelectedJacobian(self,inputs):
+        # The outputs are linear in the offsets, with the activations as coefficients
+        return linearParameterJacobian(self.getActivations(inputs),self.offsets_.shape)
+        
+    def getParameterVectorSelectedSize(self):
+        return self.offsets_.size
@@ -16,57 +16,242 @@
 # along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
+from scipy import sparse
 
-def leastSquares(inputs, targets, use_offset=True, regularization=0.0):
+def leastSquares(inputs, targets, use_offset=True, regularization=0.0, return_factorization=False):
     weights = np.ones(inputs.shape[0])
-    return weightedLeastSquares(inputs,targets,weights,use_offset,regularization)
+    return weightedLeastSquares(inputs,targets,weights,use_offset,regularization,return_factorization)
 
 
-def weightedLeastSquares(inputs, targets, weights, use_offset=True, regularization=0.0):
+def weightedLeastSquares(inputs, targets, weights, use_offset=True, regularization=0.0, return_factorization=False):
+    """Weighted (and regularized) linear least squares.
     
+    'targets' may have several columns, which are then all solved for at once. If 
+    return_factorization is True, (betas, factorization) is returned; the factorization 
+    can be used to solve for other targets or regularization values.
+    """
+    factorization = weightedLeastSquaresFactorization(inputs,weights,use_offset)
+    betas = factorization.solve(targets,regularization)
+    if return_factorization:
+        return (betas, factorization)
+    return betas
+
+
+def weightedLeastSquaresBatch(inputs, targets, weights, use_offset=True, regularization=0.0, return_factorization=False):
+    """Perform one weighted least squares regression for each column of 'weights' in one go.
     
-    # Inputs and targets should have "n_samples" rows. If not, transpose them.
-    #if inputs.shape[0] != n_samples and inputs.shape[1] == n_samples:
-    #    inputs = inputs.T
-    #if targets.shape[0] != n_samples and targets.shape[1] == n_samples:
-    #    targets = targets.T
-    #
-    #assert(n_samples == weights.shape[0])
-    #assert(n_samples == targets.shape[0])
-    
-    n_samples = weights.size
+    'weights' is n_samples x n_regressions (dense or sparse), e.g. the activations of all the
+    kernels in LWR. Returns the betas as an n_regressions x n_betas matrix.
+    """
+    return weightedLeastSquares(inputs,targets,weights,use_offset,regularization,return_factorization)
+
 
-    # Make the design matrix
-    if use_offset:
-        # Add a column with 1s
-        X = np.column_stack((inputs,np.ones(n_samples)))
+def weightedLeastSquaresFactorization(inputs, weights, use_offset=True):
+    """Factorize a weighted least squares problem, without solving it yet.
+    
+    'weights' is either a vector (n_samples), or a matrix (n_samples x n_regressions) with
+    the weights of several regressions on the same inputs (e.g. one for each kernel in LWR).
+    The rows of X are scaled with sqrt(weights), and the singular value decomposition of the
+    result is taken. This avoids both the n_samples x n_samples weight matrix, and squaring the 
+    condition number (as X^T W X would). Only for a sparse design matrix (with one vector of 
+    weights), X^T W X is decomposed instead, so that the memory remains proportional to the 
+    number of non-zero entries.
+    """
+    
+    n_samples = weights.shape[0]
+    X = designMatrix(inputs,n_samples,use_offset)
+    
+    if weights.ndim==1:
+        if sparse.issparse(X):
+            XtWX = weightedGramMatrix(X,weights)
+            (eigenvalues, V) = np.linalg.eigh(XtWX)
+            return LeastSquaresFactorization(X,weights,V,eigenvalues)
+        
+        sqrt_weights = np.sqrt(weights)
+        (U, singular_values, Vt) = np.linalg.svd(X*np.reshape(sqrt_weights,(n_samples,1)),full_matrices=False)
+        return LeastSquaresFactorization(X,weights,Vt.T,singular_values,U,sqrt_weights)
         
+    # Several regressions. The singular value decompositions of sqrt(W_r) X are computed for 
+    # all regressions r at once, with only the rows with non-zero weights for sparse weights.
+    if sparse.issparse(X):
+        X = X.toarray()
+    (rows, sqrt_weights) = sqrtWeightsPerRegression(weights,X.shape[1])
+    X_rows = X[np.newaxis,:,:] if rows is None else X[rows]
+    (U, singular_values, Vt) = np.linalg.svd(sqrt_weights[:,:,np.newaxis]*X_rows,full_matrices=False)
+    return LeastSquaresFactorization(X,weights,np.swapaxes(Vt,-1,-2),singular_values,U,sqrt_weights,rows)
+    
+    
+def sqrtWeightsPerRegression(weights, min_rows=1):
+    """Return (rows, sqrt_weights), with the rows of the samples and the sqrt of their weights for each regression.
+    
+    For dense weights (n_samples x n_regressions), rows is None, and sqrt_weights is 
+    n_regressions x n_samples. For sparse weights, only the samples with non-zero weights are 
+    kept, and both are n_regressions x n_rows. Regressions with fewer samples are padded with 
+    weights of 0 (for row 0), and n_rows is at least min_rows.
+    """
+    if not sparse.issparse(weights):
+        return (None, np.sqrt(np.asarray(weights,dtype=np.float64)).T)
+        
+    weights = sparse.csc_matrix(weights,dtype=np.float64)
+    n_regressions = weights.shape[1]
+    counts = np.diff(weights.indptr)
+    n_rows = max(counts.max(),min_rows)
+    # Position of each non-zero weight within its regression
+    regressions = np.repeat(np.arange(n_regressions),counts)
+    positions = np.arange(weights.nnz) - np.repeat(weights.indptr[:-1],counts)
+    rows = np.zeros([n_regressions,n_rows],dtype=int)
+    sqrt_weights = np.zeros([n_regressions,n_rows])
+    rows[regressions,positions] = weights.indices
+    sqrt_weights[regressions,positions] = np.sqrt(weights.data)
+    return (rows, sqrt_weights)
+    
+
+def designMatrix(inputs, n_samples, use_offset=True):
+    # Least squares problems are always solved in double precision, see dmpbbo_lib.precision
+    if sparse.issparse(inputs):
+        X = sparse.csr_matrix(inputs,dtype=np.float64)
+        if use_offset:
+            X = sparse.hstack((X,np.ones([n_samples,1])),format='csr')
     else:
-        X = inputs
-  
-  
-    # Weights matrix
-    W = np.diagflat(weights)
+        X = np.reshape(np.asarray(inputs,dtype=np.float64),(n_samples,-1))
+        if use_offset:
+            # Add a column with 1s
+            X = np.column_stack((X,np.ones(n_samples)))
+    return X
+    
+
+def weightedGramMatrix(X, weights):
+    """Compute X^T W X (n_betas x n_betas, or n_regressions x n_betas x n_betas for 2D weights)."""
+    (n_samples, n_betas) = X.shape
+    if weights.ndim==1:
+        if sparse.issparse(X):
+            # Sparse design matrix, e.g. truncated basis function activations
+            return X.T.dot(X.multiply(np.reshape(weights,(n_samples,1)))).toarray()
+        return X.T.dot(X*np.reshape(weights,(n_samples,1)))
+        
+    # Several regressions. The entries of X^T W X are weighted sums over the samples of 
+    # the products X_i*X_j. For all regressions together, these sums are a single 
+    # matrix product with the weights.
+    if sparse.issparse(X):
+        X = X.toarray()
+    products_XX = np.reshape(X[:,:,np.newaxis]*X[:,np.newaxis,:],(n_samples,n_betas*n_betas))
+    return np.reshape(weights.T.dot(products_XX),(-1,n_betas,n_betas))
     
+
+def weightedCrossProducts(X, targets_2d, weights):
+    """Compute X^T W y (n_betas x n_targets, or n_regressions x n_betas x n_targets for 2D weights)."""
+    n_samples = X.shape[0]
+    if weights.ndim==1:
+        return X.T.dot(targets_2d*np.reshape(weights,(n_samples,1)))
+        
+    # X^T W y for all regressions is a single matrix product with the weights
+    if sparse.issparse(X):
+        X = X.toarray()
+    n_betas = X.shape[1]
+    n_targets = targets_2d.shape[1]
+    products_Xy = np.reshape(X[:,:,np.newaxis]*targets_2d[:,np.newaxis,:],(n_samples,n_betas*n_targets))
+    return np.reshape(weights.T.dot(products_Xy),(-1,n_betas,n_targets))
     
-    # Regularization matrix
-    n_input_dims = 1
-    if X.ndim>1:
-        n_input_dims = X.shape[1]
-    Gamma = regularization*np.identity(n_input_dims) 
 
-    if X.ndim==1:
-        # Otherwise matrix multiplication below will not work
-        X = np.atleast_2d(X).T
+def weightedLeastSquaresStatistics(inputs, targets, weights, use_offset=True):
+    """Compute the sufficient statistics (X^T W X, X^T W y) of a weighted least squares problem.
+    
+    The statistics of several chunks of data can be summed, and then solved with 
+    leastSquaresFromStatistics, without ever having all the data in memory. X^T W y is
+    n_betas x n_targets (or n_regressions x n_betas x n_targets for 2D weights).
+    """
+    n_samples = weights.shape[0]
+    X = designMatrix(inputs,n_samples,use_offset)
+    targets_2d = np.reshape(targets,(n_samples,-1))
+    return (weightedGramMatrix(X,weights), weightedCrossProducts(X,targets_2d,weights))
+    
 
-    # Least squares then is a one-liner
-    # Apparently, not everybody has python3.5 installed, so don't use @
-    # betas = np.linalg.inv(X.T@W@X + Gamma)@X.T@W@targets
-    # In python<=3.4, it is not a one-liner
-    to_invert = np.dot(np.dot(X.T,W),X) + Gamma
-    betas = np.dot(np.dot(np.dot(np.linalg.inv(to_invert),X.T),W),targets)
+def leastSquaresFromStatistics(XtWX, XtWy, regularization=0.0):
+    """Solve for the betas (n_betas x n_targets, or n_regressions x n_betas x n_targets), given the sufficient statistics.
     
-    return betas
+    As only X^T W X is available, the condition number of the problem is squared. Use 
+    weightedLeastSquares when all samples are available.
+    """
+    (eigenvalues, V) = np.linalg.eigh(XtWX)
+    factorization = LeastSquaresFactorization(None,None,V,eigenvalues)
+    return factorization.solveStatistics(XtWy,regularization)
+    
+
+class LeastSquaresFactorization:
+    """Factorization of a weighted least squares problem, see weightedLeastSquaresFactorization.
+    
+    With the factorization X^T W X = V diag(s^2) V^T, the regularized solution is 
+      betas = V diag(1/(s^2+regularization)) V^T X^T W y
+    which only requires a few small matrix products for new targets or regularization.
+    With the singular value decomposition sqrt(W) X = U diag(s) V^T, V^T X^T W y is computed 
+    as diag(s) U^T sqrt(W) y instead. For several regressions, U is n_regressions x n_rows x 
+    n_betas, and the rows and sqrt_weights are those of sqrtWeightsPerRegression().
+    """
+    
+    def __init__(self, X, weights, V, squared_singular_values, U=None, sqrt_weights=None, rows=None):
+        self.X_ = X
+        self.weights_ = weights
+        self.V_ = V
+        if U is None:
+            self.singular_values_ = None
+            self.squared_singular_values_ = np.maximum(squared_singular_values,0.0)
+        else:
+            # From a singular value decomposition of sqrt(W) X = U diag(s) V^T
+            self.singular_values_ = squared_singular_values
+            self.squared_singular_values_ = np.square(squared_singular_values)
+        self.U_ = U
+        self.sqrt_weights_ = sqrt_weights
+        self.rows_ = rows
+        
+    def n_betas(self):
+        return self.V_.shape[-1]
+        
+    def solve(self, targets, regularization=0.0):
+        """Solve for the betas, given the targets (n_samples, or n_samples x n_targets)."""
+        n_samples = self.weights_.shape[0]
+        targets_2d = np.reshape(targets,(n_samples,-1))
+        (s2, valid) = self.regularizedSquaredSingularValues(regularization)
+        
+        if self.U_ is not None:
+            # V^T X^T W y = diag(s) U^T sqrt(W) y
+            if self.sqrt_weights_.ndim==1:
+                weighted_targets = targets_2d*np.reshape(self.sqrt_weights_,(n_samples,1))
+            else:
+                targets_rows = targets_2d if self.rows_ is None else targets_2d[self.rows_]
+                weighted_targets = self.sqrt_weights_[:,:,np.newaxis]*targets_rows
+            projected = np.matmul(np.swapaxes(self.U_,-1,-2),weighted_targets)
+            scale = np.where(valid,self.singular_values_/s2,0.0)
+        else:
+            XtWy = weightedCrossProducts(self.X_,targets_2d,self.weights_)
+            return self.solveStatistics(XtWy,regularization,np.ndim(targets)==1)
+            
+        betas = np.matmul(self.V_,projected*scale[...,np.newaxis])
+        
+        if np.ndim(targets)==1:
+            betas = betas[...,0]
+        return betas
+        
+    def solveStatistics(self, XtWy, regularization=0.0, targets_1d=False):
+        """Solve for the betas, given X^T W y (n_betas x n_targets, or n_regressions x n_betas x n_targets)."""
+        (s2, valid) = self.regularizedSquaredSingularValues(regularization)
+        projected = np.matmul(np.swapaxes(self.V_,-1,-2),XtWy)
+        scale = np.where(valid,1.0/s2,0.0)
+        betas = np.matmul(self.V_,projected*scale[...,np.newaxis])
+        if targets_1d:
+            betas = betas[...,0]
+        return betas
+        
+    def regularizedSquaredSingularValues(self, regularization):
+        s2 = self.squared_singular_values_ + regularization
+        # Directions with (numerically) zero variance are left out, as in a pseudo-inverse. For 
+        # the singular values of sqrt(W) X, the tolerance is relative to s rather than to s^2.
+        relative_tol = self.n_betas()*np.finfo(float).eps
+        if self.singular_values_ is not None:
+            relative_tol = relative_tol**2
+        tol = np.max(s2,axis=-1,keepdims=True)*relative_tol
+        valid = s2>tol
+        s2 = np.where(valid,s2,1.0)
+        return (s2, valid)
 
 
 def linearPrediction(inputs,betas):
@@ -0,0 +1,153 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Search for the meta-parameters of LWR and RBFN with k-fold cross-validation.
+
+Meta-parameters that only differ in their regularization share the same basis functions. 
+For these, the activations and the least squares statistics of each fold are computed only 
+once, and the factorization for each fold is reused for all regularization values. 
+
+    meta_parameters = metaParameterGrid({'n_basis_functions_per_dim': [10, 20, 40],
+                                         'regularization': [0.0, 1e-6, 1e-3]})
+    results = searchMetaParameters(FunctionApproximatorLWR,inputs,targets,meta_parameters)
+    printMetaParameterTable(results)
+    fa = FunctionApproximatorLWR(**results[0]['meta_parameters'])
+"""
+
+import itertools
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import FunctionApproximatorLWR
+from dmpbbo_lib.functionapproximators.leastSquares import *
+
+
+def metaParameterGrid(values):
+    """All combinations of the values of each meta-parameter (a dict of lists), as a list of dicts."""
+    names = sorted(values.keys())
+    return [ dict(zip(names,combination)) for combination in itertools.product(*[values[name] for name in names]) ]
+    
+    
+def metaParameterRandom(values, n_samples, seed=None):
+    """A random subset of n_samples of metaParameterGrid(values)."""
+    grid = metaParameterGrid(values)
+    rng = np.random.RandomState(seed)
+    indices = rng.choice(len(grid),min(n_samples,len(grid)),replace=False)
+    return [ grid[ii] for ii in indices ]
+    
+
+def searchMetaParameters(fa_class, inputs, targets, meta_parameters, n_folds=5, n_processes=None, seed=None):
+    """Evaluate meta-parameters for LWR or RBFN with k-fold cross-validation, on a process pool.
+    
+    meta_parameters is a list of dicts with the arguments of the constructor of fa_class. 
+    The basis functions are placed in the range of all inputs, and are the same in all folds.
+    With n_processes=1, everything is done in this process.
+    
+    Returns a list of dicts, sorted by the mean squared error on the validation folds, with the
+    keys 'meta_parameters', 'mse' (mean over the folds), 'mse_std', and 'time' (the time for 
+    the computations shared with other regularization values, plus the time for this one).
+    """
+    if inputs.ndim==1:
+        inputs = np.atleast_2d(inputs).T
+    n_samples = inputs.shape[0]
+    folds = np.array_split(np.random.RandomState(seed).permutation(n_samples),n_folds)
+    
+    # Group the meta-parameters that only differ in their regularization
+    groups = {}
+    for parameters in meta_parameters:
+        basis_parameters = { name: value for (name, value) in parameters.items() if name!='regularization' }
+        key = repr(sorted(basis_parameters.items()))
+        groups.setdefault(key,(basis_parameters,[]))[1].append(parameters.get('regularization',0.0))
+        
+    tasks = [ (fa_class, basis_parameters, regularizations, inputs, targets, folds) for (basis_parameters, regularizations) in groups.values() ]
+    if n_processes==1:
+        group_results = [ crossValidateGroup(*task) for task in tasks ]
+    else:
+        with ProcessPoolExecutor(n_processes) as executor:
+            group_results = list(executor.map(crossValidateGroup,*zip(*tasks)))
+    
+    results = list(itertools.chain(*group_results))
+    results.sort(key=lambda result: result['mse'])
+    return results
+    
+    
+def crossValidateGroup(fa_class, basis_parameters, regularizations, inputs, targets, folds):
+    """Cross-validate meta-parameters with the same basis functions, but different regularizations."""
+    start = time.perf_counter()
+    
+    fa = fa_class(**basis_parameters)
+    fa.initializeBasisFunctions(inputs.min(axis=0),inputs.max(axis=0))
+    activations = fa.getActivations(inputs)
+    if sparse.issparse(activations):
+        activations = activations.tocsr()
+    targets_2d = np.reshape(targets,(inputs.shape[0],-1))
+    
+    # LWR performs a least squares regression on the inputs for each kernel, weighted with 
+    # its activations. RBFN performs one least squares regression on the activations.
+    kernel_regressions = isinstance(fa,FunctionApproximatorLWR)
+    def statistics(indices):
+        if kernel_regressions:
+            return weightedLeastSquaresStatistics(inputs[indices],targets_2d[indices],activations[indices],True)
+        return weightedLeastSquaresStatistics(activations[indices],targets_2d[indices],np.ones(indices.size),False)
+        
+    # The statistics of the training data of a fold are those of all data, minus those of the 
+    # validation data. 
+    fold_statistics = [ statistics(fold) for fold in folds ]
+    XtWX_all = sum([ XtWX for (XtWX, XtWy) in fold_statistics ])
+    XtWy_all = sum([ XtWy for (XtWX, XtWy) in fold_statistics ])
+    factorizations = []
+    for (XtWX, XtWy) in fold_statistics:
+        (eigenvalues, V) = np.linalg.eigh(XtWX_all-XtWX)
+        factorizations.append(LeastSquaresFactorization(None,None,V,eigenvalues))
+    shared_time = time.perf_counter()-start
+        
+    results = []
+    for regularization in regularizations:
+        start = time.perf_counter()
+        mses = []
+        for (fold, (XtWX, XtWy), factorization) in zip(folds,fold_statistics,factorizations):
+            betas = factorization.solveStatistics(XtWy_all-XtWy,regularization)
+            validation_activations = activations[fold]
+            if kernel_regressions:
+                # sum_b a_b*(x*slopes_b + offsets_b), see FunctionApproximatorLWR.predict
+                X = designMatrix(inputs[fold],fold.size,True)
+                outputs = sum([ weighted(validation_activations,X[:,i_beta]).dot(betas[:,i_beta,:]) for i_beta in range(X.shape[1]) ])
+            else:
+                outputs = validation_activations.dot(betas)
+            mses.append(np.mean(np.square(outputs-targets_2d[fold])))
+            
+        meta_parameters = dict(basis_parameters)
+        meta_parameters['regularization'] = regularization
+        results.append({ 'meta_parameters': meta_parameters, 'mse': np.mean(mses), 'mse_std': np.std(mses), 'time': shared_time+time.perf_counter()-start })
+    return results
+    
+
+def weighted(activations, weights):
+    """Multiply each row of the (dense or sparse) activations with a weight."""
+    if sparse.issparse(activations):
+        return activations.multiply(np.reshape(weights,(-1,1))).tocsr()
+    return activations*np.reshape(weights,(-1,1))
+    
+    
+def printMetaParameterTable(results):
+    names = sorted(results[0]['meta_parameters'].keys())
+    print('%4s ' % 'rank' + ' '.join(['%26s' % name for name in names]) + ' %12s %12s %9s' % ('mse','mse_std','time (s)'))
+    for (rank, result) in enumerate(results):
+        values = ' '.join(['%26s' % str(result['meta_parameters'][name]) for name in names])
+        print('%4d %s %12.4g %12.4g %9.4f' % (rank+1,values,result['mse'],result['mse_std'],result['time']))
@@ -0,0 +1,95 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys, time
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+
+
+def activationsLoop(centers, widths, inputs, normalized_basis_functions=False):
+    # Reference implementation with explicit loops over basis functions and samples
+    n_basis_functions = centers.size
+    n_samples = inputs.size
+    kernel_activations = np.ones([n_samples,n_basis_functions])
+    if normalized_basis_functions and n_basis_functions==1:
+        return kernel_activations
+    for bb in range(n_basis_functions):
+        for i_s in range(n_samples):
+            kernel_activations[i_s,bb] = np.exp(-0.5*np.square(inputs[i_s]-centers[bb])/(widths[bb]*widths[bb]))
+    if normalized_basis_functions:
+        for i_sample in range(n_samples):
+            sum_kernel_activations = kernel_activations[i_sample,:].sum()
+            for i_basis in range(n_basis_functions):
+                if sum_kernel_activations==0.0:
+                    kernel_activations[i_sample,i_basis] = 1.0/n_basis_functions
+                else:
+                    kernel_activations[i_sample,i_basis] /= sum_kernel_activations
+    return kernel_activations
+    
+    
+def timeIt(function, n_repetitions):
+    start = time.perf_counter()
+    for ii in range(n_repetitions):
+        function()
+    return (time.perf_counter()-start)/n_repetitions
+
+
+if __name__=='__main__':
+    """Compare the vectorized Gaussian activations to the loop-based reference implementation."""
+    
+    # The loop-based reference is only timed for small problems, as it is very slow.
+    max_loop_evaluations = 200000
+    
+    print('%6s %7s %12s %12s %12s %9s' % ('B','N','loop (s)','vector (s)','buffer (s)','speedup'))
+    for n_basis_functions in [10, 50, 200, 500]:
+        for n_samples in [100, 1000, 10000, 100000]:
+            centers = np.linspace(0.0,1.0,n_basis_functions)
+            widths = np.full(n_basis_functions,0.5/n_basis_functions)
+            inputs = np.linspace(0.0,1.0,n_samples)
+            buffer = np.empty([n_samples,n_basis_functions])
+            
+            n_repetitions = max(1,int(1000000/(n_samples*n_basis_functions)))
+            t_vector = timeIt(lambda: Gaussian.activations(centers,widths,inputs,True),n_repetitions)
+            t_buffer = timeIt(lambda: Gaussian.activations(centers,widths,inputs,True,buffer),n_repetitions)
+            
+            if n_samples*n_basis_functions<=max_loop_evaluations:
+                t_loop = timeIt(lambda: activationsLoop(centers,widths,inputs,True),1)
+                assert(np.allclose(activationsLoop(centers,widths,inputs,True),buffer))
+                print('%6d %7d %12.6f %12.6f %12.6f %9.1f' % (n_basis_functions,n_samples,t_loop,t_vector,t_buffer,t_loop/t_vector))
+            else:
+                print('%6d %7d %12s %12.6f %12.6f %9s' % (n_basis_functions,n_samples,'-',t_vector,t_buffer,'-'))
+                
+    # With several input dimensions, the number of basis functions grows exponentially with the
+    # number of dimensions. With a cutoff, only the basis functions near each sample are evaluated.
+    print('')
+    print('%6s %6s %7s %12s %12s %9s' % ('D','B','N','dense (s)','sparse (s)','active'))
+    cutoff = Gaussian.cutoffFromActivationThreshold(0.001)
+    n_samples = 10000
+    for n_dims in [2, 3]:
+        for n_basis_functions_per_dim in [5, 10, 20]:
+            inputs = np.random.RandomState(0).uniform(0.0,1.0,[n_samples,n_dims])
+            (centers, widths) = Gaussian.centersAndWidths(np.zeros(n_dims),np.ones(n_dims),n_basis_functions_per_dim)
+            n_basis_functions = centers.shape[0]
+            t_dense = timeIt(lambda: Gaussian.activations(centers,widths,inputs,True),1)
+            t_sparse = timeIt(lambda: Gaussian.activationsSparse(centers,widths,inputs,True,cutoff),1)
+            n_active = Gaussian.activationsSparse(centers,widths,inputs,True,cutoff).nnz/n_samples
+            print('%6d %6d %7d %12.6f %12.6f %9.1f' % (n_dims,n_basis_functions,n_samples,t_dense,t_sparse,n_active))
@@ -0,0 +1,66 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+
+if __name__=='__main__':
+    """Check that cached activations give the same predictions, and are invalidated when needed."""
+    
+    inputs = np.linspace(0.0,2.0,101)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    
+    for fa_class in [FunctionApproximatorLWR,FunctionApproximatorRBFN]:
+        fa = fa_class(9)
+        fa.train(inputs,targets)
+        outputs = fa.predict(inputs)
+        
+        fa.enableActivationCache(max_size=2)
+        cache = fa.activation_cache_
+        
+        # Changing the parameters does not change the activations
+        values = fa.getParameterVectorSelected()
+        for ii in range(5):
+            fa.setParameterVectorSelected((1.0+0.1*ii)*values)
+            outputs_cached = fa.predict(inputs.copy())
+        assert(cache.n_misses_==1 and cache.n_hits_==4)
+        fa.setParameterVectorSelected(values)
+        assert(np.allclose(fa.predict(inputs),outputs))
+        
+        # Different inputs are cached separately; the least recently used is evicted
+        fa.predict(inputs[:50])
+        fa.predict(inputs[50:])
+        assert(cache.size()==2)
+        n_misses = cache.n_misses_
+        fa.predict(inputs)
+        assert(cache.n_misses_==n_misses+1)
+        
+        # Changing the model invalidates the cached activations
+        fa.model_widths_ = 2.0*fa.model_widths_
+        n_misses = cache.n_misses_
+        fa.predict(inputs)
+        assert(cache.n_misses_==n_misses+1)
+        
+        print(fa_class.__name__+': '+str(cache))
@@ -0,0 +1,72 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import FunctionApproximatorLWR
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import FunctionApproximatorRBFN
+
+
+if __name__=='__main__':
+    """Test basis functions and function approximators with several input dimensions."""
+    
+    # Inputs on a 2D grid, and the centers on a coarser 2D grid 
+    n_per_dim = 41
+    (x0, x1) = np.meshgrid(np.linspace(0.0,2.0,n_per_dim),np.linspace(-1.0,1.0,n_per_dim),indexing='ij')
+    inputs = np.column_stack((x0.ravel(),x1.ravel()))
+    (centers, widths) = Gaussian.centersAndWidths(inputs.min(axis=0),inputs.max(axis=0),[8,6],0.5)
+    assert(centers.shape==(48,2))
+    assert(widths.shape==(48,2))
+    
+    # The unnormalized activations are the products of the activations in each dimension
+    dense = Gaussian.activations(centers, widths, inputs)
+    product = np.ones(dense.shape)
+    for i_basis in range(centers.shape[0]):
+        for i_dim in range(2):
+            product[:,i_basis] *= Gaussian.activations(centers[i_basis:i_basis+1,i_dim],widths[i_basis:i_basis+1,i_dim],inputs[:,i_dim])[:,0]
+    assert(np.allclose(dense,product))
+
+    for normalized in [False, True]:
+        dense = Gaussian.activations(centers, widths, inputs, normalized)
+        
+        # With a large cutoff, the truncated activations are the same as the dense ones
+        kernel_acts = Gaussian.activationsSparse(centers, widths, inputs, normalized, 12.0)
+        assert(np.allclose(kernel_acts.toarray(),dense,atol=1e-12))
+        
+        # With a small cutoff, only a few basis functions are active for each sample
+        cutoff = Gaussian.cutoffFromActivationThreshold(0.001)
+        kernel_acts = Gaussian.activationsSparse(centers, widths, inputs, normalized, cutoff)
+        assert(np.allclose(kernel_acts.toarray(),dense,atol=0.01))
+        print('normalized=%s: %d of %d activations computed' % (normalized,kernel_acts.nnz,dense.size))
+        
+    # Train and predict with contextual inputs, with dense and truncated activations
+    targets = np.exp(-inputs[:,0])*np.sin(3*inputs[:,0]) + 0.5*np.square(inputs[:,1])
+    for fa_class in [FunctionApproximatorLWR,FunctionApproximatorRBFN]:
+        fa_dense = fa_class([10,8],regularization=1e-9)
+        fa_dense.train(inputs,targets)
+        fa_sparse = fa_class([10,8],regularization=1e-9,activation_cutoff=4.0)
+        fa_sparse.train(inputs,targets)
+        error = np.abs(fa_dense.predict(inputs)-targets).max()
+        difference = np.abs(fa_dense.predict(inputs)-fa_sparse.predict(inputs)).max()
+        print('%s: max error %g, max difference between dense and sparse predictions: %g' % (fa_class.__name__,error,difference))
+        assert(error<0.1)
+        assert(difference<0.01)
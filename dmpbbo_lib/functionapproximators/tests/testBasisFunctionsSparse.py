@@ -0,0 +1,61 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import FunctionApproximatorLWR
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import FunctionApproximatorRBFN
+
+
+if __name__=='__main__':
+    """Compare truncated (sparse) basis function activations to the dense ones."""
+    
+    n_centers = 200
+    n_samples = 2001
+    centers = np.linspace(0.0,2.0,n_centers)
+    widths = 0.01*np.ones(n_centers)
+    inputs = np.linspace(0.0,2.0,n_samples)
+    
+    for normalized in [False, True]:
+        dense = Gaussian.activations(centers, widths, inputs, normalized)
+        
+        # With a large cutoff, the truncated activations are the same as the dense ones
+        kernel_acts = Gaussian.activationsSparse(centers, widths, inputs, normalized, 12.0)
+        assert(np.allclose(kernel_acts.toarray(),dense,atol=1e-12))
+        
+        # With a small cutoff, only a few basis functions are active for each sample
+        cutoff = Gaussian.cutoffFromActivationThreshold(0.001)
+        kernel_acts = Gaussian.activationsSparse(centers, widths, inputs, normalized, cutoff)
+        assert(np.allclose(kernel_acts.toarray(),dense,atol=0.01))
+        print('normalized=%s: %d of %d activations computed' % (normalized,kernel_acts.nnz,dense.size))
+    
+    # Train and predict with truncated activations
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    for fa_class in [FunctionApproximatorLWR,FunctionApproximatorRBFN]:
+        fa_dense = fa_class(50,regularization=1e-9)
+        fa_dense.train(inputs,targets)
+        fa_sparse = fa_class(50,regularization=1e-9,activation_cutoff=4.0)
+        fa_sparse.train(inputs,targets)
+        difference = np.abs(fa_dense.predict(inputs)-fa_sparse.predict(inputs)).max()
+        print('%s: max difference between dense and sparse predictions: %g' % (fa_class.__name__,difference))
+        assert(difference<0.01)
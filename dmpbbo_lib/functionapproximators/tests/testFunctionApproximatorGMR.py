@@ -0,0 +1,88 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+
+
+if __name__=='__main__':
+    """Check GMR training, derivatives, and incremental training."""
+    
+    inputs = np.linspace(0.0,2.0,201)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    
+    fa = FunctionApproximatorGMR(10)
+    fa.train(inputs,targets)
+    outputs = fa.predict(inputs)
+    assert(outputs.shape==targets.shape)
+    assert(np.max(np.abs(outputs-targets))<0.1)
+    assert(np.all(fa.predictVariance(inputs)>=0.0))
+    
+    # The derivative w.r.t. the inputs matches finite differences
+    (outputs_dot_outputs, outputs_dot) = fa.predictDot(inputs)
+    assert(np.allclose(outputs_dot_outputs,outputs))
+    step = 1e-6
+    outputs_dot_numerical = (fa.predict(inputs+step)-fa.predict(inputs-step))/(2*step)
+    assert(np.allclose(outputs_dot,outputs_dot_numerical,atol=1e-4))
+    
+    # The outputs are affine in the parameters (the means of the outputs)
+    jacobian = fa.getParameterVectorSelectedJacobian(inputs)
+    values = fa.getParameterVectorSelected()
+    delta = np.linspace(-1.0,1.0,values.size)
+    fa.setParameterVectorSelected(values+delta)
+    assert(np.allclose(fa.predict(inputs)-outputs,jacobian[:,0,:].dot(delta)))
+    fa.setParameterVectorSelected(values)
+    
+    # Multi-dimensional inputs and outputs
+    inputs_2d = np.random.uniform(-1.0,1.0,[500,2])
+    targets_2d = np.column_stack((inputs_2d.sum(axis=1),inputs_2d[:,0]-inputs_2d[:,1]))
+    fa_2d = FunctionApproximatorGMR(3)
+    fa_2d.train(inputs_2d,targets_2d)
+    assert(np.allclose(fa_2d.predict(inputs_2d),targets_2d,atol=1e-2))
+    
+    # Adding demonstrations incrementally is close to training on all the data at once
+    fa_incremental = FunctionApproximatorGMR(10)
+    fa_incremental.train(inputs[0::2],targets[0::2])
+    fa_incremental.trainIncremental(inputs[1::2],targets[1::2])
+    assert(fa_incremental.model_n_observations_==inputs.size)
+    outputs_incremental = fa_incremental.predict(inputs)
+    assert(np.max(np.abs(outputs_incremental-targets))<0.1)
+    
+    # With one Gaussian, the incremental updates are exact: the mean and covariance of all the data.
+    # The regularization of the covariance is only added once, not with each update.
+    fa_single = FunctionApproximatorGMR(1)
+    fa_single.train(inputs[0:50],targets[0:50])
+    for i_chunk in range(1,4):
+        fa_single.trainIncremental(inputs[50*i_chunk:50*(i_chunk+1)],targets[50*i_chunk:50*(i_chunk+1)])
+    data = np.column_stack((inputs[0:200],targets[0:200]))
+    assert(np.allclose(fa_single.model_means_[0],data.mean(axis=0)))
+    assert(np.allclose(fa_single.model_covars_[0],np.cov(data,rowvar=False,bias=True)+1e-5*np.eye(2),rtol=0.0,atol=1e-10))
+    
+    # A constant first dimension does not prevent training
+    fa_constant = FunctionApproximatorGMR(3)
+    fa_constant.train(np.ones(inputs.size),targets)
+    assert(np.all(np.isfinite(fa_constant.predict(np.ones(3)))))
+    
+    print('FunctionApproximatorGMR max error: '+str(np.max(np.abs(outputs-targets)))
+        +' (incremental: '+str(np.max(np.abs(outputs_incremental-targets)))+')')
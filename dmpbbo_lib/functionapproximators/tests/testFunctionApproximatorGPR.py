@@ -0,0 +1,69 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGPR import *
+
+
+if __name__=='__main__':
+    """Check GPR predictions, and that adding training points updates the Cholesky factor correctly."""
+    
+    inputs = np.linspace(0.0,2.0,41)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    
+    fa = FunctionApproximatorGPR(1.0,0.1)
+    fa.train(inputs,targets)
+    assert(np.allclose(fa.predict(inputs),targets,atol=1e-4))
+    
+    # Means and variances for many inputs at once are the same as computing them one by one
+    test_inputs = np.linspace(-0.5,2.5,31)
+    (means, variances) = fa.predictMeanAndVariance(test_inputs)
+    for ii in range(test_inputs.size):
+        k = fa.kernelActivations(np.atleast_2d(test_inputs[ii]),fa.model_train_inputs_)[0]
+        gram = fa.kernelActivations(fa.model_train_inputs_,fa.model_train_inputs_) + fa.meta_noise_variance_*np.eye(inputs.size)
+        assert(np.isclose(means[ii],k.dot(np.linalg.solve(gram,targets))))
+        assert(np.isclose(variances[ii],max(1.0-k.dot(np.linalg.solve(gram,k)),0.0),atol=1e-6))
+    assert(np.all(variances[test_inputs<0.0]>variances[np.logical_and(test_inputs>0.0,test_inputs<2.0)].max()))
+    
+    # Adding training points one by one gives the same model as training on all of them
+    fa_added = FunctionApproximatorGPR(1.0,0.1)
+    for ii in np.random.permutation(inputs.size):
+        fa_added.addTrainingPoint(inputs[ii],targets[ii])
+    gram = fa_added.kernelActivations(fa_added.model_train_inputs_,fa_added.model_train_inputs_)
+    gram += fa_added.meta_noise_variance_*np.eye(inputs.size)
+    assert(np.allclose(fa_added.model_cholesky_.dot(fa_added.model_cholesky_.T),gram))
+    assert(np.allclose(fa_added.predict(test_inputs),means,atol=1e-4))
+    
+    # Multiple outputs, and the Jacobian of the outputs w.r.t. the parameters (the targets)
+    targets_2d = np.column_stack((targets,np.cos(inputs)))
+    fa_2d = FunctionApproximatorGPR(1.0,0.1)
+    fa_2d.train(inputs,targets_2d)
+    fa_2d.addTrainingPoint(2.5,np.array([0.0,np.cos(2.5)]))
+    jacobian = fa_2d.getParameterVectorSelectedJacobian(test_inputs)
+    values = fa_2d.getParameterVectorSelected()
+    assert(np.allclose(np.einsum('nop,p->no',jacobian,values),fa_2d.predict(test_inputs)))
+    fa_2d.setParameterVectorSelected(2.0*values)
+    assert(np.allclose(np.einsum('nop,p->no',jacobian,2.0*values),fa_2d.predict(test_inputs)))
+    
+    print('FunctionApproximatorGPR max variance: '+str(variances.max()))
@@ -0,0 +1,70 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRRRFF import *
+from dmpbbo_lib.functionapproximators.BasisFunction import Cosine
+
+
+if __name__=='__main__':
+    """Check RRRFF training, reproducibility with a fixed seed, and reuse of the factorization."""
+    
+    inputs = np.linspace(0.0,2.0,201)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    
+    # Batched activations are the same as computing them one basis function at a time
+    frequencies = np.random.normal(0.0,1.0,[5,1])
+    phases = np.random.uniform(0.0,2*np.pi,5)
+    activations = Cosine.activations(frequencies,phases,inputs)
+    for bb in range(5):
+        assert(np.allclose(activations[:,bb],np.cos(inputs*frequencies[bb,0]+phases[bb])))
+    
+    fa = FunctionApproximatorRRRFF(50,regularization=1e-4,gamma=5.0,seed=42)
+    fa.train(inputs,targets)
+    outputs = fa.predict(inputs)
+    assert(outputs.shape==targets.shape)
+    assert(np.max(np.abs(outputs-targets))<0.05)
+    
+    # The same seed gives the same features, and thus the same model
+    fa_same_seed = FunctionApproximatorRRRFF(50,regularization=1e-4,gamma=5.0,seed=42)
+    fa_same_seed.train(inputs,targets)
+    assert(np.array_equal(fa_same_seed.model_angular_frequencies_,fa.model_angular_frequencies_))
+    assert(np.allclose(fa_same_seed.getParameterVectorSelected(),fa.getParameterVectorSelected()))
+    
+    # Retraining on the same inputs reuses the factorization, and is the same as training from scratch
+    factorization = fa.factorization_
+    targets_2d = np.column_stack((targets,np.cos(inputs)))
+    fa.train(inputs,targets_2d)
+    assert(fa.factorization_ is factorization)
+    fa_2d = FunctionApproximatorRRRFF(50,regularization=1e-4,gamma=5.0,seed=42)
+    fa_2d.train(inputs,targets_2d)
+    assert(np.allclose(fa.predict(inputs),fa_2d.predict(inputs)))
+    assert(np.allclose(fa.predict(inputs)[:,0],outputs))
+    
+    # The outputs are linear in the parameters
+    jacobian = fa.getParameterVectorSelectedJacobian(inputs)
+    values = fa.getParameterVectorSelected()
+    assert(np.allclose(np.einsum('nop,p->no',jacobian,values),fa.predict(inputs)))
+    
+    print('FunctionApproximatorRRRFF max error: '+str(np.max(np.abs(outputs-targets))))
@@ -0,0 +1,82 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import FunctionApproximatorLWR
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import FunctionApproximatorRBFN
+from dmpbbo_lib.functionapproximators.leastSquares import leastSquares
+from dmpbbo_lib.functionapproximators.metaParameterSearch import *
+
+
+if __name__=='__main__':
+    """Compare the meta-parameter search to cross-validation by training each fold separately."""
+    
+    n_samples = 300
+    inputs = np.random.RandomState(1).uniform(0.0,2.0,n_samples)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs)) + 0.05*np.random.RandomState(2).normal(size=n_samples)
+    n_folds = 4
+    seed = 3
+    folds = np.array_split(np.random.RandomState(seed).permutation(n_samples),n_folds)
+    
+    for fa_class in [FunctionApproximatorLWR, FunctionApproximatorRBFN]:
+        values = {'n_basis_functions_per_dim': [5, 10, 20], 'intersection_height': [0.3, 0.6], 'regularization': [0.0, 1e-4, 1e-1]}
+        meta_parameters = metaParameterGrid(values)
+        assert(len(meta_parameters)==18)
+        results = searchMetaParameters(fa_class,inputs,targets,meta_parameters,n_folds,n_processes=1,seed=seed)
+        printMetaParameterTable(results[:5])
+        
+        mses = [ result['mse'] for result in results ]
+        assert(np.all(np.diff(mses)>=0.0))
+        
+        # The same results on a process pool
+        results_pool = searchMetaParameters(fa_class,inputs,targets,meta_parameters,n_folds,n_processes=2,seed=seed)
+        for (result, result_pool) in zip(results,results_pool):
+            assert(result['meta_parameters']==result_pool['meta_parameters'])
+            assert(np.isclose(result['mse'],result_pool['mse']))
+            
+        # Train on each fold separately, with the basis functions in the range of all inputs
+        for result in results[::5]:
+            fold_mses = []
+            for fold in folds:
+                training = np.setdiff1d(np.arange(n_samples),fold)
+                fa = fa_class(**result['meta_parameters'])
+                fa.initializeBasisFunctions(inputs.min(),inputs.max())
+                if fa_class==FunctionApproximatorLWR:
+                    fa.accumulateStatistics(inputs[training],targets[training],1.0)
+                    fa.solveStatistics()
+                    outputs = fa.predict(inputs[fold])
+                else:
+                    weights = leastSquares(fa.getActivations(inputs[training]),targets[training],False,fa.meta_regularization_)
+                    outputs = fa.getActivations(inputs[fold]).dot(weights)
+                fold_mses.append(np.mean(np.square(outputs-targets[fold])))
+            assert(np.isclose(np.mean(fold_mses),result['mse'],rtol=1e-6))
+            
+        # A random subset of the grid, with truncated activations and several input dimensions
+        inputs_2d = np.column_stack((inputs,np.random.RandomState(4).uniform(-1.0,1.0,n_samples)))
+        targets_2d = targets + 0.5*np.square(inputs_2d[:,1])
+        values['activation_cutoff'] = [3.0]
+        meta_parameters = metaParameterRandom(values,6,seed=5)
+        assert(len(meta_parameters)==6)
+        results = searchMetaParameters(fa_class,inputs_2d,targets_2d,meta_parameters,n_folds,n_processes=2,seed=seed)
+        assert(len(results)==6)
+        
+    print('Meta-parameter search gives the same errors as training each fold separately.')
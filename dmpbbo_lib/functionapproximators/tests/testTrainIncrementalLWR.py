@@ -0,0 +1,81 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+
+
+if __name__=='__main__':
+    """Check that training LWR chunk by chunk is the same as training on all the data at once."""
+    
+    inputs = np.linspace(0.0,2.0,1001)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    
+    fa = FunctionApproximatorLWR(9)
+    fa.train(inputs,targets)
+    
+    # The samples are folded in in chunks, in random order
+    fa_incremental = FunctionApproximatorLWR(9)
+    fa_incremental.initializeBasisFunctions(inputs.min(),inputs.max())
+    order = np.random.RandomState(0).permutation(inputs.size)
+    for chunk in np.array_split(order,10):
+        fa_incremental.trainIncremental(inputs[chunk],targets[chunk])
+        # Memory does not depend on the number of samples seen
+        assert(fa_incremental.statistics_[0].shape==(9,2,2))
+    assert(np.allclose(fa_incremental.predict(inputs),fa.predict(inputs)))
+    
+    # The basis functions cannot be placed with the inputs of the first chunk only
+    try:
+        FunctionApproximatorLWR(9).trainIncremental(inputs[:100],targets[:100])
+        assert(False)
+    except RuntimeError:
+        pass
+    
+    # Several demonstrations (outputs) at once, with sparse activations, and the samples in order
+    targets_2d = np.column_stack((targets,np.cos(inputs)))
+    fa_2d_batch = FunctionApproximatorLWR(9,activation_cutoff=4.0)
+    fa_2d_batch.train(inputs,targets_2d)
+    fa_2d = FunctionApproximatorLWR(9,activation_cutoff=4.0)
+    fa_2d.initializeBasisFunctions(inputs.min(),inputs.max())
+    for chunk in np.array_split(np.arange(inputs.size),7):
+        fa_2d.trainIncremental(inputs[chunk],targets_2d[chunk])
+    outputs_2d = fa_2d.predict(inputs)
+    assert(outputs_2d.shape==targets_2d.shape)
+    assert(np.allclose(outputs_2d,fa_2d_batch.predict(inputs)))
+    assert(np.max(np.abs(outputs_2d-targets_2d))<0.1)
+    
+    # With a forgetting factor, the model follows targets that change over time
+    fa_forget = FunctionApproximatorLWR(9,forgetting_factor=0.99)
+    fa_forget.initializeBasisFunctions(inputs.min(),inputs.max())
+    for offset in [0.0,1.0]:
+        for chunk in np.array_split(order,10):
+            fa_forget.trainIncremental(inputs[chunk],targets[chunk]+offset)
+    fa_incremental.trainIncremental(inputs,targets+1.0)
+    error_forget = np.max(np.abs(fa_forget.predict(inputs)-(targets+1.0)))
+    error_no_forget = np.max(np.abs(fa_incremental.predict(inputs)-(targets+1.0)))
+    error_batch = np.max(np.abs(fa.predict(inputs)-targets))
+    assert(error_forget<2.0*error_batch)
+    assert(error_no_forget>0.4)
+    
+    print('Incremental LWR error with/without forgetting: '+str(error_forget)+' / '+str(error_no_forget)+' (batch: '+str(error_batch)+')')
@@ -0,0 +1,62 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+
+
+if __name__=='__main__':
+    """Check that training RBFN chunk by chunk is the same as training on all the data at once."""
+    
+    inputs = np.linspace(0.0,1.0,200)
+    targets = np.sin(6*inputs)
+    targets_2d = np.column_stack((targets,np.cos(inputs)))
+    
+    for (fa_targets, activation_cutoff) in [ (targets, None), (targets_2d, 4.0) ]:
+        fa = FunctionApproximatorRBFN(10,regularization=1e-6,activation_cutoff=activation_cutoff)
+        fa.train(inputs,fa_targets)
+        
+        # The samples are folded in in chunks, in order
+        fa_incremental = FunctionApproximatorRBFN(10,regularization=1e-6,activation_cutoff=activation_cutoff)
+        fa_incremental.initializeBasisFunctions(inputs.min(),inputs.max())
+        for chunk in np.array_split(np.arange(inputs.size),7):
+            fa_incremental.trainIncremental(inputs[chunk],fa_targets[chunk])
+            # Memory does not depend on the number of samples seen
+            assert(fa_incremental.statistics_[0].shape==(10,10))
+        assert(np.allclose(fa_incremental.predict(inputs),fa.predict(inputs)))
+        
+        # Training continues after train(), as if all samples were passed to train() at once
+        fa.trainIncremental(inputs[150:],fa_targets[150:])
+        fa_all = FunctionApproximatorRBFN(10,regularization=1e-6,activation_cutoff=activation_cutoff)
+        fa_all.train(np.concatenate((inputs,inputs[150:])),np.concatenate((fa_targets,fa_targets[150:])))
+        assert(np.allclose(fa.predict(inputs),fa_all.predict(inputs)))
+        assert(np.max(np.abs(fa.predict(inputs)-fa_targets))<0.1)
+        
+    # The basis functions cannot be placed with the inputs of the first chunk only
+    try:
+        FunctionApproximatorRBFN(10).trainIncremental(inputs[:50],targets[:50])
+        assert(False)
+    except RuntimeError:
+        pass
+    
+    print('Incremental RBFN max error: '+str(np.max(np.abs(fa.predict(inputs)-targets_2d))))
@@ -0,0 +1,74 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.FunctionApproximatorLWR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRBFN import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorRRRFF import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGMR import *
+from dmpbbo_lib.functionapproximators.FunctionApproximatorGPR import *
+from dmpbbo_lib.functionapproximators.UnifiedModel import UnifiedModel
+
+
+if __name__=='__main__':
+    """Compare the predictions of function approximators to those of their unified models."""
+    
+    inputs = np.linspace(0.0,2.0,101)
+    targets_1d = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    targets_2d = np.column_stack((targets_1d,np.cos(inputs)))
+    inputs_test = np.linspace(-0.2,2.2,57)
+    
+    inputs_2d = np.column_stack((inputs,np.sin(3*inputs)))
+    inputs_2d_test = np.column_stack((inputs_test,np.cos(inputs_test)))
+
+    np.random.seed(0)
+    for (fa_inputs, fa_inputs_test) in [(inputs,inputs_test), (inputs_2d,inputs_2d_test)]:
+        for targets in [targets_1d, targets_2d]:
+            function_apps = [ FunctionApproximatorLWR(6), FunctionApproximatorRBFN(6), FunctionApproximatorRRRFF(20,1e-6,5.0,seed=1), FunctionApproximatorGMR(3), FunctionApproximatorGPR(1.0,0.3,1e-4) ]
+            for fa in function_apps:
+                fa.train(fa_inputs,targets)
+                unified = fa.toUnifiedModel()
+                assert(isinstance(unified,UnifiedModel))
+                
+                outputs = fa.predict(fa_inputs_test)
+                outputs_unified = unified.predict(fa_inputs_test)
+                assert(outputs.shape==outputs_unified.shape)
+                assert(np.allclose(outputs,outputs_unified))
+                
+                # The outputs are affine in the parameters of the unified model
+                jacobian = unified.getParameterVectorSelectedJacobian(fa_inputs_test)
+                values = unified.getParameterVectorSelected().copy()
+                delta = np.random.normal(size=values.size)
+                unified.setParameterVectorSelected(values+delta)
+                outputs_delta = unified.predict(fa_inputs_test)-outputs_unified
+                assert(np.allclose(np.reshape(np.dot(jacobian,delta),outputs_delta.shape),outputs_delta))
+                unified.setParameterVectorSelected(values)
+                
+                if not isinstance(fa,(FunctionApproximatorGMR,FunctionApproximatorGPR)):
+                    # The parameter vectors are the same, and so is changing them
+                    assert(np.allclose(values,fa.getParameterVectorSelected()))
+                    new_values = values + np.random.normal(size=values.size)
+                    fa.setParameterVectorSelected(new_values)
+                    unified.setParameterVectorSelected(new_values)
+                    assert(np.allclose(fa.predict(fa_inputs_test),unified.predict(fa_inputs_test)))
+                    
+    print('Function approximators and their unified models have the same outputs.')
@@ -0,0 +1,82 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+# 
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import os, sys
+
+lib_path = os.path.abspath('../../../')
+sys.path.append(lib_path)
+
+from dmpbbo_lib.functionapproximators.BasisFunction import Gaussian
+from dmpbbo_lib.functionapproximators.leastSquares import *
+
+
+if __name__=='__main__':
+    """Compare weighted least squares to the explicit solution, and batched weighted least squares to one regression per kernel."""
+    
+    n_centers = 9
+    n_samples = 501
+    centers = np.linspace(0.0,2.0,n_centers)
+    widths = 0.1*np.ones(n_centers)
+    inputs = np.linspace(0.0,2.0,n_samples)
+    targets = 3*np.exp(-inputs)*np.sin(2*np.square(inputs))
+    activations = Gaussian.activations(centers, widths, inputs, True)
+    
+    # Explicit solution inv(X^T W X + Gamma) X^T W y, with multiple targets
+    X = np.column_stack((inputs,np.ones(n_samples)))
+    W = np.diagflat(activations[:,3])
+    multi_targets = np.column_stack((targets,np.cos(inputs)))
+    for regularization in [0.0, 0.1]:
+        betas_explicit = np.linalg.inv(X.T.dot(W).dot(X) + regularization*np.identity(2)).dot(X.T).dot(W).dot(multi_targets)
+        betas = weightedLeastSquares(inputs,multi_targets,activations[:,3],True,regularization)
+        assert(np.allclose(betas,betas_explicit))
+    
+    # Re-solve with the factorization for new targets and regularization
+    (betas, factorization) = weightedLeastSquares(inputs,targets,activations[:,3],True,0.0,True)
+    assert(np.allclose(factorization.solve(multi_targets,0.1),weightedLeastSquares(inputs,multi_targets,activations[:,3],True,0.1)))
+    
+    for use_offset in [True, False]:
+        for regularization in [0.0, 0.1]:
+            betas = weightedLeastSquaresBatch(inputs,targets,activations,use_offset,regularization)
+            for i_kernel in range(n_centers):
+                beta = weightedLeastSquares(inputs,targets,activations[:,i_kernel],use_offset,regularization)
+                assert(np.allclose(betas[i_kernel,:],beta))
+                
+    # The sufficient statistics of two chunks of samples sum to those of all samples
+    (XtWX, XtWy) = weightedLeastSquaresStatistics(inputs[:200],multi_targets[:200],activations[:200],True)
+    (XtWX_rest, XtWy_rest) = weightedLeastSquaresStatistics(inputs[200:],multi_targets[200:],activations[200:],True)
+    betas = leastSquaresFromStatistics(XtWX+XtWX_rest,XtWy+XtWy_rest,0.1)
+    assert(np.allclose(betas,weightedLeastSquaresBatch(inputs,multi_targets,activations,True,0.1)))
+                
+    # Sparse weights give the same results as dense weights with zeros
+    sparse_activations = Gaussian.activationsSparse(centers, widths, inputs, True, 3.0)
+    betas = weightedLeastSquaresBatch(inputs,multi_targets,sparse_activations,True,0.1)
+    assert(np.allclose(betas,weightedLeastSquaresBatch(inputs,multi_targets,sparse_activations.toarray(),True,0.1)))
+    
+    # For badly conditioned problems, the singular value decompositions of sqrt(W) X are much more 
+    # accurate than solving with X^T W X
+    inputs_far = inputs + 1e4
+    targets_linear = 2.0*inputs_far - 3.0
+    activations_far = Gaussian.activations(centers+1e4, widths, inputs_far, True)
+    for weights in [activations_far, Gaussian.activationsSparse(centers+1e4, widths, inputs_far, True, 3.0)]:
+        betas = weightedLeastSquaresBatch(inputs_far,targets_linear,weights)
+        assert(np.allclose(betas,[2.0,-3.0],atol=1e-4))
+    betas_statistics = leastSquaresFromStatistics(*weightedLeastSquaresStatistics(inputs_far,targets_linear,activations_far))
+    assert(not np.allclose(betas_statistics[:,:,0],[2.0,-3.0],atol=1e-4))
+                
+    print('Weighted least squares solutions are the same.')
@@ -0,0 +1,209 @@
+# This file is part of DmpBbo, a set of libraries and programs for the 
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+# 
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Optional compiled kernels for the innermost loops of DmpBbo.
+
+If Numba is installed, the loops in this module are compiled to machine code at their first
+call, and used by Dmp.integrateSpringDamper (Euler integration), Gaussian.activations and the 
+predict() functions of LWR and RBFN (for dense activations without a cache). This is the 
+"NUMBA" backend, which is the default if Numba is available. Otherwise, or with the "NUMPY" 
+backend, the vectorized NumPy implementations of these functions are used.
+
+    with backend("NUMPY"):
+        (xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+        
+The kernels compute in double precision; their results are converted to the float type by the
+caller.
+"""
+
+import math
+import numpy as np
+from contextlib import contextmanager
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_backend = "NUMPY" if numba is None else "NUMBA"
+
+def isNumbaAvailable():
+    return numba is not None
+
+def getBackend():
+    return _backend
+    
+def setBackend(name):
+    global _backend
+    name = name.upper()
+    assert(name in ("NUMPY", "NUMBA"))
+    if name=="NUMBA" and numba is None:
+        raise ImportError('The NUMBA backend requires the numba package.')
+    _backend = name
+    
+@contextmanager
+def backend(name):
+    """Use backend 'name' within a 'with' block, and restore the previous one afterwards."""
+    global _backend
+    previous_backend = getBackend()
+    setBackend(name)
+    try:
+        yield
+    finally:
+        _backend = previous_backend
+        
+def useCompiled():
+    return _backend=="NUMBA"
+    
+_compiled_kernels = {}
+
+def compiled(loops):
+    """Return the compiled version of one of the loop functions below."""
+    if loops not in _compiled_kernels:
+        _compiled_kernels[loops] = numba.njit(cache=True)(loops)
+    return _compiled_kernels[loops]
+    
+def asKernelArray(values, shape=None):
+    values = np.ascontiguousarray(values,dtype=np.float64)
+    if shape is not None:
+        values = np.ascontiguousarray(np.broadcast_to(values,shape))
+    return values
+    
+    
+def springDamperEuler(ts, xs_goal, forcing_terms, y_init, spring_constant, damping_coefficient, mass, tau):
+    """Compiled version of the loop in Dmp.integrateSpringDamper.
+    
+    xs_goal and forcing_terms are broadcast against each other, with time as the first 
+    dimension. Returns (ys, zs, yds, zds) of the broadcast shape.
+    """
+    shape = np.broadcast(xs_goal,forcing_terms).shape
+    n_time_steps = shape[0]
+    flat_shape = (n_time_steps,int(np.prod(shape[1:])))
+    xs_goal = asKernelArray(xs_goal,shape).reshape(flat_shape)
+    forcing_terms = asKernelArray(forcing_terms,shape).reshape(flat_shape)
+    y_init = asKernelArray(y_init,shape[1:]).reshape(flat_shape[1])
+    results = [ np.empty(flat_shape) for ii in range(4) ]
+    compiled(springDamperEulerLoops)(asKernelArray(ts),xs_goal,forcing_terms,y_init,
+        float(spring_constant),float(damping_coefficient),float(mass),float(tau),*results)
+    return tuple([ np.reshape(result,shape) for result in results ])
+    
+def springDamperEulerLoops(ts, xs_goal, forcing_terms, y_init, spring_constant, damping_coefficient, mass, tau, ys, zs, yds, zds):
+    # Same operations as Dmp.integrateSpringDamper, for n_time_steps x n_dims arrays
+    (n_time_steps, n_dims) = forcing_terms.shape
+    for i_dim in range(n_dims):
+        ys[0,i_dim] = y_init[i_dim]
+        zs[0,i_dim] = 0.0
+        yds[0,i_dim] = zs[0,i_dim]/tau
+        zds[0,i_dim] = (-spring_constant*(ys[0,i_dim]-xs_goal[0,i_dim]) - damping_coefficient*zs[0,i_dim])/(mass*tau) + forcing_terms[0,i_dim]/tau
+    for tt in range(1,n_time_steps):
+        dt = ts[tt]-ts[tt-1]
+        for i_dim in range(n_dims):
+            ys[tt,i_dim] = ys[tt-1,i_dim] + dt*yds[tt-1,i_dim]
+            zs[tt,i_dim] = zs[tt-1,i_dim] + dt*zds[tt-1,i_dim]
+            yds[tt,i_dim] = zs[tt,i_dim]/tau
+            zds[tt,i_dim] = (-spring_constant*(ys[tt,i_dim]-xs_goal[tt,i_dim]) - damping_coefficient*zs[tt,i_dim])/(mass*tau) + forcing_terms[tt,i_dim]/tau
+    
+    
+def gaussianActivations(centers, widths, inputs, normalized_basis_functions):
+    """Compiled version of Gaussian.activations, with n_basis_functions x n_dims centers and widths."""
+    activations = np.empty([inputs.shape[0],centers.shape[0]])
+    compiled(gaussianActivationsLoops)(asKernelArray(centers),asKernelArray(widths),asKernelArray(inputs),
+        normalized_basis_functions,activations)
+    return activations
+    
+def gaussianActivationsLoops(centers, widths, inputs, normalized_basis_functions, activations):
+    (n_basis_functions, n_dims) = centers.shape
+    for i_sample in range(inputs.shape[0]):
+        sum_activations = 0.0
+        for i_bf in range(n_basis_functions):
+            activations[i_sample,i_bf] = gaussianActivation(centers,widths,inputs,i_sample,i_bf)
+            sum_activations += activations[i_sample,i_bf]
+        if normalized_basis_functions:
+            for i_bf in range(n_basis_functions):
+                activations[i_sample,i_bf] = normalizedActivation(activations[i_sample,i_bf],sum_activations,n_basis_functions)
+
+def gaussianActivation(centers, widths, inputs, i_sample, i_bf):
+    # exp(\sum_d=1^D [-0.5*(x_d-mu_d)^2/Sigma_(d,d)]), see Gaussian.activations
+    exponent = 0.0
+    for i_dim in range(centers.shape[1]):
+        scaled = (inputs[i_sample,i_dim]-centers[i_bf,i_dim])/widths[i_bf,i_dim]
+        exponent += scaled*scaled
+    return math.exp(-0.5*exponent)
+    
+def normalizedActivation(activation, sum_activations, n_basis_functions):
+    # If no basis function is active, all get the same value
+    if sum_activations==0.0 or n_basis_functions==1:
+        return 1.0/n_basis_functions
+    return activation/sum_activations
+    
+    
+def rbfnPredict(centers, widths, weights, inputs):
+    """Compiled version of FunctionApproximatorRBFN.predict, without computing all activations first.
+    
+    centers and widths are n_basis_functions x n_dims, weights n_basis_functions x n_outputs.
+    """
+    outputs = np.empty([inputs.shape[0],weights.shape[1]])
+    compiled(rbfnPredictLoops)(asKernelArray(centers),asKernelArray(widths),asKernelArray(weights),asKernelArray(inputs),outputs)
+    return outputs
+    
+def rbfnPredictLoops(centers, widths, weights, inputs, outputs):
+    (n_basis_functions, n_outputs) = weights.shape
+    for i_sample in range(inputs.shape[0]):
+        for i_output in range(n_outputs):
+            outputs[i_sample,i_output] = 0.0
+        for i_bf in range(n_basis_functions):
+            activation = gaussianActivation(centers,widths,inputs,i_sample,i_bf)
+            for i_output in range(n_outputs):
+                outputs[i_sample,i_output] += activation*weights[i_bf,i_output]
+                
+    
+def lwrPredict(centers, widths, offsets, slopes, inputs):
+    """Compiled version of FunctionApproximatorLWR.predict, without computing the lines first.
+    
+    centers and widths are n_basis_functions x n_dims, offsets n_basis_functions x n_outputs
+    and slopes n_basis_functions x n_dims x n_outputs.
+    """
+    outputs = np.empty([inputs.shape[0],offsets.shape[1]])
+    activations = np.empty(centers.shape[0])
+    compiled(lwrPredictLoops)(asKernelArray(centers),asKernelArray(widths),asKernelArray(offsets),asKernelArray(slopes),
+        asKernelArray(inputs),activations,outputs)
+    return outputs
+    
+def lwrPredictLoops(centers, widths, offsets, slopes, inputs, activations, outputs):
+    (n_basis_functions, n_outputs) = offsets.shape
+    n_dims = inputs.shape[1]
+    for i_sample in range(inputs.shape[0]):
+        sum_activations = 0.0
+        for i_bf in range(n_basis_functions):
+            activations[i_bf] = gaussianActivation(centers,widths,inputs,i_sample,i_bf)
+            sum_activations += activations[i_bf]
+        for i_output in range(n_outputs):
+            outputs[i_sample,i_output] = 0.0
+        # Sum of the lines, weighted with the normalized activations
+        for i_bf in range(n_basis_functions):
+            activation = normalizedActivation(activations[i_bf],sum_activations,n_basis_functions)
+            for i_output in range(n_outputs):
+                line = offsets[i_bf,i_output]
+                for i_dim in range(n_dims):
+                    line += slopes[i_bf,i_dim,i_output]*inputs[i_sample,i_dim]
+                outputs[i_sample,i_output] += activation*line
+    
+    
+if numba is not None:
+    # Functions called from the loops must be compiled as well
+    gaussianActivation = numba.njit(cache=True)(gaussianActivation)
+    normalizedActivation = numba.njit(cache=True)(normalizedActivation)
@@ -0,0 +1,55 @@
+# This file is part of DmpBbo, a set of libraries and programs for the
+# black-box optimization of dynamical movement primitives.
+# Copyright (C) 2018 Freek Stulp
+#
+# DmpBbo is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# DmpBbo is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with DmpBbo.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Floating point type used for the computations and storage in DmpBbo.
+
+The default is double precision (np.float64). With single precision (np.float32), 
+integration, basis function activations, predictions and trajectories take half the memory 
+and bandwidth, at the cost of accuracy. Least squares problems are always solved in double 
+precision.
+
+    with floatType(np.float32):
+        (xs, xds, forcing_terms, fa_outputs) = dmp.analyticalSolution(ts)
+"""
+
+import numpy as np
+from contextlib import contextmanager
+
+_float_type = np.float64
+
+def getFloatType():
+    return _float_type
+    
+def setFloatType(float_type):
+    global _float_type
+    float_type = np.dtype(float_type).type
+    assert(float_type in (np.float32, np.float64))
+    _float_type = float_type
+    
+@contextmanager
+def floatType(float_type):
+    """Use float_type within a 'with' block, and restore the previous one afterwards."""
+    previous_float_type = getFloatType()
+    setFloatType(float_type)
+    try:
+        yield
+    finally:
+        setFloatType(previous_float_type)
+        
+def asFloatType(values):
+    """Convert values to the current float type (without copying if it already is)."""
+    return np.asarray(values,dtype=_float_type)